@@ -0,0 +1,90 @@
+"""Per-invocation database overhead of a fresh connection vs the warm one.
+
+Runs ``--invocations`` simulated invocations of a reporting Lambda, each
+reading a posture summary, against the PostgreSQL the ``DB_*`` environment
+points at (``make postgres`` starts one in Docker):
+
+- ``cold``: a new connection per invocation, as without a warm container
+- ``warm``: ``aurora.get_connection``, reused with no round trip
+- ``warm_pinged``: the same, pinged before every use, as after an idle
+  freeze longer than DB_PING_AFTER_SECONDS
+- ``warm_unprepared``: reused, with prepared statements off (DB_PROXY)
+
+Usage:
+    python benchmarks/aurora_connections.py [--invocations 200]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+import psycopg2  # noqa: E402
+
+from lambdas import aurora, reporting  # noqa: E402
+from lambdas.findings import FINDINGS_DDL  # noqa: E402
+
+
+def invoke(connection_factory):
+    reporting.posture_summary(
+        "bench", date(2026, 1, 1), date(2026, 1, 31), connection_factory
+    )
+
+
+def cold_connection():
+    aurora.close()
+    return aurora.get_connection()
+
+
+def measure(invocations, connection_factory):
+    timings = []
+    for _ in range(invocations):
+        started = time.perf_counter()
+        invoke(connection_factory)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invocations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    try:
+        connection = aurora.get_connection()
+    except psycopg2.OperationalError as exc:
+        sys.exit(f"No PostgreSQL to benchmark against: {exc}")
+    with connection.cursor() as cursor:
+        cursor.execute(FINDINGS_DDL)
+    connection.commit()
+
+    results = {"cold": measure(args.invocations, cold_connection)}
+    aurora.PING_AFTER_SECONDS = float("inf")
+    invoke(aurora.get_connection)
+    results["warm"] = measure(args.invocations, aurora.get_connection)
+    aurora.PING_AFTER_SECONDS = 0
+    results["warm_pinged"] = measure(args.invocations, aurora.get_connection)
+    aurora.PING_AFTER_SECONDS = float("inf")
+    aurora.PREPARED_STATEMENTS = False
+    results["warm_unprepared"] = measure(args.invocations, aurora.get_connection)
+    aurora.close()
+
+    results["connect_overhead_ms"] = round(
+        results["cold"]["p50_ms"] - results["warm"]["p50_ms"], 2
+    )
+    print(json.dumps({"invocations": args.invocations, **results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cold-start benchmark for the Lambda entry points in ``handlers.py``.
+
+Every sample runs in a fresh interpreter so module imports and client
+construction are measured the way a new Lambda container sees them. AWS is
+mocked with moto, so no credentials are needed.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--handler onboarding_handler]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HANDLERS = {
+    "onboarding_handler": {
+        "httpMethod": "GET",
+        "path": "/onboarding",
+        "queryStringParameters": None,
+        "body": None,
+    },
+    "frontend_proxy_handler": {"rawPath": "/"},
+    "import_aws_handler": {},
+    "import_azure_handler": {},
+    "import_wiz_handler": {},
+    "import_katana_handler": {},
+    "import_coralogix_handler": {},
+    "remediation_planning_handler": {},
+    "reporting_handler": {},
+    "assessment_handler": {},
+}
+
+MOCK_ENV = {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "DYNAMODB_TABLE": "bench-onboarding",
+    "FRONTEND_BUCKET": "bench-frontend",
+}
+
+
+def _seed_mocked_aws():
+    """Create the resources the handlers expect inside the active moto mock."""
+    import boto3
+
+    boto3.client("dynamodb").create_table(
+        TableName=MOCK_ENV["DYNAMODB_TABLE"],
+        KeySchema=[{"AttributeName": "onboardingId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "onboardingId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=MOCK_ENV["FRONTEND_BUCKET"])
+    s3.put_object(
+        Bucket=MOCK_ENV["FRONTEND_BUCKET"], Key="index.html", Body=b"<html></html>"
+    )
+
+
+def _invoke(handler, event):
+    start = time.perf_counter()
+    try:
+        handler(event, {})
+        error = None
+    except NotImplementedError:
+        error = "NotImplementedError"
+    return time.perf_counter() - start, error
+
+
+def run_worker(handler_name):
+    """Measure one cold start in this (fresh) process and print it as JSON."""
+    # moto and the fixture resources are set up before timing starts so only
+    # the handler's own import and first-call work is measured.
+    from moto import mock_aws
+
+    with mock_aws():
+        _seed_mocked_aws()
+
+        start = time.perf_counter()
+        import handlers
+
+        import_s = time.perf_counter() - start
+
+        handler = getattr(handlers, handler_name)
+        event = HANDLERS[handler_name]
+        first_s, error = _invoke(handler, event)
+        warm_s, _ = _invoke(handler, event)
+
+    print(
+        json.dumps(
+            {
+                "import_s": import_s,
+                "first_invocation_s": first_s,
+                "warm_invocation_s": warm_s,
+                "error": error,
+            }
+        )
+    )
+
+
+def sample(handler_name):
+    env = dict(os.environ, **MOCK_ENV)
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", handler_name],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PROJECT_ROOT,
+        env=env,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--handler", action="append", choices=sorted(HANDLERS))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        sys.path.insert(0, PROJECT_ROOT)
+        run_worker(args.worker)
+        return
+
+    report = {}
+    for handler_name in args.handler or HANDLERS:
+        samples = [sample(handler_name) for _ in range(args.runs)]
+        report[handler_name] = {
+            metric.replace("_s", "_ms"): round(
+                statistics.median(s[metric] for s in samples) * 1000, 3
+            )
+            for metric in ("import_s", "first_invocation_s", "warm_invocation_s")
+        }
+        report[handler_name]["error"] = samples[-1]["error"]
+
+    print(json.dumps({"runs": args.runs, "handlers": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
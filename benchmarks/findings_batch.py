@@ -0,0 +1,148 @@
+"""Memory and CPU cost of a million findings as FindingBatch columns vs dicts.
+
+Builds ``--count`` synthetic findings spread over a few sources, accounts,
+regions and severities (the low-cardinality shape real imports have), once
+as a FindingBatch and once as a list of per-finding dicts, then normalises
+severity/score and CSV-encodes each for COPY. The dict side does the same
+work row by row, which is how the importers handled findings before.
+
+Memory is measured with tracemalloc and reported per finding.
+
+Usage:
+    python benchmarks/findings_batch.py [--count 1000000]
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from lambdas.findings import (  # noqa: E402
+    FINDING_COLUMNS,
+    SCORE_SCALES,
+    SEVERITY_ALIASES,
+    SEVERITY_SCORES,
+    CsvCopyStream,
+    FindingBatch,
+)
+
+SOURCES = ("aws", "wiz", "azure", "katana")
+SEVERITIES = ("CRITICAL", "High", "medium", "LOW", "Informational", "moderate")
+REGIONS = ("us-east-1", "us-west-2", "eu-west-1", "ap-southeast-2")
+
+
+def synthetic_rows(count):
+    rng = random.Random(7)
+    accounts = [str(100000000000 + i) for i in range(20)]
+    for i in range(count):
+        source = rng.choice(SOURCES)
+        # Values are rebuilt per row, as a JSON decoder would hand them over
+        yield (
+            "".join(source),
+            f"{source}:{i:08d}",
+            "".join(["ob-", "bench"]),
+            "".join(rng.choice(accounts)),
+            "".join(rng.choice(REGIONS)),
+            "".join("AwsS3Bucket"),
+            f"arn:aws:s3:::bucket-{i % 5000}",
+            "".join(rng.choice(SEVERITIES)),
+            rng.choice((None, rng.uniform(0, 10))),
+            f"Finding {i % 900}",
+            "".join("open"),
+            "2026-01-01T00:00:00Z",
+        )
+
+
+def normalise_dict(finding):
+    severity = SEVERITY_ALIASES.get(str(finding["severity"]).lower(), "informational")
+    score = finding["score"]
+    finding["severity"] = severity
+    finding["score"] = (
+        SEVERITY_SCORES[severity]
+        if score is None
+        else min(100.0, float(score) * SCORE_SCALES.get(finding["source"], 1.0))
+    )
+
+
+def measure(build):
+    tracemalloc.start()
+    started = time.perf_counter()
+    findings = build()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return findings, elapsed, size
+
+
+def drain(stream):
+    total = 0
+    while chunk := stream.read(64 * 1024):
+        total += len(chunk)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    batch, batch_build, batch_bytes = measure(
+        lambda: FindingBatch.from_rows(synthetic_rows(args.count))
+    )
+    started = time.perf_counter()
+    batch.normalise()
+    batch_normalise = time.perf_counter() - started
+    started = time.perf_counter()
+    drain(CsvCopyStream(batch))
+    batch_encode = time.perf_counter() - started
+    del batch
+
+    dicts, dict_build, dict_bytes = measure(
+        lambda: [dict(zip(FINDING_COLUMNS, row)) for row in synthetic_rows(args.count)]
+    )
+    started = time.perf_counter()
+    for finding in dicts:
+        normalise_dict(finding)
+    dict_normalise = time.perf_counter() - started
+    started = time.perf_counter()
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(finding.values() for finding in dicts)
+    buffer.seek(0)
+    drain(buffer)
+    dict_encode = time.perf_counter() - started
+
+    def summary(build, normalise, encode, size):
+        return {
+            "build_s": round(build, 2),
+            "normalise_s": round(normalise, 3),
+            "csv_encode_s": round(encode, 2),
+            "bytes_per_finding": round(size / args.count, 1),
+            "total_mib": round(size / 1024 / 1024, 1),
+        }
+
+    print(
+        json.dumps(
+            {
+                "findings": args.count,
+                "finding_batch": summary(
+                    batch_build, batch_normalise, batch_encode, batch_bytes
+                ),
+                "dicts": summary(dict_build, dict_normalise, dict_encode, dict_bytes),
+                "memory_ratio": round(dict_bytes / batch_bytes, 2),
+                "normalise_speedup": round(dict_normalise / batch_normalise, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
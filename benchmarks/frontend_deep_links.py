@@ -0,0 +1,99 @@
+"""Deep-link benchmark for ``frontend_proxy``.
+
+Replays client-side routes such as ``/dashboard/123`` against a moto S3
+bucket and compares the original two-``get_object`` fallback with the
+current handler, reporting S3 calls per request and p50/p99 latency.
+
+Usage:
+    python benchmarks/frontend_deep_links.py [--requests 2000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from botocore.exceptions import ClientError  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from lambdas import aws_clients, frontend_proxy  # noqa: E402
+
+BUCKET = "bench-frontend-bucket"
+
+
+def legacy_handler(event, context):
+    """The pre-cache handler: look up the route, then fetch index.html on NoSuchKey."""
+    s3 = aws_clients.client("s3")
+    path = (event.get("rawPath") or "/").lstrip("/") or "index.html"
+    try:
+        return s3.get_object(Bucket=BUCKET, Key=path)["Body"].read()
+    except ClientError:
+        return s3.get_object(Bucket=BUCKET, Key="index.html")["Body"].read()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(handler, routes):
+    calls = []
+    aws_clients.client("s3").meta.events.register(
+        "before-call.s3.GetObject", lambda **kwargs: calls.append(1)
+    )
+    latencies = []
+    for route in routes:
+        start = time.perf_counter()
+        handler({"rawPath": route}, {})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "requests": len(routes),
+        "s3_get_object_calls": len(calls),
+        "s3_calls_per_request": round(len(calls) / len(routes), 4),
+        "p50_ms": round(percentile(latencies, 50), 4),
+        "p99_ms": round(percentile(latencies, 99), 4),
+        "mean_ms": round(statistics.fmean(latencies), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    routes = [f"/dashboard/{i}" for i in range(args.requests)]
+    frontend_proxy.S3_BUCKET = BUCKET
+    report = {}
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket=BUCKET)
+        boto3.client("s3").put_object(
+            Bucket=BUCKET, Key="index.html", Body=b"<html>" + b"x" * 2048 + b"</html>"
+        )
+        for label, handler in (
+            ("before", legacy_handler),
+            ("after", frontend_proxy.lambda_handler),
+        ):
+            aws_clients.reset()
+            frontend_proxy.asset_cache.clear()
+            frontend_proxy.missing_keys.clear()
+            report[label] = run(handler, routes)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Throughput benchmark for the Security Hub importer, in findings/s.
+
+Two backends are available:
+
+* ``stub`` (default) pages synthetic ASFF findings from memory, optionally
+  with a per-page delay to stand in for API latency, so the importer's own
+  fan-out, normalisation and batching are what gets measured.
+* ``moto`` seeds moto's Security Hub and imports from it end to end.
+
+Findings go to a counting sink, so memory stays flat whatever the volume.
+
+Usage:
+    python benchmarks/import_aws.py [--backend stub] [--findings 200000]
+        [--accounts 4] [--regions 4] [--page-latency-ms 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "MNA_CONTEXT_TABLE": "bench-mna-context",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from lambdas import import_aws  # noqa: E402
+from lambdas.findings import CountingFindingSink  # noqa: E402
+
+REGIONS = ["us-east-1", "us-west-2", "eu-west-1", "ap-southeast-2", "eu-central-1"]
+
+
+def asff_finding(finding_id, account_id, region):
+    return {
+        "SchemaVersion": "2018-10-08",
+        "Id": finding_id,
+        "ProductArn": f"arn:aws:securityhub:{region}::product/aws/securityhub",
+        "GeneratorId": "aws-foundational-security-best-practices/S3.1",
+        "AwsAccountId": account_id,
+        "Region": region,
+        "Types": ["Software and Configuration Checks"],
+        "CreatedAt": "2026-01-01T00:00:00Z",
+        "UpdatedAt": "2026-01-02T00:00:00Z",
+        "Severity": {"Label": "HIGH", "Normalized": 70},
+        "Title": "S3 bucket allows public access",
+        "Description": "desc",
+        "Resources": [{"Type": "AwsS3Bucket", "Id": f"arn:aws:s3:::{finding_id}"}],
+        "Workflow": {"Status": "NEW"},
+    }
+
+
+class StubPaginator:
+    def __init__(self, account_id, region, count, latency_s):
+        self.account_id = account_id
+        self.region = region
+        self.count = count
+        self.latency_s = latency_s
+
+    def paginate(self, Filters, PaginationConfig):
+        page_size = PaginationConfig["PageSize"]
+        for start in range(0, self.count, page_size):
+            if self.latency_s:
+                time.sleep(self.latency_s)
+            yield {
+                "Findings": [
+                    asff_finding(
+                        f"{self.account_id}-{self.region}-{i}",
+                        self.account_id,
+                        self.region,
+                    )
+                    for i in range(start, min(self.count, start + page_size))
+                ]
+            }
+
+
+class StubSession:
+    def __init__(self, account, region, count, latency_s):
+        self.paginator = StubPaginator(account["accountId"], region, count, latency_s)
+
+    def client(self, service_name):
+        return self
+
+    def get_paginator(self, operation_name):
+        return self.paginator
+
+
+def seed_moto(accounts, regions, per_partition):
+    for account in accounts:
+        for region in regions:
+            client = import_aws.account_session(account, region).client("securityhub")
+            findings = [
+                asff_finding(
+                    f"{account['accountId']}-{region}-{i}", account["accountId"], region
+                )
+                for i in range(per_partition)
+            ]
+            for start in range(0, len(findings), 100):
+                client.batch_import_findings(Findings=findings[start : start + 100])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["stub", "moto"], default="stub")
+    parser.add_argument("--findings", type=int, default=200_000)
+    parser.add_argument("--accounts", type=int, default=4)
+    parser.add_argument("--regions", type=int, default=4, choices=range(1, 6))
+    parser.add_argument("--page-latency-ms", type=float, default=20.0)
+    args = parser.parse_args(argv)
+
+    accounts = [
+        {
+            "accountId": f"{100000000000 + n}",
+            "roleArn": f"arn:aws:iam::{100000000000 + n}:role/audit",
+        }
+        for n in range(args.accounts)
+    ]
+    regions = REGIONS[: args.regions]
+    per_partition = args.findings // (len(accounts) * len(regions))
+    event = {"onboardingId": "bench", "accounts": accounts, "regions": regions}
+    sink = CountingFindingSink()
+
+    # Watermarks always go to a moto mna-context table
+    with mock_aws():
+        boto3.resource("dynamodb").create_table(
+            TableName=os.environ["MNA_CONTEXT_TABLE"],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        if args.backend == "stub":
+            import_aws.account_session = lambda account, region: StubSession(
+                account, region, per_partition, args.page_latency_ms / 1000
+            )
+        else:
+            seed_moto(accounts, regions, per_partition)
+        tracemalloc.start()
+        result = import_aws.import_aws_findings(event, sink)
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        json.dumps(
+            {
+                "backend": args.backend,
+                "partitions": len(accounts) * len(regions),
+                "findings": result["findings"],
+                "findings_per_s": result["findingsPerSecond"],
+                "write_batches": sink.batches,
+                "peak_traced_mib": round(peak / 1024 / 1024, 2),
+                "errors": result["errors"],
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
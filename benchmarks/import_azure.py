@@ -0,0 +1,207 @@
+"""Memory per 10k findings for the Azure Resource Graph importer.
+
+Compares the importer's incremental ``table``-format page reader and column
+batches with naively decoding each ``objectArray`` page with ``json.loads``
+and collecting tuple rows. Pages are served from memory in 64 KiB chunks so
+only parsing and batching are measured, and batches go to a counting sink.
+
+The write batch is 10k findings, so peak traced memory is what it takes to
+hold 10k findings in flight while the next page is being read.
+
+Usage:
+    python benchmarks/import_azure.py [--findings 100000] [--subscriptions 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "MNA_CONTEXT_TABLE": "bench-mna-context",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from lambdas import import_azure  # noqa: E402
+from lambdas.findings import CountingFindingSink  # noqa: E402
+from lambdas.pipeline import batched  # noqa: E402
+
+BATCH_SIZE = 10_000
+COLUMNS = [
+    "id",
+    "subscriptionId",
+    "location",
+    "resourceId",
+    "severity",
+    "displayName",
+    "status",
+    "timeGenerated",
+]
+
+
+def assessment_row(subscription_id, i):
+    resource_id = (
+        f"/subscriptions/{subscription_id}/resourceGroups/rg-{i % 20}/providers/"
+        f"Microsoft.Compute/virtualMachines/vm-{i}"
+    )
+    return [
+        f"{resource_id}/providers/Microsoft.Security/assessments/{i:08x}",
+        subscription_id,
+        "westeurope",
+        resource_id,
+        ("High", "Medium", "Low")[i % 3],
+        "Machines should have vulnerability findings resolved",
+        "Unhealthy",
+        "2026-01-02T00:00:00.0000000Z",
+    ]
+
+
+def table_page(subscription_id, start, count):
+    return json.dumps(
+        {
+            "totalRecords": count,
+            "count": count,
+            "data": {
+                "columns": [{"name": name, "type": "string"} for name in COLUMNS],
+                "rows": [
+                    assessment_row(subscription_id, start + i) for i in range(count)
+                ],
+            },
+            "facets": [],
+            "resultTruncated": "false",
+        }
+    ).encode("utf-8")
+
+
+def object_array_page(subscription_id, start, count):
+    return json.dumps(
+        {
+            "totalRecords": count,
+            "count": count,
+            "data": [
+                dict(zip(COLUMNS, assessment_row(subscription_id, start + i)))
+                for i in range(count)
+            ],
+        }
+    ).encode("utf-8")
+
+
+def chunks(data, size=import_azure.READ_CHUNK_BYTES):
+    return (data[start : start + size] for start in range(0, len(data), size))
+
+
+class InMemoryClient:
+    """Serves the same pre-rendered page repeatedly in place of Resource Graph"""
+
+    def __init__(self, body, pages):
+        self.body = body
+        self.pages_per_subscription = pages
+
+    def pages(self, subscription_id, query):
+        for _ in range(self.pages_per_subscription):
+            yield import_azure.PageReader(chunks(self.body))
+
+
+def naive_import(body, subscriptions, pages, sink, onboarding_id):
+    """Baseline: whole-page json.loads into dicts, one tuple per finding"""
+
+    def rows():
+        for _ in range(subscriptions * pages):
+            page = json.loads(b"".join(chunks(body)))
+            for record in page["data"]:
+                yield (
+                    import_azure.SOURCE,
+                    record["id"],
+                    onboarding_id,
+                    record["subscriptionId"],
+                    record["location"],
+                    import_azure.resource_type(record["resourceId"]),
+                    record["resourceId"],
+                    record["severity"].lower(),
+                    None,
+                    record["displayName"],
+                    record["status"],
+                    record["timeGenerated"],
+                )
+
+    for batch in batched(rows(), BATCH_SIZE):
+        sink.write(batch)
+
+
+def measure(run):
+    tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--findings", type=int, default=100_000)
+    parser.add_argument("--subscriptions", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    page_size = import_azure.PAGE_SIZE
+    pages = max(1, args.findings // (args.subscriptions * page_size))
+    findings = pages * page_size * args.subscriptions
+    subscriptions = [f"sub-{n}" for n in range(args.subscriptions)]
+    import_azure.WRITE_BATCH_SIZE = BATCH_SIZE
+    # One worker keeps the comparison like for like with the serial baseline
+    import_azure.MAX_WORKERS = 1
+
+    table_body = table_page("sub-0", 0, page_size)
+    object_body = object_array_page("sub-0", 0, page_size)
+    report = {"findings": findings, "page_size": page_size}
+
+    sink = CountingFindingSink()
+    client = InMemoryClient(table_body, pages)
+    # Watermarks live in a moto mna-context table; fullResync reads every page
+    event = {
+        "onboardingId": "bench",
+        "subscriptions": subscriptions,
+        "fullResync": True,
+    }
+    with mock_aws():
+        boto3.resource("dynamodb").create_table(
+            TableName=os.environ["MNA_CONTEXT_TABLE"],
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        elapsed, peak = measure(
+            lambda: import_azure.import_azure_findings(event, client, sink)
+        )
+    report["streaming_column_batches"] = {
+        "findings_per_s": round(sink.count / elapsed, 1),
+        "peak_kib_per_10k_findings": round(peak / 1024, 1),
+    }
+
+    sink = CountingFindingSink()
+    elapsed, peak = measure(
+        lambda: naive_import(object_body, args.subscriptions, pages, sink, "bench")
+    )
+    report["json_loads_tuple_rows"] = {
+        "findings_per_s": round(sink.count / elapsed, 1),
+        "peak_kib_per_10k_findings": round(peak / 1024, 1),
+    }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Throughput and peak memory of the Katana JSONL ingest on a multi-GB crawl.
+
+Writes a synthetic Katana crawl of ``--size-mib`` to a temporary file, with
+``--unique`` distinct endpoints repeated in varying spellings, then runs
+the importer over it. Ranged S3 reads are served from the local file with
+``os.pread`` so disk, not moto, is the storage; checkpoints go to a moto
+mna-context table and endpoints to a counting sink.
+
+Peak memory is the process's max RSS, which should stay flat however large
+the file is: two ranges, the Bloom filter and one write batch.
+
+Usage:
+    python benchmarks/import_katana.py [--size-mib 2048] [--unique 200000]
+        [--keep FILE]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "MNA_CONTEXT_TABLE": "bench-mna-context",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from lambdas import import_katana  # noqa: E402
+from lambdas.findings import CountingFindingSink  # noqa: E402
+
+BODY = "<html><body>" + "lorem ipsum " * 60 + "</body></html>"
+
+
+def spelling(i, rng):
+    """One of several spellings of endpoint ``i`` that canonicalise the same"""
+    host = rng.choice(["app.example.com", "APP.example.com", "app.example.com:443"])
+    path = f"/section-{i % 97}/item/{i}" + rng.choice(["", "/", "/./"])
+    query = f"?id={rng.randrange(1000)}" + rng.choice(["", "#reviews"])
+    return f"https://{host}{path}{query}"
+
+
+def write_crawl(path, size_bytes, unique):
+    rng = random.Random(42)
+    written = lines = 0
+    with open(path, "w", encoding="utf-8", buffering=1024 * 1024) as out:
+        while written < size_bytes:
+            record = {
+                "timestamp": "2026-01-02T00:00:00.000000Z",
+                "request": {
+                    "method": "GET",
+                    "endpoint": spelling(rng.randrange(unique), rng),
+                    "tag": "a",
+                    "attribute": "href",
+                    "source": "https://app.example.com/",
+                },
+                "response": {
+                    "status_code": 200,
+                    "headers": {"content_type": "text/html"},
+                    "body": BODY,
+                },
+            }
+            line = json.dumps(record) + "\n"
+            out.write(line)
+            written += len(line)
+            lines += 1
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mib", type=int, default=2048)
+    parser.add_argument("--unique", type=int, default=200_000)
+    parser.add_argument("--keep", help="Reuse or keep the crawl at this path")
+    args = parser.parse_args(argv)
+
+    path = args.keep or os.path.join(tempfile.mkdtemp(), "crawl.jsonl")
+    if not os.path.exists(path):
+        write_crawl(path, args.size_mib * 1024 * 1024, args.unique)
+    size = os.path.getsize(path)
+    descriptor = os.open(path, os.O_RDONLY)
+
+    import_katana.object_head = lambda bucket, key: (size, f'"{size}"')
+    import_katana.read_range = lambda bucket, key, start, end: os.pread(
+        descriptor, end - start + 1, start
+    )
+
+    try:
+        with mock_aws():
+            boto3.resource("dynamodb").create_table(
+                TableName=os.environ["MNA_CONTEXT_TABLE"],
+                KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+                AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+                BillingMode="PAY_PER_REQUEST",
+            )
+            rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            sink = CountingFindingSink()
+            started = time.perf_counter()
+            result = import_katana.import_katana_findings(
+                {"onboardingId": "bench", "bucket": "local", "key": path}, sink
+            )
+            elapsed = time.perf_counter() - started
+            rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        os.close(descriptor)
+        if not args.keep:
+            os.remove(path)
+
+    print(
+        json.dumps(
+            {
+                "size_mib": round(size / 1024 / 1024, 1),
+                "lines": result["lines"],
+                "unique_endpoints": result["endpoints"],
+                "duplicates": result["duplicates"],
+                "mib_per_s": round(size / 1024 / 1024 / elapsed, 1),
+                "lines_per_s": round(result["lines"] / elapsed, 1),
+                "write_batches": sink.batches,
+                "peak_rss_mib": round(rss_after / 1024, 1),
+                "peak_rss_growth_mib": round((rss_after - rss_before) / 1024, 1),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
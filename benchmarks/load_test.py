@@ -0,0 +1,353 @@
+"""Mixed-workload load test of the DynamoDB and S3 entry points in ``handlers.py``.
+
+Seeds a moto onboarding table with ``--scale`` synthetic records (1k, 100k
+or 1M) and a moto frontend bucket, then drives ``--requests`` invocations
+from ``--concurrency`` threads through the handlers in-process:
+
+- ``create``: POST /onboarding (``onboarding_handler``)
+- ``step``: PUT /onboarding/{id}/step on a seeded draft
+- ``list``: GET /onboarding by ``userId`` or ``status`` (the GSI queries)
+- ``submit``: POST /onboarding/{id}/submit on a seeded draft
+- ``asset``: static assets and deep links (``frontend_proxy_handler``)
+
+and finally one full ``onboarding_export_handler`` run over the table.
+Reports throughput and p50/p95/p99 latency per operation as JSON.
+
+With a baseline stored for the scale in ``--baseline``, exits 1 when any
+operation fails a request, loses more than ``--tolerance`` of its
+throughput or slows by more than that at p95, give or take one GIL
+switch interval per thread. ``--update-baseline`` stores this run as the
+new baseline instead. Latencies are moto's, so compare runs from the same
+machine.
+
+moto answers a GSI query or a scan page by walking the whole table, so
+list and export times grow with ``--scale`` where DynamoDB's do not; at
+1M records the export alone runs for hours, which ``--no-export`` skips.
+
+Usage:
+    python benchmarks/load_test.py [--scale 1000] [--requests 2000]
+        [--concurrency 8] [--tolerance 0.25] [--update-baseline] [--no-export]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "DYNAMODB_TABLE": "bench-onboarding",
+    "MNA_CONTEXT_TABLE": "bench-mna-context",
+    "FRONTEND_BUCKET": "bench-frontend",
+    "EXPORT_BUCKET": "bench-exports",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+import handlers  # noqa: E402
+
+SCALES = (1_000, 100_000, 1_000_000)
+BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baselines", "load_test.json")
+# Share of requests per operation
+MIX = {"create": 15, "step": 35, "list": 10, "submit": 10, "asset": 30}
+WARMUP_PER_OPERATION = 5
+RECORDS_PER_USER = 50
+STATUSES = ("draft", "draft", "draft", "submitted")
+STEPS = {
+    1: {"companyName": "Acme", "contactName": "Jo", "contactEmail": "jo@acme.test"},
+    2: {"transactionType": "acquisition", "targetCompany": "Beta", "dealStage": "loi"},
+    3: {"cloudProviders": ["aws", "azure"]},
+    4: {"focusAreas": ["iam", "network"]},
+}
+ASSETS = {
+    "index.html": b"<html><script src='/assets/app.js'></script></html>",
+    "assets/app.js": b"console.log('app');" * 2000,
+    "assets/app.css": b"body { margin: 0; }" * 500,
+}
+ROUTES = ["/", "/assets/app.js", "/assets/app.css", "/dashboard/42", "/onboarding/7"]
+
+
+def api_event(method, path, body=None, query=None):
+    return {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": query,
+        "body": json.dumps(body) if body is not None else None,
+    }
+
+
+def create_resources():
+    dynamodb = boto3.client("dynamodb")
+    dynamodb.create_table(
+        TableName=os.environ["DYNAMODB_TABLE"],
+        KeySchema=[{"AttributeName": "onboardingId", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "onboardingId", "AttributeType": "S"},
+            {"AttributeName": "status", "AttributeType": "S"},
+            {"AttributeName": "userId", "AttributeType": "S"},
+            {"AttributeName": "updatedAt", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": index_name,
+                "KeySchema": [
+                    {"AttributeName": hash_key, "KeyType": "HASH"},
+                    {"AttributeName": "updatedAt", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            }
+            for index_name, hash_key in (
+                ("status-updatedAt-index", "status"),
+                ("userId-updatedAt-index", "userId"),
+            )
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    dynamodb.create_table(
+        TableName=os.environ["MNA_CONTEXT_TABLE"],
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=os.environ["EXPORT_BUCKET"])
+    s3.create_bucket(Bucket=os.environ["FRONTEND_BUCKET"])
+    for key, body in ASSETS.items():
+        s3.put_object(Bucket=os.environ["FRONTEND_BUCKET"], Key=key, Body=body)
+
+
+def seed(scale, rng):
+    """Write ``scale`` synthetic records; returns the draft ids and user ids"""
+    users = [f"user-{i}" for i in range(max(1, scale // RECORDS_PER_USER))]
+    drafts = []
+    epoch = datetime(2024, 1, 1)
+    table = boto3.resource("dynamodb").Table(os.environ["DYNAMODB_TABLE"])
+    with table.batch_writer() as batch:
+        for i in range(scale):
+            timestamp = (epoch + timedelta(seconds=i)).isoformat()
+            status = rng.choice(STATUSES)
+            step = rng.randint(1, 4)
+            item = {
+                "onboardingId": f"ob-{i:07d}",
+                "userId": rng.choice(users),
+                "createdAt": timestamp,
+                "updatedAt": timestamp,
+                "currentStep": step,
+                "status": status,
+                "version": step,
+                "formData": {f"step{n}": STEPS[n] for n in range(2, step + 1)},
+                **STEPS[1],
+            }
+            if status == "submitted":
+                item["submittedAt"] = timestamp
+            else:
+                drafts.append(item["onboardingId"])
+            batch.put_item(Item=item)
+    return drafts, users
+
+
+def workload(requests, rng, drafts, users):
+    """The ``(operation, handler, event)`` sequence, drawn to MIX"""
+    operations = rng.choices(list(MIX), weights=list(MIX.values()), k=requests)
+    calls = []
+    for operation in operations:
+        if operation == "create":
+            body = {"userId": rng.choice(users), **STEPS[1]}
+            call = (handlers.onboarding_handler, api_event("POST", "/onboarding", body))
+        elif operation == "step":
+            step = rng.randint(1, 4)
+            path = f"/onboarding/{rng.choice(drafts)}/step"
+            body = {"step": step, "data": STEPS[step]}
+            call = (handlers.onboarding_handler, api_event("PUT", path, body))
+        elif operation == "list":
+            if rng.random() < 0.5:
+                query = {"userId": rng.choice(users), "limit": "20"}
+            else:
+                query = {"status": "draft", "limit": "50"}
+            call = (
+                handlers.onboarding_handler,
+                api_event("GET", "/onboarding", query=query),
+            )
+        elif operation == "submit":
+            path = f"/onboarding/{rng.choice(drafts)}/submit"
+            call = (handlers.onboarding_handler, api_event("POST", path, {}))
+        else:
+            event = {
+                "rawPath": rng.choice(ROUTES),
+                "headers": {"accept-encoding": "gzip, br"},
+            }
+            call = (handlers.frontend_proxy_handler, event)
+        calls.append((operation, *call))
+    return calls
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarise(latencies, errors, elapsed):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+def drive(calls, concurrency):
+    """Invoke ``calls`` from ``concurrency`` threads; returns the per-operation report"""
+    latencies = {operation: [] for operation in MIX}
+    failures = {operation: [] for operation in MIX}
+    lock = threading.Lock()
+
+    def invoke(operation, handler, event):
+        started = time.perf_counter()
+        try:
+            result = handler(event, None)
+            failure = result if result["statusCode"] >= 400 else None
+        except Exception as e:
+            failure = repr(e)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies[operation].append(elapsed)
+            if failure is not None:
+                failures[operation].append(failure)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for call in calls:
+            pool.submit(invoke, *call)
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "total": summarise(
+            sum(latencies.values(), []), sum(map(len, failures.values())), elapsed
+        )
+    }
+    for operation in MIX:
+        if latencies[operation]:
+            report[operation] = summarise(
+                latencies[operation], len(failures[operation]), elapsed
+            )
+            if failures[operation]:
+                report[operation]["first_failure"] = failures[operation][0]
+    return report
+
+
+def regressions(operations, baseline, tolerance, concurrency):
+    """Messages for each operation worse than its baseline by more than ``tolerance``"""
+    # A request can wait out every other thread's GIL switch interval, which
+    # swamps sub-millisecond ones such as cached assets
+    jitter_ms = sys.getswitchinterval() * 1000 * concurrency
+    found = []
+    for operation, result in operations.items():
+        if result["errors"]:
+            found.append(f"{operation}: {result['errors']} failed requests")
+        expected = baseline.get(operation)
+        if not expected:
+            continue
+        if result["throughput_rps"] < expected["throughput_rps"] * (1 - tolerance):
+            found.append(
+                f"{operation}: throughput {result['throughput_rps']} rps "
+                f"< baseline {expected['throughput_rps']} rps"
+            )
+        if result["p95_ms"] > expected["p95_ms"] * (1 + tolerance) + jitter_ms:
+            found.append(
+                f"{operation}: p95 {result['p95_ms']} ms "
+                f"> baseline {expected['p95_ms']} ms"
+            )
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, choices=SCALES, default=SCALES[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--no-export", action="store_true")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    # EMF metric lines, as to a Lambda's log pipe
+    with mock_aws(), open(os.devnull, "w") as devnull:
+        create_resources()
+        started = time.perf_counter()
+        drafts, users = seed(args.scale, rng)
+        seed_s = time.perf_counter() - started
+
+        with contextlib.redirect_stdout(devnull):
+            # Outside the timing: the first calls build clients and caches
+            warmup = workload(WARMUP_PER_OPERATION * len(MIX), rng, drafts, users)
+            drive(warmup, 1)
+            operations = drive(
+                workload(args.requests, rng, drafts, users), args.concurrency
+            )
+
+            export = None
+            if not args.no_export:
+                started = time.perf_counter()
+                result = handlers.onboarding_export_handler({}, None)
+                export_s = time.perf_counter() - started
+                export = {
+                    "rows": result["rows"],
+                    "parts": result["parts"],
+                    "duration_s": round(export_s, 3),
+                    "rows_per_s": round(result["rows"] / export_s, 1),
+                }
+
+    report = {
+        "scale": args.scale,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed_s": round(seed_s, 2),
+        "operations": operations,
+        "export": export,
+    }
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baselines = json.load(f)
+    if args.update_baseline:
+        baselines[str(args.scale)] = operations
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        found = []
+    else:
+        found = regressions(
+            operations,
+            baselines.get(str(args.scale), {}),
+            args.tolerance,
+            args.concurrency,
+        )
+    report["regressions"] = found
+
+    print(json.dumps(report, indent=2))
+    if found:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput of the bulk onboarding endpoints against the single-item path.
+
+Creates and reads the same number of records through ``POST /onboarding`` /
+``GET /onboarding/{id}`` one at a time and through ``POST/GET
+/onboarding/batch``, all against moto, and reports records/s and DynamoDB
+calls for each.
+
+Usage:
+    python benchmarks/onboarding_batch.py [--records 500]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "DYNAMODB_TABLE": "bench-onboarding",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from lambdas import aws_clients, onboarding  # noqa: E402
+
+
+def record(i):
+    return {
+        "companyName": f"Company {i}",
+        "contactName": "Jane Doe",
+        "contactEmail": f"jane{i}@example.com",
+    }
+
+
+def invoke(method, path, body=None, query_params=None):
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": query_params,
+        "body": json.dumps(body) if body is not None else None,
+    }
+    return json.loads(onboarding.onboarding_logic(event, {})["body"])
+
+
+def single_item(records):
+    ids = [
+        invoke("POST", "/onboarding", record(i))["onboardingId"] for i in range(records)
+    ]
+    yield "create"
+    for onboarding_id in ids:
+        invoke("GET", f"/onboarding/{onboarding_id}")
+    yield "get"
+
+
+def batched(records):
+    ids = []
+    for start in range(0, records, onboarding.BATCH_MAX_RECORDS):
+        chunk = [
+            record(i)
+            for i in range(start, min(records, start + onboarding.BATCH_MAX_RECORDS))
+        ]
+        results = invoke("POST", "/onboarding/batch", {"records": chunk})["results"]
+        ids.extend(result["onboardingId"] for result in results)
+    yield "create"
+    for start in range(0, len(ids), onboarding.BATCH_MAX_RECORDS):
+        chunk = ids[start : start + onboarding.BATCH_MAX_RECORDS]
+        invoke("GET", "/onboarding/batch", query_params={"ids": ",".join(chunk)})
+    yield "get"
+
+
+def run(workload, records):
+    boto3.client("dynamodb").create_table(
+        TableName=os.environ["DYNAMODB_TABLE"],
+        KeySchema=[{"AttributeName": "onboardingId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "onboardingId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    calls = []
+    aws_clients.resource("dynamodb").meta.client.meta.events.register(
+        "before-call.dynamodb", lambda model, **kwargs: calls.append(model.name)
+    )
+    report = {}
+    start = time.perf_counter()
+    for phase in workload(records):
+        elapsed = time.perf_counter() - start
+        report[phase] = {
+            "records_per_s": round(records / elapsed, 1),
+            "dynamodb_calls": len(calls),
+        }
+        calls.clear()
+        start = time.perf_counter()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    report = {"records": args.records}
+    for label, workload in (("single_item", single_item), ("batch", batched)):
+        # The handler logs every event; keep that out of the JSON report
+        with mock_aws(), contextlib.redirect_stdout(io.StringIO()):
+            aws_clients.reset()
+            report[label] = run(workload, args.records)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
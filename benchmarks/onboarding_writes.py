@@ -0,0 +1,125 @@
+"""DynamoDB calls per request for the onboarding mutation paths.
+
+Drives step updates, submits and deletes through ``onboarding_logic`` against
+moto and counts DynamoDB API calls per request. The "before" run adds the
+``get_item`` existence check the handlers used to make ahead of every write.
+
+Usage:
+    python benchmarks/onboarding_writes.py [--records 200]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "AWS_SESSION_TOKEN": "testing",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "DYNAMODB_TABLE": "bench-onboarding",
+}.items():
+    os.environ.setdefault(name, value)
+
+import boto3  # noqa: E402
+from moto import mock_aws  # noqa: E402
+
+from lambdas import aws_clients, onboarding  # noqa: E402
+
+STEPS = {
+    1: {"companyName": "Acme", "contactName": "Jo", "contactEmail": "jo@acme.test"},
+    2: {"transactionType": "acquisition", "targetCompany": "Beta", "dealStage": "loi"},
+    3: {"cloudProviders": ["aws", "azure"]},
+    4: {"focusAreas": ["iam", "network"]},
+}
+
+
+def event(method, path, body=None):
+    return {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": None,
+        "body": json.dumps(body) if body is not None else None,
+    }
+
+
+def create_table():
+    boto3.client("dynamodb").create_table(
+        TableName=os.environ["DYNAMODB_TABLE"],
+        KeySchema=[{"AttributeName": "onboardingId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "onboardingId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def run(records, existence_check):
+    calls = Counter()
+    current = []
+    aws_clients.resource("dynamodb").meta.client.meta.events.register(
+        "before-call.dynamodb", lambda model, **kwargs: current.append(model.name)
+    )
+    latencies = {"step": [], "submit": [], "delete": []}
+    per_request = {"step": [], "submit": [], "delete": []}
+
+    ids = []
+    for _ in range(records):
+        created = onboarding.onboarding_logic(event("POST", "/onboarding", {}), {})
+        ids.append(json.loads(created["body"])["onboardingId"])
+
+    def timed(kind, onboarding_id, request):
+        current.clear()
+        start = time.perf_counter()
+        if existence_check:
+            onboarding.get_table().get_item(Key={"onboardingId": onboarding_id})
+        onboarding.onboarding_logic(request, {})
+        latencies[kind].append((time.perf_counter() - start) * 1000)
+        per_request[kind].append(len(current))
+        calls.update(current)
+
+    for onboarding_id in ids:
+        for step, data in STEPS.items():
+            path = f"/onboarding/{onboarding_id}/step"
+            timed(
+                "step", onboarding_id, event("PUT", path, {"step": step, "data": data})
+            )
+        path = f"/onboarding/{onboarding_id}/submit"
+        timed("submit", onboarding_id, event("POST", path, {}))
+        timed("delete", onboarding_id, event("DELETE", f"/onboarding/{onboarding_id}"))
+
+    return {
+        kind: {
+            "requests": len(per_request[kind]),
+            "dynamodb_calls_per_request": statistics.fmean(per_request[kind]),
+            "p50_ms": round(statistics.median(latencies[kind]), 4),
+        }
+        for kind in per_request
+    } | {"calls_by_operation": dict(calls)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    report = {}
+    for label, existence_check in (("before", True), ("after", False)):
+        # The handler logs every event; keep that out of the JSON report
+        with mock_aws(), contextlib.redirect_stdout(io.StringIO()):
+            aws_clients.reset()
+            create_table()
+            report[label] = run(args.records, existence_check)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Time to build a remediation plan from 100k findings, in full and incrementally.
+
+Builds ``--count`` synthetic findings across accounts, resources and the
+focus areas remediation planning classifies into, with a few findings per
+resource so grouping has work to do, then times ``plan_remediation`` -
+classification, risk scoring, grouping, the dependency graph and the
+topological schedule - against the 60 second Lambda timeout.
+
+It then changes the severity of ``--changed-percent`` of the findings and
+times replanning twice: a full rebuild from every finding, and ``replan``
+from the stored plan and only the findings on the touched resources, as
+remediation_planning_logic does once a plan exists. Both include the diff
+against the previous plan. Reading findings from Aurora is not timed; the
+findings each side reads and the task rows each writes are reported.
+
+Usage:
+    python benchmarks/remediation_plan.py [--count 100000] [--accounts 20]
+        [--changed-percent 1]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from lambdas.findings import FINDING_COLUMNS, FindingBatch  # noqa: E402
+from lambdas.remediation_planning import (  # noqa: E402
+    plan_diff,
+    plan_remediation,
+    replan,
+    resource_key,
+)
+
+LAMBDA_TIMEOUT_SECONDS = 60
+KINDS = (
+    ("AwsIamRole", "IAM role has admin privileges"),
+    ("AwsIamUser", "IAM user access key not rotated"),
+    ("AwsS3Bucket", "S3 bucket policy allows public read"),
+    ("AwsS3Bucket", "S3 bucket not encrypted"),
+    ("AwsEc2SecurityGroup", "Security group allows ingress from 0.0.0.0/0"),
+    ("AwsCloudTrailTrail", "CloudTrail should be enabled"),
+    ("VIRTUAL_MACHINE", "CVE-2026-{:04d} in openssl"),
+    ("AwsConfigRule", "Resource is not tagged"),
+)
+SEVERITIES = ("critical", "high", "medium", "low", "informational")
+SEVERITY = FINDING_COLUMNS.index("severity")
+
+
+def synthetic_rows(count, accounts):
+    rng = random.Random(17)
+    account_ids = [str(100000000000 + i) for i in range(accounts)]
+    for i in range(count):
+        resource_type, title = rng.choice(KINDS)
+        resource = rng.randrange(max(1, count // 4))
+        yield (
+            "aws",
+            f"aws:{i:08d}",
+            "ob-bench",
+            account_ids[resource % accounts],
+            "us-east-1",
+            resource_type,
+            f"{resource_type}-{resource}",
+            rng.choice(SEVERITIES),
+            None,
+            title.format(i % 500),
+            "NEW",
+            "2026-01-01T00:00:00Z",
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, default=20)
+    parser.add_argument("--focus", nargs="*", default=["iam", "data"])
+    parser.add_argument("--changed-percent", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    rows = list(synthetic_rows(args.count, args.accounts))
+    findings = FindingBatch.from_rows(rows)
+    started = time.perf_counter()
+    plan = plan_remediation(findings, args.focus, onboarding_id="ob-bench")
+    elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    plan_rows = sum(1 for _ in plan.rows())
+    encode = time.perf_counter() - started
+
+    rng = random.Random(23)
+    changed = rng.sample(range(len(rows)), int(len(rows) * args.changed_percent / 100))
+    for i in changed:
+        rows[i] = (
+            rows[i][:SEVERITY] + (rng.choice(SEVERITIES),) + rows[i][SEVERITY + 1 :]
+        )
+
+    everything = FindingBatch.from_rows(rows)
+    started = time.perf_counter()
+    rebuilt = plan_remediation(everything, args.focus, onboarding_id="ob-bench")
+    full_diff = plan_diff(plan, rebuilt)
+    full = time.perf_counter() - started
+
+    # What load_changed_findings would return for the changed findings
+    def key(row):
+        return row[3], resource_key(row[0], row[1], row[6])
+
+    touched = {key(rows[i]) for i in changed}
+    delta = FindingBatch.from_rows(row for row in rows if key(row) in touched)
+    started = time.perf_counter()
+    updated, diff = replan(plan, delta, touched, args.focus)
+    incremental = time.perf_counter() - started
+    assert list(updated.rows()) == list(rebuilt.rows())
+
+    print(
+        json.dumps(
+            {
+                "findings": len(findings),
+                "tasks": len(plan),
+                "focus_areas": args.focus,
+                "plan_s": round(elapsed, 2),
+                "rows_s": round(encode, 2),
+                "rows": plan_rows,
+                "lambda_timeout_share": round(elapsed / LAMBDA_TIMEOUT_SECONDS, 3),
+                "replan": {
+                    "changed_findings": len(changed),
+                    "findings_replanned": len(delta),
+                    "full_s": round(full, 3),
+                    "incremental_s": round(incremental, 3),
+                    "speedup": round(full / incremental, 1),
+                    "tasks_written_full": len(rebuilt),
+                    "tasks_written_incremental": len(diff.written())
+                    + len(diff.removed),
+                    "diff": {
+                        name: value
+                        for name, value in diff.summary(updated).items()
+                        if name != "tasks"
+                    },
+                    "diff_matches_full": full_diff.summary(rebuilt)
+                    == diff.summary(updated),
+                },
+                "first_tasks": plan.preview(3),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Peak memory of a streamed CSV finding report as the report grows.
+
+Generates reports of each ``--rows`` size through ``generate_report``: the
+findings come from a fake server-side cursor that makes each row as it is
+fetched, and the parts go to an S3 stub that keeps only their sizes, so
+the peak tracemalloc reports is what rendering, compressing and buffering
+a part costs. It levels off at about one ``--part-mib`` part plus a
+render batch once a report spans more than one part, however many rows
+follow. Timings include tracemalloc's overhead.
+
+Usage:
+    python benchmarks/report_stream.py [--rows 10000 100000 1000000]
+        [--part-mib 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+from lambdas import aws_clients, reporting  # noqa: E402
+
+SEVERITIES = ("critical", "high", "medium", "low", "informational")
+
+
+class Cursor:
+    """Named cursor that makes ``rows`` synthetic findings on iteration"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params):
+        pass
+
+    def __iter__(self):
+        for i in range(self.rows):
+            yield (
+                "aws",
+                f"arn:aws:securityhub:us-east-1:111111111111:finding/{i:012d}",
+                f"{111111111111 + i % 40}",
+                "us-east-1",
+                "AwsS3Bucket",
+                f"arn:aws:s3:::bucket-{i % 5000}",
+                f"S3 bucket {i % 5000} allows public access",
+                SEVERITIES[i % 5],
+                float(i % 100),
+                "NEW",
+                "2026-01-02T00:00:00Z",
+                "data",
+            )
+
+
+class Connection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, name=None):
+        return Cursor(self.rows)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class S3:
+    """Multipart upload stub that only counts what it is sent"""
+
+    def __init__(self):
+        self.uploaded_bytes = 0
+
+    def create_multipart_upload(self, **kwargs):
+        return {"UploadId": "bench"}
+
+    def upload_part(self, Body, PartNumber, **kwargs):
+        self.uploaded_bytes += len(Body)
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, **kwargs):
+        pass
+
+    def abort_multipart_upload(self, **kwargs):
+        pass
+
+    def generate_presigned_url(self, *args, **kwargs):
+        return "https://bench.s3.amazonaws.com/report"
+
+
+def run(rows):
+    s3 = S3()
+    aws_clients.client = lambda service_name: s3
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = reporting.generate_report(
+        "bench",
+        date(2026, 1, 1),
+        date(2026, 1, 31),
+        "csv",
+        "bench",
+        lambda: Connection(rows),
+    )
+    seconds = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "rows": result["rows"],
+        "parts": result["parts"],
+        "compressed_mib": round(s3.uploaded_bytes / 2**20, 1),
+        "peak_mib": round(peak / 2**20, 1),
+        "seconds": round(seconds, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument(
+        "--part-mib", type=float, default=reporting.PART_SIZE_BYTES / 2**20
+    )
+    args = parser.parse_args(argv)
+
+    reporting.PART_SIZE_BYTES = int(args.part_mib * 2**20)
+    runs = [run(rows) for rows in args.rows]
+    print(
+        json.dumps(
+            {
+                "part_size_mib": reporting.PART_SIZE_BYTES / 2**20,
+                "runs": runs,
+                "peak_growth": round(runs[-1]["peak_mib"] / runs[0]["peak_mib"], 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,82 @@
-from lambdas.onboarding import onboarding_logic
-from lambdas.import_aws import import_aws_logic
-from lambdas.import_azure import import_azure_logic
-from lambdas.import_wiz import import_wiz_logic
-from lambdas.import_katana import import_katana_logic
-from lambdas.import_coralogix import import_coralogix_logic
-from lambdas.remediation_planning import remediation_planning_logic
-from lambdas.reporting import reporting_logic
+# Each handler imports its own logic module on first call so a function only
+# pays the import cost of the code it actually runs. instrumentation is
+# stdlib-only, so wrapping every handler in it costs no such import.
 
+from lambdas.instrumentation import instrumented
 
+
+@instrumented
 def onboarding_handler(event, context):
+    from lambdas.onboarding import onboarding_logic
+
     return onboarding_logic(event, context)
 
 
+@instrumented
 def import_aws_handler(event, context):
+    from lambdas.import_aws import import_aws_logic
+
     return import_aws_logic(event, context)
 
 
+@instrumented
 def import_azure_handler(event, context):
+    from lambdas.import_azure import import_azure_logic
+
     return import_azure_logic(event, context)
 
 
+@instrumented
 def import_wiz_handler(event, context):
+    from lambdas.import_wiz import import_wiz_logic
+
     return import_wiz_logic(event, context)
 
 
+@instrumented
 def import_katana_handler(event, context):
+    from lambdas.import_katana import import_katana_logic
+
     return import_katana_logic(event, context)
 
 
+@instrumented
 def import_coralogix_handler(event, context):
+    from lambdas.import_coralogix import import_coralogix_logic
+
     return import_coralogix_logic(event, context)
 
 
+@instrumented
 def remediation_planning_handler(event, context):
+    from lambdas.remediation_planning import remediation_planning_logic
+
     return remediation_planning_logic(event, context)
 
 
+@instrumented
 def reporting_handler(event, context):
+    from lambdas.reporting import reporting_logic
+
     return reporting_logic(event, context)
+
+
+@instrumented
+def assessment_handler(event, context):
+    from lambdas.assessment import assessment_logic
+
+    return assessment_logic(event, context)
+
+
+@instrumented
+def frontend_proxy_handler(event, context):
+    from lambdas.frontend_proxy import lambda_handler
+
+    return lambda_handler(event, context)
+
+
+@instrumented
+def onboarding_export_handler(event, context):
+    from lambdas.onboarding_export import export_onboarding_logic
+
+    return export_onboarding_logic(event, context)
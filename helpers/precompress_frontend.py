@@ -0,0 +1,55 @@
+"""Write gzip and brotli variants of the frontend assets for frontend_proxy.
+
+Each asset is copied to the output directory along with ``.gz`` and ``.br``
+siblings, so the whole directory can be synced to the frontend bucket as is.
+Brotli variants are skipped when the optional ``brotli`` package is missing.
+
+Usage:
+    python helpers/precompress_frontend.py [--src frontend] [--out frontend/dist]
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_ASSETS = ["app.ts", "index.html", "style.css"]
+
+
+def precompress(src_dir, out_dir, assets):
+    os.makedirs(out_dir, exist_ok=True)
+    for name in assets:
+        src = os.path.join(src_dir, name)
+        dest = os.path.join(out_dir, name)
+        with open(src, "rb") as f:
+            data = f.read()
+        if os.path.abspath(src) != os.path.abspath(dest):
+            shutil.copyfile(src, dest)
+
+        variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants[".br"] = brotli.compress(data, quality=11)
+        for suffix, compressed in variants.items():
+            with open(dest + suffix, "wb") as f:
+                f.write(compressed)
+            print(f"{name}{suffix}: {len(data)} -> {len(compressed)} bytes")
+    if brotli is None:
+        print("brotli not installed; skipped .br variants")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--src", default="frontend")
+    parser.add_argument("--out", default=os.path.join("frontend", "dist"))
+    parser.add_argument("assets", nargs="*", default=DEFAULT_ASSETS)
+    args = parser.parse_args(argv)
+    precompress(args.src, args.out, args.assets)
+
+
+if __name__ == "__main__":
+    main()
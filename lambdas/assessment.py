@@ -0,0 +1,472 @@
+import importlib
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from decimal import Decimal
+
+import boto3
+from botocore.config import Config
+
+from lambdas import aws_clients, context_store, instrumentation
+from lambdas.focus_areas import FOCUS_AREAS
+from lambdas.import_katana import CRAWL_BUCKET, crawl_prefix
+from lambdas.pipeline import out_of_time
+
+# Name of the assessment Lambda submit_onboarding starts; unset, submitting
+# starts nothing (e.g. running locally)
+ASSESSMENT_FUNCTION = os.environ.get("ASSESSMENT_FUNCTION", "")
+# "local" runs each step in this process; "lambda" invokes the step's own
+# function, FUNCTION_PREFIX + its name (see terraform/lambdas.tf)
+EXECUTOR = os.environ.get("ASSESSMENT_EXECUTOR", "local")
+FUNCTION_PREFIX = os.environ.get("ASSESSMENT_FUNCTION_PREFIX", "")
+MAX_WORKERS = int(os.environ.get("ASSESSMENT_MAX_WORKERS", 4))
+DEFAULT_TIMEOUT_SECONDS = float(os.environ.get("ASSESSMENT_STEP_TIMEOUT_SECONDS", 300))
+# Stop starting steps this long before the Lambda timeout to save progress
+TIME_MARGIN_MS = 10_000
+
+# Which importers an onboarding needs: a source is relevant when the
+# record's cloudProviders or focusAreas name any of its own, and runs when
+# the record's integrations.<source> holds the settings its logic requires
+# (and, per "each", every entry of a list setting holds the field named).
+# AWS needs a role per account: without one import_aws would read the
+# Lambda's own Security Hub into the customer's onboarding. Settings that
+# grant access are checked or set by trusted_settings().
+SOURCES = {
+    "aws": {
+        "providers": ("aws",),
+        "focusAreas": (),
+        "required": ("accounts",),
+        "each": {"accounts": "roleArn"},
+    },
+    "azure": {
+        "providers": ("azure",),
+        "focusAreas": (),
+        "required": ("secretId", "subscriptions"),
+    },
+    "wiz": {
+        "providers": ("aws", "azure", "gcp"),
+        "focusAreas": (),
+        "required": ("secretId",),
+    },
+    "katana": {
+        "providers": (),
+        "focusAreas": ("network", "vulnerability"),
+        "required": ("key",),
+    },
+    "coralogix": {
+        "providers": (),
+        "focusAreas": ("logging",),
+        "required": ("secretId",),
+    },
+}
+ROLE_ARN = re.compile(r"arn:aws:iam::(\d{12}):role/[\w+=,.@/-]+")
+# Step name -> (module, logic function) for the local executor
+LOGIC = {
+    "import_aws": ("lambdas.import_aws", "import_aws_logic"),
+    "import_azure": ("lambdas.import_azure", "import_azure_logic"),
+    "import_wiz": ("lambdas.import_wiz", "import_wiz_logic"),
+    "import_katana": ("lambdas.import_katana", "import_katana_logic"),
+    "import_coralogix": ("lambdas.import_coralogix", "import_coralogix_logic"),
+    "remediation_planning": (
+        "lambdas.remediation_planning",
+        "remediation_planning_logic",
+    ),
+    "reporting": ("lambdas.reporting", "reporting_logic"),
+}
+
+# A step is finished once it can no longer change in this run; succeeded and
+# skipped steps are also not run again when an assessment is resumed
+FINISHED = {"succeeded", "skipped", "failed", "timed_out", "paused"}
+DONE = {"succeeded", "skipped"}
+
+
+class Step:
+    """One node of the assessment DAG: a logic function, its event and prerequisites"""
+
+    def __init__(self, name, event, after=(), timeout=DEFAULT_TIMEOUT_SECONDS):
+        self.name = name
+        self.event = event
+        self.after = tuple(after)
+        self.timeout = timeout
+
+
+class StepContext:
+    """Lambda-style context whose remaining time ends at the step's deadline.
+
+    Importers that checkpoint (Wiz, Katana) pause and return ``status:
+    in_progress`` when it runs low, as they would before a Lambda timeout.
+    """
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self.deadline - time.monotonic()) * 1000))
+
+
+class LocalExecutor:
+    """Runs steps in this process by calling their logic functions"""
+
+    def run(self, step, context):
+        module, function = LOGIC[step.name]
+        logic = getattr(importlib.import_module(module), function)
+        return logic(step.event, context)
+
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class LambdaExecutor:
+    """Runs each step as a synchronous invocation of its own Lambda function"""
+
+    def __init__(self, prefix=FUNCTION_PREFIX):
+        self.prefix = prefix
+        # Wait as long as a function can run, and never retry: a retried
+        # invocation would run the step twice
+        self.client = instrumentation.instrument_client(
+            boto3.client(
+                "lambda",
+                config=Config(read_timeout=900, retries={"total_max_attempts": 1}),
+            )
+        )
+
+    def run(self, step, context):
+        result = self.client.invoke(
+            FunctionName=self.prefix + step.name,
+            Payload=json.dumps(step.event, default=_encode),
+        )
+        payload = json.loads(result["Payload"].read() or "null")
+        if result.get("FunctionError"):
+            message = (payload or {}).get("errorMessage") or result["FunctionError"]
+            raise RuntimeError(f"{step.name} failed: {message}")
+        return payload
+
+
+def get_executor():
+    return LambdaExecutor() if EXECUTOR == "lambda" else LocalExecutor()
+
+
+def state_id(onboarding_id):
+    return f"assessment#{onboarding_id}"
+
+
+def load_progress(onboarding_id):
+    """The stored progress of an onboarding's assessment, or ``None``"""
+    return context_store.load(state_id(onboarding_id))
+
+
+def trusted_settings(source, settings, item):
+    """Check and fill in the settings of ``source`` that grant access.
+
+    integrations is edited by the onboarding's user, so nothing in it may
+    reach another tenant: secrets must be the onboarding's own, roles are
+    assumed with the externalId issued when the onboarding was created,
+    and crawls are read from CRAWL_BUCKET under the onboarding's prefix.
+    ``settings`` is updated in place.
+
+    Returns:
+        What the settings still need, empty when they may be used.
+    """
+    onboarding_id = item["onboardingId"]
+    problems = []
+    if "secretId" in settings:
+        expected = aws_clients.secret_id(onboarding_id, source)
+        if settings["secretId"] != expected:
+            problems.append(f"secretId {expected}")
+    if source == "aws":
+        if not item.get("externalId"):
+            problems.append("an externalId issued by the onboarding")
+        accounts = []
+        for entry in settings["accounts"]:
+            match = ROLE_ARN.fullmatch(str(entry["roleArn"]))
+            if not match:
+                problems.append(f"an IAM role ARN, not {entry['roleArn']}")
+                continue
+            accounts.append(
+                {
+                    "accountId": match.group(1),
+                    "roleArn": entry["roleArn"],
+                    "externalId": item.get("externalId"),
+                }
+            )
+        settings["accounts"] = accounts
+    if source == "katana":
+        prefix = crawl_prefix(onboarding_id)
+        if not str(settings["key"]).startswith(prefix):
+            problems.append(f"a key under {prefix}")
+        settings["bucket"] = CRAWL_BUCKET
+    return problems
+
+
+def plan_assessment(item):
+    """The DAG for a submitted onboarding record, and the sources it skips.
+
+    Relevant importers run first and in parallel; remediation planning and
+    reporting both read the findings they write, so run after all of them.
+
+    Returns:
+        ``(steps, skipped)`` where ``skipped`` maps each relevant source
+        that is not configured to the reason.
+    """
+    onboarding_id = item["onboardingId"]
+    providers = {provider.lower() for provider in item.get("cloudProviders") or []}
+    focus_areas = [area for area in item.get("focusAreas") or [] if area in FOCUS_AREAS]
+    integrations = item.get("integrations") or {}
+
+    imports, skipped = [], {}
+    for source, rule in SOURCES.items():
+        if not (
+            providers & set(rule["providers"])
+            or set(focus_areas) & set(rule["focusAreas"])
+        ):
+            continue
+        settings = dict(integrations.get(source) or {})
+        missing = [field for field in rule["required"] if not settings.get(field)]
+        for field, key in rule.get("each", {}).items():
+            entries = settings.get(field) or []
+            if field not in missing and not all(
+                isinstance(entry, dict) and entry.get(key) for entry in entries
+            ):
+                missing.append(f"{key} for every {field} entry")
+        if not missing:
+            missing = trusted_settings(source, settings, item)
+        if missing:
+            skipped[f"import_{source}"] = (
+                f"integrations.{source} needs {', '.join(missing)}"
+            )
+            continue
+        timeout = float(settings.pop("timeoutSeconds", DEFAULT_TIMEOUT_SECONDS))
+        event = {**settings, "onboardingId": onboarding_id}
+        imports.append(Step(f"import_{source}", event, timeout=timeout))
+
+    after = [step.name for step in imports]
+    steps = imports + [
+        Step(
+            "remediation_planning",
+            {"onboardingId": onboarding_id, "focusAreas": focus_areas},
+            after,
+        ),
+        Step("reporting", {"onboardingId": onboarding_id}, after),
+    ]
+    return steps, skipped
+
+
+def _summary(result):
+    """The scalar fields of a step's response, to keep in the progress state"""
+    if not isinstance(result, dict):
+        return None
+    return {
+        key: value
+        for key, value in result.items()
+        if value is None or isinstance(value, (str, int, float, bool))
+    }
+
+
+def run_step(executor, step, context):
+    """Run ``step``, invoking it again while it pauses with time left to resume"""
+    result = executor.run(step, context)
+    while (
+        isinstance(result, dict)
+        and result.get("status") == "in_progress"
+        and not out_of_time(context, TIME_MARGIN_MS)
+    ):
+        result = executor.run(step, context)
+    return result
+
+
+def step_status(result):
+    status = result.get("statusCode") if isinstance(result, dict) else None
+    if isinstance(status, int) and status >= 400:
+        return "failed"
+    if isinstance(result, dict) and result.get("status") == "in_progress":
+        return "paused"
+    return "succeeded"
+
+
+def step_deadline(step, context):
+    """When ``step`` times out: after its timeout, or before the Lambda's own"""
+    deadline = time.monotonic() + step.timeout
+    remaining = getattr(context, "get_remaining_time_in_millis", None)
+    if remaining is not None:
+        deadline = min(
+            deadline, time.monotonic() + (remaining() - TIME_MARGIN_MS) / 1000
+        )
+    return deadline
+
+
+def run_dag(steps, state, executor, save, context=None, max_workers=None):
+    """Run ``steps`` in dependency order, at most ``max_workers`` (by default
+    ASSESSMENT_MAX_WORKERS) at a time.
+
+    A step starts once every step it comes after is finished, whether or
+    not it succeeded, so one failing source still leaves a plan and report
+    from the others. A step running past its timeout is marked timed out
+    and left behind: Python cannot stop a thread, so it runs on, unwatched.
+    ``state["steps"]`` is updated in place and ``save(state)`` called on
+    every change; steps already done in it are not run again.
+
+    Returns:
+        ``True`` once every step is finished, ``False`` if the Lambda
+        ``context`` ran short of time with steps still to start.
+    """
+    max_workers = max_workers or MAX_WORKERS
+    progress = state["steps"]
+    # Steps come in dependency order; one whose prerequisites run again
+    # runs again too, to read their new output
+    waiting = []
+    for step in steps:
+        rerun = {other.name for other in waiting} & set(step.after)
+        if rerun or progress.get(step.name, {}).get("status") not in DONE:
+            waiting.append(step)
+            progress[step.name] = {"status": "pending"}
+    running = {}
+    # One thread per step rather than max_workers threads, so a thread left
+    # behind by a timed-out step does not hold up the rest
+    pool = ThreadPoolExecutor(max_workers=max(1, len(waiting)))
+    try:
+        while waiting or running:
+            for step in list(waiting):
+                if len(running) >= max_workers or out_of_time(context, TIME_MARGIN_MS):
+                    break
+                if all(progress[name]["status"] in FINISHED for name in step.after):
+                    deadline = step_deadline(step, context)
+                    future = pool.submit(
+                        run_step, executor, step, StepContext(deadline)
+                    )
+                    running[future] = (step, deadline)
+                    waiting.remove(step)
+                    progress[step.name] = {
+                        "status": "running",
+                        "startedAt": datetime.utcnow().isoformat(),
+                    }
+                    save(state)
+            if not running:
+                # Out of time before the remaining steps could start
+                return False
+
+            timeout = max(
+                0, min(deadline for _, deadline in running.values()) - time.monotonic()
+            )
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            for future in list(running):
+                step, deadline = running[future]
+                entry = progress[step.name]
+                if future in done:
+                    try:
+                        result = future.result()
+                        entry["status"] = step_status(result)
+                        entry["result"] = _summary(result)
+                    except Exception as e:
+                        entry["status"] = "failed"
+                        entry["error"] = str(e)
+                elif now >= deadline:
+                    entry["status"] = "timed_out"
+                    entry["error"] = f"no result after {step.timeout:g}s"
+                else:
+                    continue
+                entry["finishedAt"] = datetime.utcnow().isoformat()
+                del running[future]
+                save(state)
+        return True
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def assessment_status(progress):
+    statuses = {entry["status"] for entry in progress.values()}
+    if statuses <= DONE:
+        return "succeeded"
+    if statuses & {"pending", "running", "paused"}:
+        return "in_progress"
+    return "failed"
+
+
+def run_assessment(item, executor, context=None, restart=False):
+    """Plan and run the assessment of a submitted onboarding record.
+
+    Progress is kept in the mna-context table under
+    ``assessment#<onboardingId>`` as each step starts and finishes. Running
+    it again resumes: steps that already succeeded are kept unless
+    ``restart`` is set.
+    """
+    onboarding_id = item["onboardingId"]
+    steps, skipped = plan_assessment(item)
+    previous = None if restart else load_progress(onboarding_id)
+    state = {
+        "onboardingId": onboarding_id,
+        "status": "in_progress",
+        "startedAt": datetime.utcnow().isoformat(),
+        "steps": {},
+    }
+    if previous:
+        # Skipped sources are decided afresh, in case they were configured since
+        state["steps"] = {
+            name: entry
+            for name, entry in previous["steps"].items()
+            if entry["status"] == "succeeded"
+        }
+    for name, reason in skipped.items():
+        state["steps"][name] = {"status": "skipped", "reason": reason}
+
+    def save(state):
+        state["updatedAt"] = datetime.utcnow().isoformat()
+        context_store.save(state_id(onboarding_id), state)
+
+    started = time.perf_counter()
+    run_dag(steps, state, executor, save, context)
+    state["status"] = assessment_status(state["steps"])
+    state["seconds"] = round(time.perf_counter() - started, 3)
+    save(state)
+    return state
+
+
+def start(onboarding_id):
+    """Start the assessment of a submitted onboarding without waiting for it.
+
+    Returns whether it was started: ``False`` when ASSESSMENT_FUNCTION is
+    not set.
+    """
+    if not ASSESSMENT_FUNCTION:
+        return False
+    aws_clients.client("lambda").invoke(
+        FunctionName=ASSESSMENT_FUNCTION,
+        InvocationType="Event",
+        Payload=json.dumps({"onboardingId": onboarding_id}),
+    )
+    return True
+
+
+def assessment_logic(event, context):
+    """
+    Logic for the assessment of a submitted onboarding.
+
+    Reads the onboarding's cloudProviders, focusAreas and integrations,
+    runs the importers they call for concurrently (at most
+    ASSESSMENT_MAX_WORKERS at once, each within its own timeout), then
+    remediation planning and reporting once the imports are finished.
+    Progress is stored in mna-context as it goes; invoke again with the
+    same ``onboardingId`` to resume a run that paused or failed, or with
+    ``"restart": true`` to run every step again.
+    """
+    onboarding_id = event.get("onboardingId")
+    if not onboarding_id:
+        return {"statusCode": 400, "error": "onboardingId is required"}
+    item = (
+        aws_clients.table(os.environ.get("DYNAMODB_TABLE", "mna-onboarding"))
+        .get_item(Key={"onboardingId": onboarding_id}, ConsistentRead=True)
+        .get("Item")
+    )
+    if item is None:
+        return {"statusCode": 404, "error": f"Unknown onboarding {onboarding_id}"}
+    if item.get("status") != "submitted":
+        return {"statusCode": 409, "error": "Onboarding has not been submitted"}
+
+    state = run_assessment(item, get_executor(), context, bool(event.get("restart")))
+    return {"statusCode": 200, **state}
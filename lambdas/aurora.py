@@ -0,0 +1,188 @@
+import functools
+import hashlib
+import os
+import re
+import time
+import weakref
+
+from lambdas import instrumentation
+
+# A warm connection idle for longer than this is pinged before it is handed
+# out; Aurora, RDS Proxy (IdleClientTimeout) or a NAT may have dropped it
+# while the container was frozen
+PING_AFTER_SECONDS = float(os.environ.get("DB_PING_AFTER_SECONDS", 60))
+# Server-side prepared statements pin an RDS Proxy client connection to one
+# database connection, so they are off when DB_PROXY is set
+PREPARED_STATEMENTS = os.environ.get(
+    "DB_PREPARED_STATEMENTS", "false" if os.environ.get("DB_PROXY") else "true"
+).lower() in ("1", "true", "yes")
+PREPARED_LIMIT = 64
+
+_connection = None
+_last_used = 0.0
+# Names of the statements prepared on each open connection
+_prepared = weakref.WeakKeyDictionary()
+_PLACEHOLDER = re.compile(r"%%|%s")
+# Table sets each open connection has found present (see ensure_schema)
+_schemas = weakref.WeakKeyDictionary()
+_TABLES_SQL = (
+    "SELECT table_name FROM information_schema.tables "
+    "WHERE table_schema = current_schema() AND table_name = ANY(%s)"
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _timed_cursor():
+    """A psycopg2 cursor class that records each statement's latency"""
+    from psycopg2 import extensions
+
+    class TimedCursor(extensions.cursor):
+        def execute(self, query, vars=None):
+            started = time.perf_counter()
+            try:
+                return super().execute(query, vars)
+            finally:
+                instrumentation.record("Aurora", started)
+
+        def copy_expert(self, sql, file, size=8192):
+            started = time.perf_counter()
+            try:
+                return super().copy_expert(sql, file, size)
+            finally:
+                instrumentation.record("Aurora", started)
+
+    return TimedCursor
+
+
+def _connect():
+    import psycopg2
+
+    return psycopg2.connect(
+        host=os.environ.get("DB_HOST", "localhost"),
+        port=int(os.environ.get("DB_PORT", 5432)),
+        dbname=os.environ.get("DB_NAME", "cmmx_db"),
+        user=os.environ.get("DB_USER", "postgres"),
+        password=os.environ.get("DB_PASSWORD", ""),
+        sslmode=os.environ.get("DB_SSLMODE", "prefer"),
+        application_name=os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "cmautomation"),
+        connect_timeout=5,
+        keepalives=1,
+        keepalives_idle=30,
+        keepalives_interval=10,
+        keepalives_count=3,
+        cursor_factory=_timed_cursor(),
+    )
+
+
+def _healthy(connection):
+    """Whether ``connection`` answers a round trip; leaves it idle"""
+    import psycopg2
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def get_connection():
+    """Return the container's Aurora PostgreSQL connection, opened on first use.
+
+    The connection is kept for the life of the warm container; a Lambda
+    container runs one invocation at a time, so one connection is its whole
+    pool. Before it is handed out it is checked without a round trip
+    (closed, or left mid-transaction by a failed invocation), and pinged
+    only if it sat idle for PING_AFTER_SECONDS; a dead one is replaced.
+
+    ``psycopg2`` is imported here rather than at module load so functions that
+    never touch the database do not pay for it on cold start.
+
+    Returns:
+        An open ``psycopg2`` connection built from the ``DB_*`` environment.
+    """
+    global _connection, _last_used
+    from psycopg2 import extensions
+
+    now = time.monotonic()
+    if _connection is not None and not _connection.closed:
+        status = _connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            close()
+        elif status != extensions.TRANSACTION_STATUS_IDLE:
+            _connection.rollback()
+        elif now - _last_used >= PING_AFTER_SECONDS and not _healthy(_connection):
+            close()
+    if _connection is None or _connection.closed:
+        _connection = _connect()
+    _last_used = now
+    return _connection
+
+
+def close():
+    """Close the cached connection; the next ``get_connection`` opens a new one"""
+    global _connection
+    if _connection is not None and not _connection.closed:
+        try:
+            _connection.close()
+        except Exception:
+            pass
+    _connection = None
+
+
+def execute(cursor, sql, params=None):
+    """Run ``sql`` on ``cursor`` as a prepared statement where enabled.
+
+    The statement is prepared once per connection, under a name derived
+    from its text, and executed by name from then on, so Postgres parses
+    and plans it once per warm container rather than once per call.
+    ``params`` must be positional (``%s`` placeholders). With
+    PREPARED_STATEMENTS off this is a plain ``cursor.execute``.
+    """
+    if not PREPARED_STATEMENTS:
+        cursor.execute(sql, params)
+        return
+    name = "s_" + hashlib.sha1(sql.encode("utf-8")).hexdigest()[:16]
+    prepared = _prepared.setdefault(cursor.connection, set())
+    if name not in prepared:
+        if len(prepared) >= PREPARED_LIMIT:
+            cursor.execute("DEALLOCATE ALL")
+            prepared.clear()
+        if params is None:
+            body = sql
+        else:
+            numbers = iter(range(1, len(params) + 1))
+            body = _PLACEHOLDER.sub(
+                lambda match: "%" if match[0] == "%%" else f"${next(numbers)}", sql
+            )
+        cursor.execute(f"PREPARE {name} AS {body}")
+        prepared.add(name)
+    if params:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
+
+def ensure_schema(connection, ddl, tables):
+    """Run ``ddl`` on ``connection`` unless every table in ``tables`` exists.
+
+    Checked against information_schema once per connection, in its own
+    transaction, so schema setup (and the locks DDL takes) stays off the
+    write path once the tables are there.
+    """
+    tables = tuple(tables)
+    ready = _schemas.setdefault(connection, set())
+    if tables in ready:
+        return
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(_TABLES_SQL, (list(tables),))
+            existing = {row[0] for row in cursor.fetchall()}
+            if not existing.issuperset(tables):
+                cursor.execute(ddl)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    ready.add(tables)
@@ -0,0 +1,72 @@
+import functools
+
+import boto3
+
+from lambdas import instrumentation
+
+# Integration credentials live under a per-onboarding prefix, the only
+# secrets the Lambda role may read (see terraform/iam.tf)
+SECRET_PREFIX = "mna"
+
+
+@functools.lru_cache(maxsize=None)
+def client(service_name: str):
+    """Return a boto3 client, created on first use and reused while the container is warm.
+
+    Args:
+        service_name: AWS service name, e.g. ``"s3"``.
+
+    Returns:
+        A cached ``botocore`` client for the service, its calls timed for
+        the invocation's metrics.
+    """
+    return instrumentation.instrument_client(boto3.client(service_name))
+
+
+@functools.lru_cache(maxsize=None)
+def resource(service_name: str):
+    """Return a boto3 service resource, created on first use and then cached.
+
+    Args:
+        service_name: AWS service name, e.g. ``"dynamodb"``.
+
+    Returns:
+        A cached ``boto3`` service resource, its calls timed for the
+        invocation's metrics.
+    """
+    resource = boto3.resource(service_name)
+    instrumentation.instrument_client(resource.meta.client)
+    return resource
+
+
+@functools.lru_cache(maxsize=None)
+def table(table_name: str):
+    """Return a cached DynamoDB ``Table`` resource.
+
+    Args:
+        table_name: Name of the DynamoDB table.
+
+    Returns:
+        The ``Table`` resource for ``table_name``.
+    """
+    return resource("dynamodb").Table(table_name)
+
+
+def secret_id(onboarding_id: str, source: str) -> str:
+    """Return the Secrets Manager id of an onboarding's credentials for a source.
+
+    Args:
+        onboarding_id: The onboarding the credentials belong to.
+        source: Importer source name, e.g. ``"wiz"``.
+
+    Returns:
+        ``SECRET_PREFIX/<onboarding_id>/<source>``; importers refuse any other.
+    """
+    return f"{SECRET_PREFIX}/{onboarding_id}/{source}"
+
+
+def reset() -> None:
+    """Drop all cached clients so the next call builds fresh ones (used by tests)."""
+    client.cache_clear()
+    resource.cache_clear()
+    table.cache_clear()
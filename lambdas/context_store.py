@@ -0,0 +1,33 @@
+import json
+import os
+from datetime import datetime
+
+from lambdas import aws_clients
+
+
+def context_table():
+    """Return the mna-context DynamoDB table used for job state and checkpoints"""
+    return aws_clients.table(os.environ.get("MNA_CONTEXT_TABLE", "mna-context"))
+
+
+def load(context_id):
+    """Return the JSON state stored under ``context_id``, or ``None``"""
+    result = context_table().get_item(Key={"id": context_id})
+    if "Item" not in result:
+        return None
+    return json.loads(result["Item"]["state"])
+
+
+def save(context_id, state):
+    """Store ``state`` (JSON-serialisable) under ``context_id``"""
+    context_table().put_item(
+        Item={
+            "id": context_id,
+            "state": json.dumps(state),
+            "updatedAt": datetime.utcnow().isoformat(),
+        }
+    )
+
+
+def delete(context_id):
+    context_table().delete_item(Key={"id": context_id})
@@ -0,0 +1,489 @@
+import csv
+import hashlib
+import io
+import itertools
+import re
+import sys
+
+from lambdas import aurora
+from lambdas.focus_areas import classify
+
+# Column order of a normalised finding row, shared by every importer
+FINDING_COLUMNS = (
+    "source",
+    "finding_id",
+    "onboarding_id",
+    "account_id",
+    "region",
+    "resource_type",
+    "resource_id",
+    "severity",
+    "score",
+    "title",
+    "status",
+    "updated_at",
+)
+
+# Stored alongside each finding; see FindingBatch.hashes()
+HASH_COLUMNS = ("fingerprint", "content_hash")
+# Lower-cased statuses of findings that no longer need fixing
+CLOSED_STATUSES = (
+    "resolved",
+    "suppressed",
+    "rejected",
+    "healthy",
+    "notapplicable",
+    "archived",
+)
+
+# Created by the first import into a database without them (see
+# aurora.ensure_schema)
+FINDINGS_TABLES = ("findings", "finding_fingerprints", "finding_rollups")
+FINDINGS_DDL = """
+CREATE TABLE IF NOT EXISTS findings (
+    source        text        NOT NULL,
+    finding_id    text        NOT NULL,
+    onboarding_id text        NOT NULL,
+    account_id    text,
+    region        text,
+    resource_type text,
+    resource_id   text,
+    severity      text,
+    score         real,
+    title         text,
+    status        text,
+    updated_at    timestamptz,
+    fingerprint   bytea,
+    content_hash  bytea,
+    changed_at    timestamptz NOT NULL DEFAULT now(),
+    focus_area    text,
+    PRIMARY KEY (onboarding_id, source, finding_id)
+);
+CREATE INDEX IF NOT EXISTS findings_onboarding_idx
+    ON findings (onboarding_id, source, severity);
+CREATE INDEX IF NOT EXISTS findings_fingerprint_idx
+    ON findings (onboarding_id, fingerprint);
+CREATE INDEX IF NOT EXISTS findings_changed_idx
+    ON findings (onboarding_id, changed_at);
+CREATE INDEX IF NOT EXISTS findings_resource_idx
+    ON findings (onboarding_id, resource_id);
+CREATE TABLE IF NOT EXISTS finding_fingerprints (
+    onboarding_id   text        NOT NULL,
+    fingerprint     bytea       NOT NULL,
+    source          text        NOT NULL,
+    finding_id      text        NOT NULL,
+    content_hash    bytea       NOT NULL,
+    sources         text[]      NOT NULL,
+    first_seen_at   timestamptz NOT NULL DEFAULT now(),
+    last_changed_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (onboarding_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS finding_fingerprints_finding_idx
+    ON finding_fingerprints (onboarding_id, source, finding_id);
+CREATE TABLE IF NOT EXISTS finding_rollups (
+    onboarding_id text             NOT NULL,
+    day           date             NOT NULL,
+    source        text             NOT NULL,
+    severity      text             NOT NULL,
+    focus_area    text             NOT NULL,
+    findings      bigint           NOT NULL,
+    open_findings bigint           NOT NULL,
+    score_sum     double precision NOT NULL,
+    PRIMARY KEY (onboarding_id, day, source, severity, focus_area)
+);
+"""
+
+_COLUMN_LIST = ", ".join(FINDING_COLUMNS)
+# Staged columns: the finding, its hashes and its focus area
+_STORED_COLUMNS = FINDING_COLUMNS + HASH_COLUMNS + ("focus_area",)
+_STAGE_COLUMN_LIST = ", ".join(_STORED_COLUMNS)
+# changed_at is bumped only here, so it marks real changes for the
+# incremental remediation plan; unchanged findings never reach the upsert
+_UPDATE_LIST = ", ".join(
+    [f"{column} = EXCLUDED.{column}" for column in _STORED_COLUMNS[3:]]
+    + ["changed_at = now()"]
+)
+# How a findings row counts towards finding_rollups
+ROLLUP_DAY = "(coalesce(updated_at, changed_at) AT TIME ZONE 'UTC')::date"
+ROLLUP_OPEN = "(lower(coalesce(status, '')) <> ALL(ARRAY[{}]))::int".format(
+    ", ".join(f"'{status}'" for status in CLOSED_STATUSES)
+)
+
+# COPY lands in an unconstrained temp table, so a batch may contain repeats
+_STAGE_SQL = (
+    "CREATE TEMP TABLE IF NOT EXISTS findings_stage "
+    "(LIKE findings INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+_COPY_SQL = f"COPY findings_stage ({_STAGE_COLUMN_LIST}) FROM STDIN WITH (FORMAT csv)"
+# One finding per fingerprint is canonical: the one already recorded as such,
+# else the highest scored. Only new fingerprints and canonical findings whose
+# content hash changed reach the findings table; other sources reporting the
+# same fingerprint are merged into finding_fingerprints.sources.
+#
+# finding_rollups is kept in step in the same statement: every findings row
+# written adds to its rollup and takes its previous version, which the
+# statement's snapshot still shows, out of the old one. Rows from before
+# rollups existed have no focus area and were never counted.
+_MERGE_SQL = f"""
+WITH staged AS (
+    SELECT s.*,
+           f.fingerprint IS NULL AS is_new,
+           f.source = s.source AND f.finding_id = s.finding_id AS is_canonical,
+           f.content_hash AS known_hash
+    FROM findings_stage s
+    LEFT JOIN finding_fingerprints f
+        ON f.onboarding_id = s.onboarding_id AND f.fingerprint = s.fingerprint
+),
+picked AS (
+    SELECT DISTINCT ON (onboarding_id, fingerprint) *
+    FROM staged
+    ORDER BY onboarding_id, fingerprint, is_canonical DESC NULLS LAST,
+             score DESC NULLS LAST, updated_at DESC NULLS LAST
+),
+reporters AS (
+    SELECT onboarding_id, fingerprint,
+           array_agg(DISTINCT source ORDER BY source) AS sources
+    FROM findings_stage
+    GROUP BY onboarding_id, fingerprint
+),
+recorded AS (
+    INSERT INTO finding_fingerprints AS f
+        (onboarding_id, fingerprint, source, finding_id, content_hash, sources)
+    SELECT p.onboarding_id, p.fingerprint, p.source, p.finding_id,
+           p.content_hash, r.sources
+    FROM picked p JOIN reporters r USING (onboarding_id, fingerprint)
+    ON CONFLICT (onboarding_id, fingerprint) DO UPDATE SET
+        content_hash = CASE
+            WHEN f.source = EXCLUDED.source AND f.finding_id = EXCLUDED.finding_id
+            THEN EXCLUDED.content_hash ELSE f.content_hash END,
+        sources = ARRAY(
+            SELECT DISTINCT unnest(f.sources || EXCLUDED.sources) ORDER BY 1
+        ),
+        last_changed_at = now()
+    WHERE NOT f.sources @> EXCLUDED.sources
+       OR (f.source = EXCLUDED.source AND f.finding_id = EXCLUDED.finding_id
+           AND f.content_hash <> EXCLUDED.content_hash)
+),
+written AS (
+    INSERT INTO findings ({_STAGE_COLUMN_LIST})
+    SELECT {_STAGE_COLUMN_LIST}
+    FROM picked
+    WHERE is_new OR (is_canonical AND known_hash IS DISTINCT FROM content_hash)
+    ON CONFLICT (onboarding_id, source, finding_id) DO UPDATE SET {_UPDATE_LIST}
+    RETURNING *
+),
+counted AS (
+    SELECT 1 AS sign, * FROM written
+    UNION ALL
+    SELECT -1, f.*
+    FROM findings f JOIN written w USING (onboarding_id, source, finding_id)
+    WHERE f.focus_area IS NOT NULL
+),
+rolled_up AS (
+    INSERT INTO finding_rollups AS r
+    SELECT onboarding_id, {ROLLUP_DAY}, source, severity, focus_area,
+           sum(sign), sum(sign * {ROLLUP_OPEN}), sum(sign * coalesce(score, 0))
+    FROM counted
+    GROUP BY 1, 2, 3, 4, 5
+    HAVING sum(sign) <> 0 OR sum(sign * {ROLLUP_OPEN}) <> 0
+        OR sum(sign * coalesce(score, 0)) <> 0
+    ON CONFLICT (onboarding_id, day, source, severity, focus_area) DO UPDATE SET
+        findings = r.findings + EXCLUDED.findings,
+        open_findings = r.open_findings + EXCLUDED.open_findings,
+        score_sum = r.score_sum + EXCLUDED.score_sum
+)
+SELECT count(*) FROM written
+"""
+# Recounts an onboarding's rollups from its findings, e.g. to backfill the
+# rows written before rollups existed once their focus area is set
+REBUILD_ROLLUPS_SQL = f"""
+DELETE FROM finding_rollups WHERE onboarding_id = %(onboarding_id)s;
+INSERT INTO finding_rollups
+SELECT onboarding_id, {ROLLUP_DAY}, source, severity, focus_area,
+       count(*), sum({ROLLUP_OPEN}), sum(coalesce(score, 0))
+FROM findings
+WHERE onboarding_id = %(onboarding_id)s AND focus_area IS NOT NULL
+GROUP BY 1, 2, 3, 4, 5;
+"""
+
+
+# Low-cardinality columns; interned so a batch holds one copy of each value
+INTERNED_COLUMNS = frozenset(
+    (
+        "source",
+        "onboarding_id",
+        "account_id",
+        "region",
+        "resource_type",
+        "severity",
+        "status",
+    )
+)
+_INTERNED = tuple(column in INTERNED_COLUMNS for column in FINDING_COLUMNS)
+_SOURCE = FINDING_COLUMNS.index("source")
+_SEVERITY = FINDING_COLUMNS.index("severity")
+_RESOURCE_TYPE = FINDING_COLUMNS.index("resource_type")
+_TITLE = FINDING_COLUMNS.index("title")
+_SCORE = FINDING_COLUMNS.index("score")
+# What a report shows of a finding; updated_at alone changing is not a change
+_CONTENT = tuple(
+    FINDING_COLUMNS.index(column)
+    for column in (
+        "account_id",
+        "region",
+        "resource_type",
+        "resource_id",
+        "severity",
+        "score",
+        "title",
+        "status",
+    )
+)
+_NOT_WORDS = re.compile(r"[^0-9a-z]+")
+
+SEVERITIES = ("critical", "high", "medium", "low", "informational")
+# Source spellings of severity -> the canonical label
+SEVERITY_ALIASES = {
+    **{severity: severity for severity in SEVERITIES},
+    "info": "informational",
+    "none": "informational",
+    "moderate": "medium",
+    "warning": "medium",
+    "error": "high",
+}
+# Score given to findings whose source reports none, on the 0-100 scale
+SEVERITY_SCORES = {
+    "critical": 90.0,
+    "high": 70.0,
+    "medium": 40.0,
+    "low": 10.0,
+    "informational": 0.0,
+}
+# Multiplier from a source's native score scale to 0-100 (Wiz uses CVSS 0-10)
+SCORE_SCALES = {"wiz": 10.0}
+COPY_CHUNK_ROWS = 1000
+
+
+class FindingBatch:
+    """Column-oriented batch of finding rows, one list per FINDING_COLUMNS entry.
+
+    Holding columns instead of a tuple or dict per finding keeps large batches
+    compact, and low-cardinality strings are interned as they are appended.
+    Iterating the batch yields rows, so every sink accepts it as is.
+    """
+
+    __slots__ = ("columns", "normalised")
+
+    def __init__(self):
+        self.columns = tuple([] for _ in FINDING_COLUMNS)
+        self.normalised = False
+
+    @classmethod
+    def from_rows(cls, rows):
+        batch = cls()
+        batch.extend(rows)
+        return batch
+
+    def append(self, *values):
+        for column, value, interned in zip(self.columns, values, _INTERNED):
+            if interned and type(value) is str:
+                value = sys.intern(value)
+            column.append(value)
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(*row)
+
+    def normalise(self):
+        """Canonicalise severities and put scores on a 0-100 scale, a column at a time.
+
+        Each distinct severity and source is resolved once, so the per-row
+        work is a dictionary lookup. Findings without a score get one from
+        their severity. Normalising twice is a no-op.
+        """
+        if self.normalised:
+            return self
+        sources = self.columns[_SOURCE]
+        severities = self.columns[_SEVERITY]
+        scores = self.columns[_SCORE]
+        labels = {
+            value: SEVERITY_ALIASES.get(str(value).lower(), "informational")
+            for value in set(severities)
+        }
+        severities[:] = [labels[value] for value in severities]
+        scales = {source: SCORE_SCALES.get(source, 1.0) for source in set(sources)}
+        scores[:] = [
+            (
+                SEVERITY_SCORES[severity]
+                if score is None
+                else min(100.0, float(score) * scales[source])
+            )
+            for source, severity, score in zip(sources, severities, scores)
+        ]
+        self.normalised = True
+        return self
+
+    def hashes(self):
+        """Fingerprint and content hash columns, as lists of 16-byte digests.
+
+        The fingerprint identifies what was found, whichever source found it:
+        the onboarding, the resource id and the title, lower-cased with
+        punctuation dropped. Findings without a resource id are only their
+        own source and id. The content hash covers the columns a report
+        shows, so a re-import that only moves ``updated_at`` is unchanged.
+        """
+        columns = self.columns
+        titles = {
+            title: _NOT_WORDS.sub(" ", str(title).lower()).strip()
+            for title in set(columns[FINDING_COLUMNS.index("title")])
+        }
+        fingerprints = [
+            (
+                _digest(
+                    onboarding_id,
+                    resource_id.strip().lower(),
+                    titles[title],
+                )
+                if resource_id
+                else _digest(onboarding_id, source, finding_id)
+            )
+            for source, finding_id, onboarding_id, resource_id, title in zip(
+                columns[_SOURCE],
+                columns[FINDING_COLUMNS.index("finding_id")],
+                columns[FINDING_COLUMNS.index("onboarding_id")],
+                columns[FINDING_COLUMNS.index("resource_id")],
+                columns[FINDING_COLUMNS.index("title")],
+            )
+        ]
+        content = [_digest(*values) for values in zip(*(columns[i] for i in _CONTENT))]
+        return fingerprints, content
+
+    def focus_areas(self):
+        """Focus area column, classified once per distinct resource type and title"""
+        keys = list(zip(self.columns[_RESOURCE_TYPE], self.columns[_TITLE]))
+        areas = {key: classify(*key)[0] for key in set(keys)}
+        return [areas[key] for key in keys]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def __iter__(self):
+        return zip(*self.columns)
+
+
+def _digest(*values):
+    text = "\x1f".join("" if value is None else str(value) for value in values)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class CsvCopyStream:
+    """Read-only file view of finding rows as CSV, for ``COPY ... FROM STDIN``.
+
+    Rows are encoded a chunk at a time as COPY reads, straight from the
+    batch's columns, so the batch is never duplicated into one large buffer.
+    """
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = ""
+        self._chunk = io.StringIO()
+        self._writer = csv.writer(self._chunk)
+
+    def _encode_chunk(self):
+        self._chunk.seek(0)
+        self._chunk.truncate()
+        self._writer.writerows(itertools.islice(self._rows, COPY_CHUNK_ROWS))
+        return self._chunk.getvalue()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._pending) < size:
+            chunk = self._encode_chunk()
+            if not chunk:
+                break
+            self._pending += chunk
+        if size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+class AuroraFindingSink:
+    """Bulk-loads finding rows into Aurora with COPY and a single merge per batch.
+
+    Rows are fingerprinted and given a focus area on the way in, and the
+    merge keeps finding_rollups up to date; ``written`` counts findings rows
+    inserted or changed and ``skipped`` those that were unchanged or merged
+    into another source's finding.
+    """
+
+    def __init__(self, connection_factory=aurora.get_connection):
+        self._connection_factory = connection_factory
+        self.written = 0
+        self.skipped = 0
+
+    def write(self, rows):
+        if not isinstance(rows, FindingBatch):
+            rows = FindingBatch.from_rows(rows)
+        rows.normalise()
+        hashes = (
+            [f"\\x{digest.hex()}" for digest in column] for column in rows.hashes()
+        )
+        staged = zip(*rows.columns, *hashes, rows.focus_areas())
+        connection = self._connection_factory()
+        aurora.ensure_schema(connection, FINDINGS_DDL, FINDINGS_TABLES)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(_STAGE_SQL)
+                cursor.copy_expert(_COPY_SQL, CsvCopyStream(staged))
+                aurora.execute(cursor, _MERGE_SQL)
+                written = cursor.fetchone()[0]
+            connection.commit()
+            self.written += written
+            self.skipped += len(rows) - written
+        except Exception:
+            connection.rollback()
+            raise
+
+
+class ListFindingSink:
+    """Keeps rows in memory; for offline runs and tests"""
+
+    def __init__(self):
+        self.rows = []
+        self.batches = 0
+
+    def write(self, rows):
+        self.rows.extend(rows)
+        self.batches += 1
+
+
+class CountingFindingSink:
+    """Counts rows without keeping them; for benchmarks and dry runs"""
+
+    def __init__(self):
+        self.count = 0
+        self.batches = 0
+
+    def write(self, rows):
+        self.count += len(rows)
+        self.batches += 1
+
+
+def write_findings(rows, sink, batch_size):
+    """Write an iterable of finding rows to ``sink`` in FindingBatches.
+
+    Returns:
+        The number of rows written.
+    """
+    written = 0
+    batch = FindingBatch()
+    for row in rows:
+        batch.append(*row)
+        if len(batch) >= batch_size:
+            sink.write(batch)
+            written += len(batch)
+            batch = FindingBatch()
+    if len(batch):
+        sink.write(batch)
+        written += len(batch)
+    return written
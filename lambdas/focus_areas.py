@@ -0,0 +1,57 @@
+import re
+
+# What a finding is about, for remediation planning and posture reports
+FOCUS_AREAS = ("iam", "network", "data", "compliance", "logging", "vulnerability")
+# First area whose title pattern matches wins, then the resource type
+# patterns; anything unmatched is a compliance task
+TITLE_AREAS = (
+    ("vulnerability", re.compile(r"\bcve-|vulnerab|\bpatch|outdated|end of life")),
+    (
+        "iam",
+        re.compile(
+            r"\biam\b|\bmfa\b|\broot\b|access keys?\b|credential|password|"
+            r"privilege|\broles?\b|\busers?\b|\bidentity|service principal"
+        ),
+    ),
+    (
+        "network",
+        re.compile(
+            r"security groups?\b|\bports?\b|ingress|egress|firewall|\bvpc\b|"
+            r"subnet|0\.0\.0\.0/0|::/0|network|load balancer|\bnsg\b|\btls\b"
+        ),
+    ),
+    ("logging", re.compile(r"\blog|cloudtrail|monitor|audit|guardduty|alarm")),
+    (
+        "data",
+        re.compile(
+            r"\bs3\b|bucket|encrypt|\bkms\b|storage|database|\brds\b|snapshot|"
+            r"backup|\bblob|key vault|secret"
+        ),
+    ),
+)
+RESOURCE_TYPE_AREAS = (
+    ("vulnerability", re.compile(r"virtual_machine|container_image|ecrimage")),
+    ("iam", re.compile(r"iam|identity|serviceprincipal")),
+    (
+        "network",
+        re.compile(r"securitygroup|networkacl|vpc|subnet|loadbalancer|http_endpoint"),
+    ),
+    ("logging", re.compile(r"cloudtrail|log_|logs?group|monitor")),
+    ("data", re.compile(r"s3|rds|dynamodb|kms|storage|sql|bucket|secret")),
+)
+# Titles that say the resource is reachable from outside
+EXPOSURE = re.compile(r"public|internet|0\.0\.0\.0/0|::/0|anonymous|exposed|open to")
+
+
+def classify(resource_type, title):
+    """``(area, exposed)`` of a finding, from its title and resource type"""
+    text = (title or "").lower()
+    kind = (resource_type or "").lower()
+    exposed = bool(EXPOSURE.search(text))
+    for area, pattern in TITLE_AREAS:
+        if pattern.search(text):
+            return area, exposed
+    for area, pattern in RESOURCE_TYPE_AREAS:
+        if pattern.search(kind):
+            return area, exposed
+    return "compliance", exposed
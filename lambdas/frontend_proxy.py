@@ -1,17 +1,338 @@
 import os
-import boto3
+import base64
+import gzip
 import mimetypes
+import time
+from collections import OrderedDict
 from botocore.exceptions import ClientError
 
+from lambdas import aws_clients
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; precompressed .br siblings still work
+    brotli = None
+
 S3_BUCKET = os.environ.get("FRONTEND_BUCKET", "my-frontend-bucket")
 S3_INDEX_FILE = "index.html"
-s3 = boto3.client("s3")
+
+# Per-container asset cache settings
+CACHE_MAX_BYTES = int(os.environ.get("FRONTEND_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+CACHE_TTL_SECONDS = float(os.environ.get("FRONTEND_CACHE_TTL_SECONDS", 60))
+ASSET_MAX_AGE_SECONDS = int(os.environ.get("FRONTEND_ASSET_MAX_AGE_SECONDS", 86400))
+NEGATIVE_CACHE_SIZE = int(os.environ.get("FRONTEND_NEGATIVE_CACHE_SIZE", 1024))
+NEGATIVE_CACHE_TTL_SECONDS = float(
+    os.environ.get("FRONTEND_NEGATIVE_CACHE_TTL_SECONDS", 30)
+)
+COMPRESS_MIN_BYTES = int(os.environ.get("FRONTEND_COMPRESS_MIN_BYTES", 1024))
+
+# Content-Encoding token -> suffix of the precompressed sibling object in S3
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE_TYPES = (
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+class CachedAsset:
+    """A decoded S3 object ready to be returned as an API Gateway body"""
+
+    __slots__ = ("body", "is_base64", "content_type", "etag", "checked_at", "encoding")
+
+    def __init__(self, body, is_base64, content_type, etag, checked_at, encoding=None):
+        self.body = body
+        self.is_base64 = is_base64
+        self.content_type = content_type
+        self.etag = etag
+        self.checked_at = checked_at
+        self.encoding = encoding
+
+    @property
+    def size(self):
+        return len(self.body)
+
+    @property
+    def compressible(self):
+        return self.encoding is None and (
+            self.content_type.startswith("text/")
+            or self.content_type in COMPRESSIBLE_TYPES
+        )
+
+    def raw_bytes(self):
+        if self.is_base64:
+            return base64.b64decode(self.body)
+        return self.body.encode("utf-8")
+
+
+class AssetCache:
+    """Byte-bounded LRU cache of decoded assets, kept for the life of the container"""
+
+    def __init__(self, max_bytes, pinned=()):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.pinned = frozenset(pinned)
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.discard(key)
+        if entry.size > self.max_bytes and key not in self.pinned:
+            return
+        self._entries[key] = entry
+        self.current_bytes += entry.size
+        # Pinned keys (index.html) stay resident; evict the oldest of the rest
+        evictable = (k for k in list(self._entries) if k not in self.pinned)
+        while self.current_bytes > self.max_bytes:
+            victim = next(evictable, None)
+            if victim is None:
+                break
+            self.current_bytes -= self._entries.pop(victim).size
+
+    def discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class MissingKeyCache:
+    """Bounded set of S3 keys recently seen to be missing, each expiring after a TTL"""
+
+    def __init__(self, max_entries, ttl_seconds):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._expires_at = OrderedDict()
+
+    def add(self, key):
+        self._expires_at.pop(key, None)
+        self._expires_at[key] = time.monotonic() + self.ttl_seconds
+        while len(self._expires_at) > self.max_entries:
+            self._expires_at.popitem(last=False)
+
+    def __contains__(self, key):
+        expires_at = self._expires_at.get(key)
+        if expires_at is None:
+            return False
+        if time.monotonic() >= expires_at:
+            del self._expires_at[key]
+            return False
+        return True
+
+    def clear(self):
+        self._expires_at.clear()
+
+    def __len__(self):
+        return len(self._expires_at)
+
+
+asset_cache = AssetCache(CACHE_MAX_BYTES, pinned=[S3_INDEX_FILE])
+missing_keys = MissingKeyCache(NEGATIVE_CACHE_SIZE, NEGATIVE_CACHE_TTL_SECONDS)
+
+
+def is_spa_route(key):
+    """Client-side routes such as ``dashboard/123`` have no file extension"""
+    return "." not in key.rsplit("/", 1)[-1]
+
+
+def _decode_asset(key, s3_response, checked_at):
+    content = s3_response["Body"].read()
+    # "app.js.gz" guesses as ("text/javascript", "gzip"): a compressed sibling
+    content_type, encoding = mimetypes.guess_type(key)
+    content_type = content_type or "application/octet-stream"
+    if content_type.startswith("text/") and encoding is None:
+        body, is_base64 = content.decode("utf-8"), False
+    else:
+        body, is_base64 = base64.b64encode(content).decode("ascii"), True
+    return CachedAsset(
+        body, is_base64, content_type, s3_response["ETag"], checked_at, encoding
+    )
+
+
+def load_asset(key):
+    """Return the asset for ``key``, revalidating a stale cache entry with its ETag.
+
+    Raises ``ClientError`` from S3 (e.g. ``NoSuchKey``) when the object cannot be read.
+    """
+    now = time.monotonic()
+    cached = asset_cache.get(key)
+    if cached is not None and now - cached.checked_at < CACHE_TTL_SECONDS:
+        return cached
+
+    get_kwargs = {"Bucket": S3_BUCKET, "Key": key}
+    if cached is not None:
+        get_kwargs["IfNoneMatch"] = cached.etag
+
+    try:
+        s3_response = aws_clients.client("s3").get_object(**get_kwargs)
+    except ClientError as e:
+        if cached is not None and e.response["Error"]["Code"] in ("304", "NotModified"):
+            cached.checked_at = now
+            return cached
+        asset_cache.discard(key)
+        if e.response["Error"]["Code"] == "NoSuchKey":
+            missing_keys.add(key)
+        raise
+
+    asset = _decode_asset(key, s3_response, now)
+    asset_cache.put(key, asset)
+    return asset
+
+
+def _compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def compressed_variant(key, asset, encodings):
+    """Return the best precompressed or on-the-fly compressed form of ``asset``.
+
+    Precompressed ``.br``/``.gz`` siblings in S3 are preferred. Without one the
+    asset is compressed here and cached next to the original, keyed by the
+    original ETag so it is rebuilt when the object changes. Returns ``asset``
+    itself when nothing acceptable is smaller.
+    """
+    for encoding in encodings:
+        sibling = key + ENCODING_SUFFIXES[encoding]
+        if sibling in missing_keys:
+            continue
+        try:
+            return load_asset(sibling)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchKey":
+                raise
+
+    if asset.size < COMPRESS_MIN_BYTES:
+        return asset
+    for encoding in encodings:
+        if encoding == "br" and brotli is None:
+            continue
+        cache_key = f"{key};{encoding}"
+        etag_stem = asset.etag.rstrip('"')
+        variant_etag = f'{etag_stem}-{encoding}"'
+        cached = asset_cache.get(cache_key)
+        if cached is not None and cached.etag == variant_etag:
+            return cached
+        raw = asset.raw_bytes()
+        compressed = _compress(raw, encoding)
+        if len(compressed) >= len(raw):
+            return asset
+        variant = CachedAsset(
+            base64.b64encode(compressed).decode("ascii"),
+            True,
+            asset.content_type,
+            variant_etag,
+            asset.checked_at,
+            encoding,
+        )
+        asset_cache.put(cache_key, variant)
+        return variant
+    return asset
+
+
+def _request_header(event, name):
+    headers = event.get("headers") or {}
+    for header, value in headers.items():
+        if header.lower() == name:
+            return value
+    return None
+
+
+def accepted_encodings(event):
+    """Return the supported encodings the client accepts, best first"""
+    weights = {}
+    for part in (_request_header(event, "accept-encoding") or "").split(","):
+        name, _, params = part.partition(";")
+        params = params.strip()
+        try:
+            weight = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    default = weights.get("*", 0.0)
+    ranked = [
+        (weights.get(encoding, default), encoding)
+        for encoding in ENCODING_SUFFIXES  # br before gzip when weights tie
+    ]
+    ranked.sort(key=lambda item: -item[0])
+    return [encoding for weight, encoding in ranked if weight > 0]
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def asset_response(event, asset, vary=False):
+    """Build the API Gateway response for an asset, answering If-None-Match with 304"""
+    cache_control = (
+        "no-cache"
+        if asset.content_type == "text/html"
+        else f"public, max-age={ASSET_MAX_AGE_SECONDS}"
+    )
+    headers = {
+        "Content-Type": asset.content_type,
+        "ETag": asset.etag,
+        "Cache-Control": cache_control,
+    }
+    if asset.encoding:
+        headers["Content-Encoding"] = asset.encoding
+    if vary or asset.encoding:
+        headers["Vary"] = "Accept-Encoding"
+    if _etag_matches(_request_header(event, "if-none-match"), asset.etag):
+        return {
+            "statusCode": 304,
+            "headers": headers,
+            "body": "",
+            "isBase64Encoded": False,
+        }
+    return {
+        "statusCode": 200,
+        "headers": headers,
+        "body": asset.body,
+        "isBase64Encoded": asset.is_base64,
+    }
+
+
+def serve(event, key, encodings):
+    """Load ``key`` and respond with the best encoding the client accepts"""
+    asset = load_asset(key)
+    if not asset.compressible:
+        return asset_response(event, asset)
+    if encodings:
+        asset = compressed_variant(key, asset, encodings)
+    return asset_response(event, asset, vary=True)
 
 
 def lambda_handler(event, context):
     """
     Lambda function to serve static frontend files from S3 for SPA routing.
     If the requested file is not found, returns index.html for SPA support.
+    Assets are cached per container and revalidated against S3 by ETag.
+    Extensionless SPA routes and keys already known to be missing are
+    answered with the pinned index.html without a failed S3 lookup.
+    Text assets are served gzip/brotli encoded per Accept-Encoding.
     """
     # Parse the path from the API Gateway event
     path = event.get("rawPath") or event.get("path") or "/"
@@ -20,28 +341,18 @@ def lambda_handler(event, context):
     if not path or path.endswith("/"):
         path += S3_INDEX_FILE
 
+    if is_spa_route(path) or path in missing_keys:
+        path = S3_INDEX_FILE
+
+    encodings = accepted_encodings(event)
     try:
-        s3_response = s3.get_object(Bucket=S3_BUCKET, Key=path)
-        content = s3_response["Body"].read()
-        content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
-        return {
-            "statusCode": 200,
-            "headers": {"Content-Type": content_type},
-            "body": (
-                content.decode("utf-8") if content_type.startswith("text/") else content
-            ),
-            "isBase64Encoded": not content_type.startswith("text/"),
-        }
+        return serve(event, path, encodings)
     except ClientError as e:
-        if e.response["Error"]["Code"] == "NoSuchKey":
+        if e.response["Error"]["Code"] == "NoSuchKey" and path != S3_INDEX_FILE:
             # Fallback to index.html for SPA routing
-            s3_response = s3.get_object(Bucket=S3_BUCKET, Key=S3_INDEX_FILE)
-            content = s3_response["Body"].read()
-            return {
-                "statusCode": 200,
-                "headers": {"Content-Type": "text/html"},
-                "body": content.decode("utf-8"),
-                "isBase64Encoded": False,
-            }
+            try:
+                return serve(event, S3_INDEX_FILE, encodings)
+            except ClientError:
+                return {"statusCode": 500, "body": "Internal server error"}
         else:
             return {"statusCode": 500, "body": "Internal server error"}
@@ -1,5 +1,312 @@
+import functools
+import hashlib
+import json
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, quote, unquote, urlsplit, urlunsplit
+
+from lambdas import aws_clients, context_store, watermarks
+from lambdas.findings import AuroraFindingSink, FindingBatch
+from lambdas.pipeline import out_of_time
+
+SOURCE = "katana"
+RESOURCE_TYPE = "http_endpoint"
+# The only bucket crawls are read from; the Lambda role can read no other
+# bucket's uploads, and an event must not point it at one. Each onboarding
+# reads only the crawls under its own crawl_prefix().
+CRAWL_BUCKET = os.environ.get("CRAWL_BUCKET", "")
+RANGE_BYTES = int(os.environ.get("KATANA_RANGE_BYTES", 8 * 1024 * 1024))
+WRITE_BATCH_SIZE = int(os.environ.get("IMPORT_WRITE_BATCH_SIZE", 5000))
+# Sizes the Bloom filter: ~2.3 MiB per million endpoints at this error rate
+DEDUPE_CAPACITY = int(os.environ.get("KATANA_DEDUPE_CAPACITY", 5_000_000))
+DEDUPE_ERROR_RATE = 1e-4
+# Stop reading this long before the Lambda timeout to flush and checkpoint
+TIME_MARGIN_MS = 10_000
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# RFC 3986 unreserved and sub-delimiter characters kept as-is in paths
+PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 128-bit digests.
+
+    Memory is set by ``capacity`` and ``error_rate`` up front, however many
+    lines are fed through it. Bit positions come from double hashing the two
+    halves of the digest.
+    """
+
+    __slots__ = ("bits", "size", "hashes")
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest):
+        """Add ``digest``; returns False if it was (probably) already present"""
+        bits = self.bits
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        added = False
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % self.size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+        return added
+
+
+def canonical_path(path):
+    """Normalise percent-encoding, drop dot segments and empty/trailing slashes"""
+    segments = []
+    for segment in quote(unquote(path), safe=PATH_SAFE).split("/"):
+        if segment in ("", "."):
+            continue
+        if segment == "..":
+            if segments:
+                segments.pop()
+            continue
+        segments.append(segment)
+    return "/" + "/".join(segments)
+
+
+@functools.lru_cache(maxsize=65536)
+def canonical_url(url):
+    """Canonical endpoint for a crawled URL, or ``None`` if it is not HTTP(S).
+
+    Scheme and host are lower-cased, default ports and fragments dropped, the
+    path normalised and the query reduced to its sorted parameter names, so
+    ``/item?id=1`` and ``/item?id=2#top`` are the same endpoint. Crawls
+    repeat URLs heavily, so recent results are cached.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if scheme not in DEFAULT_PORTS or not host:
+        return None
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    names = sorted({name for name, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return urlunsplit((scheme, netloc, canonical_path(parts.path), "&".join(names), ""))
+
+
+def object_head(bucket, key):
+    """``(size, etag)`` of an S3 object"""
+    head = aws_clients.client("s3").head_object(Bucket=bucket, Key=key)
+    return head["ContentLength"], head["ETag"]
+
+
+def read_range(bucket, key, start, end):
+    """Bytes ``start``..``end`` (inclusive) of an S3 object"""
+    result = aws_clients.client("s3").get_object(
+        Bucket=bucket, Key=key, Range=f"bytes={start}-{end}"
+    )
+    return result["Body"].read()
+
+
+def iter_lines(bucket, key, start, size):
+    """Yield ``(line, end_offset)`` for each line of the object from ``start``.
+
+    The object is read in RANGE_BYTES ranged GETs, the next one prefetched
+    while the current range is split into lines, so memory is bounded by two
+    ranges plus the longest line. ``end_offset`` is where the next line
+    starts, which is what gets checkpointed.
+    """
+    base = start
+    carry = b""
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+
+        def fetch(offset):
+            if offset >= size:
+                return None
+            end = min(size, offset + RANGE_BYTES) - 1
+            return prefetcher.submit(read_range, bucket, key, offset, end)
+
+        offset = start
+        pending = fetch(offset)
+        while pending is not None:
+            data = pending.result()
+            offset += len(data)
+            pending = fetch(offset)
+            if carry:
+                data = carry + data
+            position = 0
+            while (newline := data.find(b"\n", position)) != -1:
+                yield data[position:newline], base + newline + 1
+                position = newline + 1
+            carry = data[position:]
+            base += position
+    if carry:
+        yield carry, size
+
+
+def crawl_prefix(onboarding_id):
+    return f"crawls/{onboarding_id}/"
+
+
+def checkpoint_id(onboarding_id, bucket, key):
+    return f"import-katana#{onboarding_id}#{bucket}/{key}"
+
+
+def import_katana_findings(event, sink, context=None):
+    """Stream a Katana JSONL crawl from S3 into ``sink`` as unique endpoints.
+
+    Each line's request endpoint is canonicalised and fingerprinted; a Bloom
+    filter drops repeats, so only first sightings are written, in batches.
+    The byte offset after each written batch is checkpointed, and a run that
+    nears the Lambda timeout returns ``status: in_progress`` to be resumed.
+    Resuming starts with an empty filter; endpoints seen before the pause
+    are written again, which the findings upsert absorbs.
+
+    The ETag of each fully imported crawl is kept as the watermark, so an
+    unchanged crawl is not read again unless ``fullResync`` is set.
+
+    Returns:
+        A summary with lines read, unique endpoints written, duplicates and
+        malformed lines skipped, and MiB/s read.
+    """
+    onboarding_id = event["onboardingId"]
+    bucket = event["bucket"]
+    key = event["key"]
+    full_resync = event.get("fullResync")
+    state_id = checkpoint_id(onboarding_id, bucket, key)
+    size, etag = object_head(bucket, key)
+    checkpoint = None if full_resync else context_store.load(state_id)
+    if checkpoint is None or checkpoint.get("etag") != etag:
+        # A crawl replaced mid-import is read again from the start
+        checkpoint = {"offset": 0, "endpoints": 0, "etag": etag}
+        watermark = watermarks.load(onboarding_id, SOURCE, full_resync)
+        if watermark.get("objects", {}).get(f"{bucket}/{key}") == etag:
+            return {
+                "statusCode": 200,
+                "source": SOURCE,
+                "onboardingId": onboarding_id,
+                "status": "unchanged",
+                "lines": 0,
+                "endpoints": 0,
+                "size": size,
+            }
+
+    seen = BloomFilter(DEDUPE_CAPACITY, DEDUPE_ERROR_RATE)
+    prefix = f"{onboarding_id}\n".encode("utf-8")
+    started = time.perf_counter()
+    stats = {"lines": 0, "endpoints": 0, "duplicates": 0, "malformed": 0}
+    batch = FindingBatch()
+    offset = start_offset = checkpoint["offset"]
+    paused = False
+
+    def flush(end_offset):
+        nonlocal batch
+        if len(batch):
+            sink.write(batch)
+            stats["endpoints"] += len(batch)
+            checkpoint["endpoints"] += len(batch)
+            batch = FindingBatch()
+        checkpoint["offset"] = end_offset
+        context_store.save(state_id, checkpoint)
+
+    lines = iter_lines(bucket, key, offset, size)
+    try:
+        for line, offset in lines:
+            if not line.strip():
+                continue
+            stats["lines"] += 1
+            try:
+                record = json.loads(line)
+                request = record.get("request") or {}
+                endpoint = canonical_url(request.get("endpoint") or "")
+            except (ValueError, AttributeError, TypeError):
+                endpoint = None
+            if endpoint is None:
+                stats["malformed"] += 1
+                continue
+            method = (request.get("method") or "GET").upper()
+            digest = hashlib.blake2b(
+                prefix + f"{method} {endpoint}".encode("utf-8"), digest_size=16
+            ).digest()
+            if not seen.add(digest):
+                stats["duplicates"] += 1
+                continue
+            response = record.get("response") or {}
+            status_code = response.get("status_code")
+            batch.append(
+                SOURCE,
+                digest.hex(),
+                onboarding_id,
+                None,
+                None,
+                RESOURCE_TYPE,
+                endpoint,
+                "informational",
+                None,
+                f"{method} {endpoint}",
+                str(status_code) if status_code is not None else None,
+                record.get("timestamp"),
+            )
+            if len(batch) >= WRITE_BATCH_SIZE:
+                flush(offset)
+                if out_of_time(context, TIME_MARGIN_MS):
+                    paused = True
+                    break
+    finally:
+        lines.close()
+    if not paused:
+        offset = size
+    flush(offset)
+
+    complete = checkpoint["offset"] >= size
+    if complete:
+        watermark = watermarks.load(onboarding_id, SOURCE)
+        watermark.setdefault("objects", {})[f"{bucket}/{key}"] = etag
+        watermarks.save(onboarding_id, SOURCE, watermark)
+        context_store.delete(state_id)
+    elapsed = time.perf_counter() - started
+    read_mib = (checkpoint["offset"] - start_offset) / 1024 / 1024
+    return {
+        "statusCode": 200,
+        "source": SOURCE,
+        "onboardingId": onboarding_id,
+        "status": "complete" if complete else "in_progress",
+        **stats,
+        "totalEndpoints": checkpoint["endpoints"],
+        "offset": checkpoint["offset"],
+        "size": size,
+        "mibPerSecond": round(read_mib / elapsed, 1) if elapsed else None,
+    }
+
+
 def import_katana_logic(event, context):
     """
     Logic for importing Katana security posture data.
+
+    A Katana JSONL crawl is streamed from S3 with ranged reads, its endpoints
+    canonicalised and de-duplicated, and each unique endpoint bulk-written to
+    Aurora. Invoke again with the same event to resume a paused import. A
+    crawl already imported unchanged is skipped; set ``fullResync`` to read
+    it again.
+
+    Crawls must be uploaded to CRAWL_BUCKET under the onboarding's
+    crawl_prefix(); an event naming any other bucket or key is rejected.
     """
-    raise NotImplementedError("Katana import logic not implemented yet.")
+    for field in ("onboardingId", "bucket", "key"):
+        if not event.get(field):
+            return {"statusCode": 400, "error": f"{field} is required"}
+    if not CRAWL_BUCKET:
+        return {"statusCode": 500, "error": "CRAWL_BUCKET is not configured"}
+    if event["bucket"] != CRAWL_BUCKET:
+        return {"statusCode": 400, "error": f"bucket must be {CRAWL_BUCKET}"}
+    prefix = crawl_prefix(event["onboardingId"])
+    if not event["key"].startswith(prefix):
+        return {"statusCode": 400, "error": f"key must start with {prefix}"}
+    return import_katana_findings(event, AuroraFindingSink(), context)
@@ -1,5 +1,475 @@
+import functools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import urllib3
+
+from lambdas import aws_clients, context_store, watermarks
+from lambdas.findings import AuroraFindingSink, FindingBatch
+from lambdas.pipeline import fan_in, out_of_time
+
+SOURCE = "wiz"
+DEFAULT_AUTH_URL = "https://auth.app.wiz.io/oauth/token"
+PAGE_SIZE = int(os.environ.get("WIZ_PAGE_SIZE", 500))
+MAX_CONCURRENCY = int(os.environ.get("IMPORT_WIZ_MAX_CONCURRENCY", 4))
+WRITE_BATCH_SIZE = int(os.environ.get("IMPORT_WRITE_BATCH_SIZE", 5000))
+MAX_ATTEMPTS = 6
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 30.0
+# Stop paging this long before the Lambda timeout to flush and checkpoint
+TIME_MARGIN_MS = 15_000
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+
+ISSUES_QUERY = """
+query IssuesTable($first: Int, $after: String, $filterBy: IssueFilters) {
+  issuesV2(first: $first, after: $after, filterBy: $filterBy) {
+    nodes {
+      id
+      severity
+      status
+      updatedAt
+      sourceRule { id name }
+      entitySnapshot {
+        id type nativeType name cloudPlatform subscriptionExternalId region
+      }
+    }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+VULNERABILITIES_QUERY = """
+query VulnerabilityFindings(
+  $first: Int, $after: String, $filterBy: VulnerabilityFindingFilters
+) {
+  vulnerabilityFindings(first: $first, after: $after, filterBy: $filterBy) {
+    nodes {
+      id
+      name
+      severity
+      status
+      score
+      lastDetectedAt
+      vulnerableAsset {
+        ... on VulnerableAssetBase {
+          id type name cloudPlatform subscriptionExternalId region
+        }
+      }
+    }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+"""
+
+
+class WizError(Exception):
+    pass
+
+
+def normalise_issue(node, onboarding_id):
+    """Flatten a Wiz issue node into a row in FINDING_COLUMNS order"""
+    entity = node.get("entitySnapshot") or {}
+    rule = node.get("sourceRule") or {}
+    return (
+        SOURCE,
+        f"issue:{node['id']}",
+        onboarding_id,
+        entity.get("subscriptionExternalId"),
+        entity.get("region"),
+        entity.get("nativeType") or entity.get("type"),
+        entity.get("id"),
+        (node.get("severity") or "INFORMATIONAL").lower(),
+        None,
+        rule.get("name"),
+        node.get("status"),
+        node.get("updatedAt"),
+    )
+
+
+def normalise_vulnerability(node, onboarding_id):
+    """Flatten a Wiz vulnerability finding node into a row in FINDING_COLUMNS order"""
+    asset = node.get("vulnerableAsset") or {}
+    return (
+        SOURCE,
+        f"vulnerability:{node['id']}",
+        onboarding_id,
+        asset.get("subscriptionExternalId"),
+        asset.get("region"),
+        asset.get("type"),
+        asset.get("id"),
+        (node.get("severity") or "INFORMATIONAL").lower(),
+        node.get("score"),
+        node.get("name"),
+        node.get("status"),
+        node.get("lastDetectedAt"),
+    )
+
+
+# stream name -> (query, connection field, normaliser, project filter key)
+STREAMS = {
+    "issues": (ISSUES_QUERY, "issuesV2", normalise_issue, "project"),
+    "vulnerabilities": (
+        VULNERABILITIES_QUERY,
+        "vulnerabilityFindings",
+        normalise_vulnerability,
+        "projectId",
+    ),
+}
+
+
+class AdaptiveLimiter:
+    """Caps requests in flight and adapts the cap to the API's rate limiting.
+
+    Additive increase, multiplicative decrease: every successful request
+    nudges the limit up towards ``maximum``, every throttled one halves it
+    and holds all new requests back until the server says to retry.
+    """
+
+    def __init__(self, maximum, minimum=1):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self.throttled_count = 0
+        self._resume_at = 0.0
+        self._condition = threading.Condition()
+
+    def __enter__(self):
+        with self._condition:
+            while True:
+                wait = self._resume_at - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def succeeded(self):
+        with self._condition:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+    def throttled(self, retry_after):
+        with self._condition:
+            self.throttled_count += 1
+            self.limit = max(self.minimum, self.limit / 2)
+            self._pause(retry_after)
+
+    def pause(self, seconds):
+        """Hold new requests for ``seconds`` without lowering the limit"""
+        with self._condition:
+            self._pause(seconds)
+
+    def _pause(self, seconds):
+        self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+        self._condition.notify_all()
+
+
+def header_seconds(headers, name):
+    """Parse a delay header given as seconds or as an epoch timestamp"""
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        return None
+    if seconds > 1_000_000_000:
+        seconds -= time.time()
+    return max(0.0, seconds)
+
+
+def backoff_delay(attempt):
+    return random.uniform(
+        0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def http_pool():
+    """Keep-alive connection pool, reused across warm invocations"""
+    return urllib3.PoolManager(
+        # One connection per request in flight plus one prefetch per stream
+        maxsize=2 * MAX_CONCURRENCY,
+        retries=False,
+        timeout=urllib3.Timeout(connect=5.0, read=60.0),
+    )
+
+
+class WizClient:
+    """Minimal Wiz GraphQL client over a shared keep-alive pool"""
+
+    def __init__(self, api_url, auth_url, client_id, client_secret, limiter):
+        self.api_url = api_url
+        self.auth_url = auth_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.limiter = limiter
+        self.requests = 0
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+
+    def token(self):
+        with self._token_lock:
+            if self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            response = http_pool().request(
+                "POST",
+                self.auth_url,
+                body=urlencode(
+                    {
+                        "grant_type": "client_credentials",
+                        "audience": "wiz-api",
+                        "client_id": self.client_id,
+                        "client_secret": self.client_secret,
+                    }
+                ),
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+            if response.status != 200:
+                raise WizError(f"Wiz authentication failed ({response.status})")
+            payload = response.json()
+            self._token = payload["access_token"]
+            self._token_expires_at = (
+                time.monotonic()
+                + int(payload.get("expires_in", 3600))
+                - TOKEN_EXPIRY_MARGIN_SECONDS
+            )
+            return self._token
+
+    def query(self, query, variables):
+        """Run one GraphQL query, retrying throttled and transient failures"""
+        body = json.dumps({"query": query, "variables": variables}).encode("utf-8")
+        for attempt in range(MAX_ATTEMPTS):
+            headers = {
+                "Authorization": f"Bearer {self.token()}",
+                "Content-Type": "application/json",
+            }
+            with self.limiter:
+                response = http_pool().request(
+                    "POST", self.api_url, body=body, headers=headers
+                )
+            self.requests += 1
+
+            if response.status == 401 and attempt == 0:
+                self._token = None
+                continue
+            if response.status in (429, 503):
+                retry_after = header_seconds(response.headers, "Retry-After")
+                self.limiter.throttled(
+                    backoff_delay(attempt) if retry_after is None else retry_after
+                )
+                continue
+            if response.status >= 500:
+                time.sleep(backoff_delay(attempt))
+                continue
+            if response.status != 200:
+                raise WizError(f"Wiz API request failed ({response.status})")
+
+            payload = response.json()
+            codes = {
+                (error.get("extensions") or {}).get("code")
+                for error in payload.get("errors") or []
+            }
+            if "RATE_LIMIT_EXCEEDED" in codes:
+                self.limiter.throttled(backoff_delay(attempt))
+                continue
+            if payload.get("errors"):
+                raise WizError(payload["errors"][0].get("message", "GraphQL error"))
+
+            self.limiter.succeeded()
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = header_seconds(response.headers, "X-RateLimit-Reset")
+                self.limiter.pause(1.0 if reset is None else reset)
+            return payload["data"]
+        raise WizError(f"Wiz API still throttled after {MAX_ATTEMPTS} attempts")
+
+
+def partition_key(stream, project):
+    return f"{stream}#{project}" if project else stream
+
+
+def partition_producer(client, stream, project, after, onboarding_id, since=None):
+    """Build a producer that pages one stream/project partition.
+
+    The next page is requested before the current one is normalised, and the
+    fan-in queue lets paging carry on while earlier pages are being written.
+    With ``since``, only nodes updated after that timestamp are requested.
+    """
+    query, field, normalise, project_filter = STREAMS[stream]
+    filter_by = {project_filter: [project]} if project else {}
+    if since:
+        filter_by["updatedAt"] = {"after": since}
+    key = partition_key(stream, project)
+
+    def fetch(cursor):
+        variables = {"first": PAGE_SIZE, "after": cursor, "filterBy": filter_by}
+        return client.query(query, variables)[field]
+
+    def produce():
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(fetch, after)
+            while pending is not None:
+                connection = pending.result()
+                page_info = connection["pageInfo"]
+                cursor = page_info["endCursor"] if page_info["hasNextPage"] else None
+                pending = prefetcher.submit(fetch, cursor) if cursor else None
+                rows = [normalise(node, onboarding_id) for node in connection["nodes"]]
+                yield key, rows, cursor
+
+    return produce
+
+
+def checkpoint_id(onboarding_id):
+    return f"import-wiz#{onboarding_id}"
+
+
+def import_wiz_findings(event, client, sink, context=None):
+    """Import Wiz issues and vulnerability findings for ``event`` into ``sink``.
+
+    Each stream (optionally split per Wiz project) is paged concurrently.
+    Partition cursors are checkpointed in the mna-context table after every
+    write, and the run pauses before the Lambda timeout; invoking again with
+    the same ``onboardingId`` resumes from the last written page.
+
+    A partition imported before only requests nodes updated since its
+    watermark, unless ``fullResync`` is set. Watermarks advance when the
+    whole run completes.
+
+    Returns:
+        A summary with the run status, findings written this run, findings/s
+        and request/throttling counts.
+    """
+    onboarding_id = event["onboardingId"]
+    streams = event.get("streams") or list(STREAMS)
+    projects = event.get("projects") or [None]
+
+    full_resync = event.get("fullResync")
+    checkpoint = (
+        None if full_resync else context_store.load(checkpoint_id(onboarding_id))
+    )
+    if checkpoint is None:
+        # A new run filters on the watermarks as they were when it started
+        watermark = watermarks.load(onboarding_id, SOURCE, full_resync)
+        checkpoint = {
+            "partitions": {},
+            "findings": 0,
+            "since": watermark.get("partitions") or {},
+            "mark": watermarks.high_water_mark(),
+        }
+    positions = checkpoint["partitions"]
+    since = checkpoint["since"]
+    producers = []
+    for stream in streams:
+        for project in projects:
+            key = partition_key(stream, project)
+            state = positions.setdefault(key, {"after": None, "done": False})
+            if not state["done"]:
+                producers.append(
+                    partition_producer(
+                        client,
+                        stream,
+                        project,
+                        state["after"],
+                        onboarding_id,
+                        since.get(key),
+                    )
+                )
+
+    started = time.perf_counter()
+    written = 0
+    batch = FindingBatch()
+    paused = False
+
+    def flush():
+        nonlocal written, batch
+        if len(batch):
+            sink.write(batch)
+            written += len(batch)
+            checkpoint["findings"] += len(batch)
+            batch = FindingBatch()
+        context_store.save(checkpoint_id(onboarding_id), checkpoint)
+
+    pages = fan_in(producers, max_workers=2 * MAX_CONCURRENCY, max_buffered=4)
+    try:
+        for key, rows, cursor in pages:
+            batch.extend(rows)
+            positions[key] = {"after": cursor, "done": cursor is None}
+            if len(batch) >= WRITE_BATCH_SIZE:
+                flush()
+            if out_of_time(context, TIME_MARGIN_MS):
+                paused = True
+                break
+    finally:
+        pages.close()
+    flush()
+
+    complete = not paused and all(state["done"] for state in positions.values())
+    if complete:
+        watermark = watermarks.load(onboarding_id, SOURCE)
+        marks = watermark.setdefault("partitions", {})
+        marks.update(dict.fromkeys(positions, checkpoint["mark"]))
+        watermarks.save(onboarding_id, SOURCE, watermark)
+        context_store.delete(checkpoint_id(onboarding_id))
+    elapsed = time.perf_counter() - started
+    return {
+        "statusCode": 200,
+        "source": SOURCE,
+        "onboardingId": onboarding_id,
+        "status": "complete" if complete else "in_progress",
+        "mode": "incremental" if since else "full",
+        "findings": written,
+        "totalFindings": checkpoint["findings"],
+        "findingsPerSecond": round(written / elapsed, 1) if elapsed else None,
+        "requests": client.requests,
+        "throttled": client.limiter.throttled_count,
+    }
+
+
+def client_from_secret(secret_id):
+    """Build a WizClient from a Secrets Manager secret holding the tenant's credentials"""
+    secret = aws_clients.client("secretsmanager").get_secret_value(SecretId=secret_id)
+    credentials = json.loads(secret["SecretString"])
+    return WizClient(
+        api_url=credentials["apiUrl"],
+        auth_url=credentials.get("authUrl") or DEFAULT_AUTH_URL,
+        client_id=credentials["clientId"],
+        client_secret=credentials["clientSecret"],
+        limiter=AdaptiveLimiter(MAX_CONCURRENCY),
+    )
+
+
 def import_wiz_logic(event, context):
     """
     Logic for importing Wiz security posture data.
+
+    Issues and vulnerability findings are paged from the Wiz GraphQL API with
+    the next page prefetched, normalised and bulk-written to Aurora. The run
+    checkpoints its cursors and returns ``status: in_progress`` if it pauses
+    before the Lambda timeout; invoke again with the same event to resume.
+    Repeat runs fetch only what changed since the last complete one; set
+    ``fullResync`` to re-import everything.
     """
-    raise NotImplementedError("Wiz import logic not implemented yet.")
+    if not event.get("onboardingId"):
+        return {"statusCode": 400, "error": "onboardingId is required"}
+    if not event.get("secretId"):
+        return {"statusCode": 400, "error": "secretId is required"}
+    expected = aws_clients.secret_id(event["onboardingId"], SOURCE)
+    if event["secretId"] != expected:
+        return {"statusCode": 400, "error": f"secretId must be {expected}"}
+    unknown = set(event.get("streams") or []) - set(STREAMS)
+    if unknown:
+        return {"statusCode": 400, "error": f"Unknown streams: {sorted(unknown)}"}
+    client = client_from_secret(event["secretId"])
+    return import_wiz_findings(event, client, AuroraFindingSink(), context)
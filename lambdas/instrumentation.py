@@ -0,0 +1,175 @@
+import functools
+import json
+import os
+import random
+import sys
+import time
+
+# Stdlib only: handlers.py imports this at module load, before any handler
+# knows which logic module (and which dependencies) it needs.
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "cmautomation")
+# Share of invocations whose event is logged, and the most of it logged
+LOG_EVENT_SAMPLE_RATE = float(os.environ.get("LOG_EVENT_SAMPLE_RATE", 0.01))
+LOG_EVENT_MAX_BYTES = int(os.environ.get("LOG_EVENT_MAX_BYTES", 2048))
+# CloudWatch takes at most 100 values for one metric in one EMF document
+EMF_MAX_VALUES = 100
+
+_cold_start = True
+# Per-call latencies of the invocation in flight, by service, and its
+# counters; a container runs one invocation at a time
+_calls = None
+_counts = None
+
+
+def record(service, started):
+    """Add the latency of a call to ``service`` begun at ``started``
+    (``time.perf_counter()``) to the invocation in flight, if any"""
+    calls = _calls
+    if calls is not None:
+        elapsed = (time.perf_counter() - started) * 1000
+        calls.setdefault(service, []).append(elapsed)
+
+
+def count(metric, value=1):
+    """Add ``value`` to the invocation's ``metric`` counter, if one is in flight"""
+    counts = _counts
+    if counts is not None:
+        counts[metric] = counts.get(metric, 0) + value
+
+
+def _before_call(context, **kwargs):
+    context["instrumentation_started"] = time.perf_counter()
+
+
+def _after_call(context, model, **kwargs):
+    started = context.get("instrumentation_started")
+    if started is not None:
+        record(model.service_model.service_id.replace(" ", ""), started)
+
+
+def _register(events):
+    events.register("before-call", _before_call, unique_id="instrumentation-before")
+    for event in ("after-call", "after-call-error"):
+        events.register(event, _after_call, unique_id=f"instrumentation-{event}")
+
+
+def instrument_client(client):
+    """Time every API call ``client`` makes, retries included; returns it"""
+    _register(client.meta.events)
+    return client
+
+
+def instrument_session(session):
+    """Time API calls of the clients later created from boto3 ``session``; returns it"""
+    _register(session.events)
+    return session
+
+
+def _log_event(name, event, context):
+    """Print a structured log line with ``event``, cut to LOG_EVENT_MAX_BYTES"""
+    body = json.dumps(event, default=str)
+    line = {
+        "level": "INFO",
+        "message": "Received event",
+        "handler": name,
+        "requestId": getattr(context, "aws_request_id", None),
+        "eventBytes": len(body),
+        "event": body[:LOG_EVENT_MAX_BYTES],
+    }
+    if len(body) > LOG_EVENT_MAX_BYTES:
+        line["truncated"] = True
+    sys.stdout.write(json.dumps(line) + "\n")
+
+
+@functools.lru_cache(maxsize=256)
+def _metric_definitions(metrics):
+    """The serialised CloudWatchMetrics directive for ``(name, unit)`` pairs.
+
+    Serialising it is most of the cost of an EMF line, and a handler emits
+    the same few metric sets over and over.
+    """
+    return json.dumps(
+        [
+            {
+                "Namespace": NAMESPACE,
+                "Dimensions": [["Handler"]],
+                "Metrics": [{"Name": name, "Unit": unit} for name, unit in metrics],
+            }
+        ],
+        separators=(",", ":"),
+    )
+
+
+def _emf_line(name, metrics, timestamp):
+    values = json.dumps(
+        {"Handler": name, **{metric: value for (metric, _), value in metrics.items()}},
+        separators=(",", ":"),
+    )
+    return (
+        f'{{"_aws":{{"Timestamp":{timestamp},'
+        f'"CloudWatchMetrics":{_metric_definitions(tuple(metrics))}}},{values[1:]}\n'
+    )
+
+
+def emf_lines(name, duration, cold_start, error, calls, counts=None, timestamp=None):
+    """CloudWatch Embedded Metric Format log lines for one invocation.
+
+    The first carries the invocation's duration, cold start and error
+    flags, its ``count`` counters, and per service a call count and
+    per-call latencies; a service with more than EMF_MAX_VALUES calls
+    continues on further lines.
+    """
+    timestamp = int(time.time() * 1000) if timestamp is None else timestamp
+    first = {
+        ("Duration", "Milliseconds"): round(duration, 3),
+        ("ColdStart", "Count"): int(cold_start),
+        ("Errors", "Count"): int(error),
+    }
+    for metric, value in sorted((counts or {}).items()):
+        first[(metric, "Count")] = value
+    rest = []
+    for service, latencies in sorted(calls.items()):
+        latencies = [round(latency, 3) for latency in latencies]
+        first[(f"{service}Calls", "Count")] = len(latencies)
+        first[(f"{service}Latency", "Milliseconds")] = latencies[:EMF_MAX_VALUES]
+        for offset in range(EMF_MAX_VALUES, len(latencies), EMF_MAX_VALUES):
+            chunk = latencies[offset : offset + EMF_MAX_VALUES]
+            rest.append({(f"{service}Latency", "Milliseconds"): chunk})
+    return [_emf_line(name, metrics, timestamp) for metrics in [first, *rest]]
+
+
+def instrumented(handler):
+    """Measure a Lambda entry point and emit its metrics as EMF on stdout.
+
+    Records whether the invocation was the container's cold start, its
+    duration, the latency of each AWS (via ``instrument_client``) and
+    Aurora call it made and any counters it added to with ``count``. A
+    sample of LOG_EVENT_SAMPLE_RATE of events is logged, size-capped. An
+    invocation raising, or returning a 5xx ``statusCode``, counts as an
+    error.
+    """
+    name = handler.__name__
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start, _calls, _counts
+        cold_start, _cold_start = _cold_start, False
+        if LOG_EVENT_SAMPLE_RATE and random.random() < LOG_EVENT_SAMPLE_RATE:
+            _log_event(name, event, context)
+        _calls, _counts = calls, counts = {}, {}
+        error = True
+        started = time.perf_counter()
+        try:
+            result = handler(event, context)
+            status = result.get("statusCode") if isinstance(result, dict) else None
+            error = isinstance(status, int) and status >= 500
+            return result
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            _calls = _counts = None
+            sys.stdout.write(
+                "".join(emf_lines(name, duration, cold_start, error, calls, counts))
+            )
+
+    return wrapper
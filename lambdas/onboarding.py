@@ -1,15 +1,33 @@
 import json
-import boto3
+import base64
+import random
+import time
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import ClientError
 import os
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource("dynamodb")
-table_name = os.environ.get("DYNAMODB_TABLE", "mna-onboarding")
-table = dynamodb.Table(table_name)
+from lambdas import assessment, aws_clients, onboarding_cache
+
+# Global secondary indexes from terraform/dynamodb.tf
+STATUS_INDEX = "status-updatedAt-index"
+USER_INDEX = "userId-updatedAt-index"
+
+# DynamoDB batch limits and retry policy for the bulk endpoints
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+BATCH_MAX_RECORDS = 1000
+BATCH_MAX_ATTEMPTS = 6
+BATCH_BACKOFF_BASE_SECONDS = 0.05
+BATCH_BACKOFF_CAP_SECONDS = 2.0
+
+
+def get_table():
+    """Return the onboarding table, built on first use and reused across warm invocations"""
+    return aws_clients.table(os.environ.get("DYNAMODB_TABLE", "mna-onboarding"))
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -17,7 +35,8 @@ class DecimalEncoder(json.JSONEncoder):
 
     def default(self, obj):
         if isinstance(obj, Decimal):
-            return float(obj)
+            # Keep integral values such as version and currentStep as ints
+            return int(obj) if obj == obj.to_integral_value() else float(obj)
         return super(DecimalEncoder, self).default(obj)
 
 
@@ -35,6 +54,72 @@ def response(status_code, body):
     }
 
 
+def parse_expected_version(value):
+    """Parse the optional optimistic-concurrency version sent by the client"""
+    if value is None or value == "":
+        return None
+    version = int(value)
+    if version < 1:
+        raise ValueError
+    return version
+
+
+def write_condition(expected_version):
+    """Condition for a single-round-trip write: the record exists (at the expected version)"""
+    condition = Attr("onboardingId").exists()
+    if expected_version is not None:
+        condition &= Attr("version").eq(expected_version)
+    return condition
+
+
+def conditional_write_failed(error):
+    """Map a failed conditional write to 404 (missing) or 409 (version conflict)"""
+    old_item = error.response.get("Item")
+    if not old_item:
+        return response(404, {"error": "Onboarding not found"})
+    current_version = (
+        TypeDeserializer().deserialize(old_item["version"])
+        if "version" in old_item
+        else None
+    )
+    return response(
+        409,
+        {
+            "error": "Onboarding was modified by another request",
+            "currentVersion": current_version,
+        },
+    )
+
+
+def is_conditional_check_failure(error):
+    return error.response["Error"]["Code"] == "ConditionalCheckFailedException"
+
+
+# Fields stored for each onboarding step, with the value used when omitted
+STEP_FIELDS = {
+    1: {"companyName": "", "contactName": "", "contactEmail": "", "contactPhone": ""},
+    2: {
+        "transactionType": "",
+        "targetCompany": "",
+        "dealStage": "",
+        "expectedCloseDate": "",
+    },
+    # integrations: per source (aws, azure, wiz, ...) the importer settings
+    # the assessment checks and passes on (see assessment.trusted_settings),
+    # e.g. {"wiz": {"secretId": "mna/<onboardingId>/wiz"}}
+    3: {
+        "cloudProviders": [],
+        "accountCount": "",
+        "workloadTypes": "",
+        "integrations": {},
+    },
+    4: {"focusAreas": [], "complianceFrameworks": [], "additionalNotes": ""},
+}
+# Step fields left as stored when a step update omits them, rather than
+# reset to their default: the step 3 form does not edit integrations
+KEEP_WHEN_OMITTED = frozenset({"integrations"})
+
+
 def validate_step_data(step, data):
     """Validate required fields for each step"""
     validations = {
@@ -53,27 +138,40 @@ def validate_step_data(step, data):
     return True, None
 
 
+def new_onboarding_item(event_body, timestamp):
+    """Build a draft onboarding item from the step 1 fields of a request body"""
+    item = {
+        "onboardingId": str(uuid.uuid4()),
+        "createdAt": timestamp,
+        "updatedAt": timestamp,
+        "currentStep": 1,
+        "status": "draft",
+        "version": 1,
+        "companyName": event_body.get("companyName", ""),
+        "contactName": event_body.get("contactName", ""),
+        "contactEmail": event_body.get("contactEmail", ""),
+        "contactPhone": event_body.get("contactPhone", ""),
+        "formData": {},
+        # Passed as the ExternalId whenever the assessment assumes one of the
+        # onboarding's AWS roles, so their trust policies can require it.
+        # Issued here and never taken from a request.
+        "externalId": str(uuid.uuid4()),
+    }
+    # userId is a GSI key, which DynamoDB rejects as an empty string
+    if event_body.get("userId"):
+        item["userId"] = event_body["userId"]
+    return item
+
+
 def create_onboarding(event_body):
     """Create a new onboarding record"""
     try:
-        onboarding_id = str(uuid.uuid4())
         timestamp = datetime.utcnow().isoformat()
+        item = new_onboarding_item(event_body, timestamp)
+        onboarding_id = item["onboardingId"]
 
-        item = {
-            "onboardingId": onboarding_id,
-            "userId": event_body.get("userId", ""),
-            "createdAt": timestamp,
-            "updatedAt": timestamp,
-            "currentStep": 1,
-            "status": "draft",
-            "companyName": event_body.get("companyName", ""),
-            "contactName": event_body.get("contactName", ""),
-            "contactEmail": event_body.get("contactEmail", ""),
-            "contactPhone": event_body.get("contactPhone", ""),
-            "formData": {},
-        }
-
-        table.put_item(Item=item)
+        get_table().put_item(Item=item)
+        onboarding_cache.refresh(onboarding_id, item)
 
         return response(
             201,
@@ -91,17 +189,43 @@ def create_onboarding(event_body):
         )
 
 
-def get_onboarding(onboarding_id):
-    """Retrieve an onboarding record"""
+def get_onboarding(onboarding_id, query_params=None):
+    """Retrieve an onboarding record
+
+    Served from the onboarding cache when it is on, unless ``consistent``
+    is set, which forces a strongly consistent read (and refreshes the
+    cache with it).
+    """
     try:
-        result = table.get_item(Key={"onboardingId": onboarding_id})
+        consistent = (query_params or {}).get("consistent", "").lower() in (
+            "1",
+            "true",
+        )
+        cache = onboarding_cache.get_cache()
 
-        if "Item" not in result:
+        def load():
+            result = get_table().get_item(
+                Key={"onboardingId": onboarding_id}, ConsistentRead=consistent
+            )
+            return result.get("Item")
+
+        if cache is None:
+            item = load()
+        elif consistent:
+            item = load()
+            if item is None:
+                cache.invalidate(onboarding_id)
+            else:
+                cache.put(onboarding_id, item)
+        else:
+            item = cache.get(onboarding_id, load)
+
+        if item is None:
             return response(404, {"error": "Onboarding not found"})
 
         return response(
             200,
-            {"message": "Onboarding retrieved successfully", "data": result["Item"]},
+            {"message": "Onboarding retrieved successfully", "data": item},
         )
 
     except Exception as e:
@@ -125,96 +249,54 @@ def update_onboarding_step(onboarding_id, event_body):
         if not is_valid:
             return response(400, {"error": error_msg})
 
-        # Get current record
-        result = table.get_item(Key={"onboardingId": onboarding_id})
-        if "Item" not in result:
-            return response(404, {"error": "Onboarding not found"})
+        try:
+            expected_version = parse_expected_version(event_body.get("version"))
+        except (TypeError, ValueError):
+            return response(400, {"error": "version must be a positive integer"})
 
-        current_item = result["Item"]
         timestamp = datetime.utcnow().isoformat()
 
-        # Update based on step
-        update_expression_parts = ["updatedAt = :timestamp", "currentStep = :step"]
-        expression_values = {":timestamp": timestamp, ":step": step}
+        # Update based on step; existence and version are checked by the
+        # write itself instead of a get_item first
+        update_expression_parts = [
+            "updatedAt = :timestamp",
+            "currentStep = :step",
+            "#version = if_not_exists(#version, :zero) + :one",
+        ]
+        expression_values = {
+            ":timestamp": timestamp,
+            ":step": step,
+            ":zero": 0,
+            ":one": 1,
+        }
 
         # Store step-specific data
-        if step == 1:
-            update_expression_parts.extend(
-                [
-                    "companyName = :companyName",
-                    "contactName = :contactName",
-                    "contactEmail = :contactEmail",
-                    "contactPhone = :contactPhone",
-                ]
-            )
-            expression_values.update(
-                {
-                    ":companyName": step_data.get("companyName", ""),
-                    ":contactName": step_data.get("contactName", ""),
-                    ":contactEmail": step_data.get("contactEmail", ""),
-                    ":contactPhone": step_data.get("contactPhone", ""),
-                }
-            )
-
-        elif step == 2:
-            update_expression_parts.extend(
-                [
-                    "transactionType = :transactionType",
-                    "targetCompany = :targetCompany",
-                    "dealStage = :dealStage",
-                    "expectedCloseDate = :expectedCloseDate",
-                ]
-            )
-            expression_values.update(
-                {
-                    ":transactionType": step_data.get("transactionType", ""),
-                    ":targetCompany": step_data.get("targetCompany", ""),
-                    ":dealStage": step_data.get("dealStage", ""),
-                    ":expectedCloseDate": step_data.get("expectedCloseDate", ""),
-                }
-            )
-
-        elif step == 3:
-            update_expression_parts.extend(
-                [
-                    "cloudProviders = :cloudProviders",
-                    "accountCount = :accountCount",
-                    "workloadTypes = :workloadTypes",
-                ]
-            )
-            expression_values.update(
-                {
-                    ":cloudProviders": step_data.get("cloudProviders", []),
-                    ":accountCount": step_data.get("accountCount", ""),
-                    ":workloadTypes": step_data.get("workloadTypes", ""),
-                }
-            )
-
-        elif step == 4:
-            update_expression_parts.extend(
-                [
-                    "focusAreas = :focusAreas",
-                    "complianceFrameworks = :complianceFrameworks",
-                    "additionalNotes = :additionalNotes",
-                ]
-            )
-            expression_values.update(
-                {
-                    ":focusAreas": step_data.get("focusAreas", []),
-                    ":complianceFrameworks": step_data.get("complianceFrameworks", []),
-                    ":additionalNotes": step_data.get("additionalNotes", ""),
-                }
-            )
+        for field, default in STEP_FIELDS.get(step, {}).items():
+            if field in KEEP_WHEN_OMITTED and field not in step_data:
+                continue
+            update_expression_parts.append(f"{field} = :{field}")
+            expression_values[f":{field}"] = step_data.get(field, default)
 
         # Execute update
         update_expression = "SET " + ", ".join(update_expression_parts)
 
-        updated_item = table.update_item(
-            Key={"onboardingId": onboarding_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values,
-            ReturnValues="ALL_NEW",
-        )
+        try:
+            updated_item = get_table().update_item(
+                Key={"onboardingId": onboarding_id},
+                UpdateExpression=update_expression,
+                ConditionExpression=write_condition(expected_version),
+                ExpressionAttributeNames={"#version": "version"},
+                ExpressionAttributeValues=expression_values,
+                ReturnValues="ALL_NEW",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as e:
+            if is_conditional_check_failure(e):
+                onboarding_cache.invalidate(onboarding_id)
+                return conditional_write_failed(e)
+            raise
+
+        onboarding_cache.refresh(onboarding_id, updated_item["Attributes"])
 
         return response(
             200,
@@ -234,32 +316,55 @@ def update_onboarding_step(onboarding_id, event_body):
 def submit_onboarding(onboarding_id, event_body):
     """Finalize and submit the onboarding"""
     try:
-        # Get current record
-        result = table.get_item(Key={"onboardingId": onboarding_id})
-        if "Item" not in result:
-            return response(404, {"error": "Onboarding not found"})
+        try:
+            expected_version = parse_expected_version(event_body.get("version"))
+        except (TypeError, ValueError):
+            return response(400, {"error": "version must be a positive integer"})
 
         timestamp = datetime.utcnow().isoformat()
 
-        # Update status to completed
-        updated_item = table.update_item(
-            Key={"onboardingId": onboarding_id},
-            UpdateExpression="SET #status = :status, updatedAt = :timestamp, submittedAt = :timestamp",
-            ExpressionAttributeNames={"#status": "status"},
-            ExpressionAttributeValues={":status": "submitted", ":timestamp": timestamp},
-            ReturnValues="ALL_NEW",
-        )
-
-        # Here you could add additional logic like:
-        # - Send notification emails
-        # - Trigger assessment workflows
-        # - Create tickets in project management systems
+        # Update status to completed in one conditional write
+        try:
+            updated_item = get_table().update_item(
+                Key={"onboardingId": onboarding_id},
+                UpdateExpression=(
+                    "SET #status = :status, updatedAt = :timestamp, "
+                    "submittedAt = :timestamp, "
+                    "#version = if_not_exists(#version, :zero) + :one"
+                ),
+                ConditionExpression=write_condition(expected_version),
+                ExpressionAttributeNames={"#status": "status", "#version": "version"},
+                ExpressionAttributeValues={
+                    ":status": "submitted",
+                    ":timestamp": timestamp,
+                    ":zero": 0,
+                    ":one": 1,
+                },
+                ReturnValues="ALL_NEW",
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as e:
+            if is_conditional_check_failure(e):
+                onboarding_cache.invalidate(onboarding_id)
+                return conditional_write_failed(e)
+            raise
+
+        onboarding_cache.refresh(onboarding_id, updated_item["Attributes"])
+
+        # Imports, remediation planning and reporting run in the background;
+        # the submit stands even if they could not be started
+        try:
+            assessment_started = assessment.start(onboarding_id)
+        except Exception as e:
+            print(f"Error starting assessment: {str(e)}")
+            assessment_started = False
 
         return response(
             200,
             {
                 "message": "Onboarding submitted successfully",
                 "data": updated_item["Attributes"],
+                "assessmentStarted": assessment_started,
             },
         )
 
@@ -270,6 +375,42 @@ def submit_onboarding(onboarding_id, event_body):
         )
 
 
+def get_assessment(onboarding_id):
+    """Return the progress of the onboarding's assessment"""
+    try:
+        progress = assessment.load_progress(onboarding_id)
+        if progress is None:
+            return response(404, {"error": "No assessment found for this onboarding"})
+
+        return response(
+            200,
+            {"message": "Assessment retrieved successfully", "data": progress},
+        )
+
+    except Exception as e:
+        print(f"Error retrieving assessment: {str(e)}")
+        return response(
+            500, {"error": "Failed to retrieve assessment", "details": str(e)}
+        )
+
+
+def encode_cursor(last_evaluated_key):
+    """Encode a DynamoDB LastEvaluatedKey (table and index keys) as an opaque cursor"""
+    raw = json.dumps(last_evaluated_key, cls=DecimalEncoder, sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Decode a cursor from encode_cursor back into an ExclusiveStartKey"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid lastKey cursor")
+    if not isinstance(key, dict) or "onboardingId" not in key:
+        raise ValueError("Invalid lastKey cursor")
+    return key
+
+
 def list_onboarding_records(query_params):
     """List onboarding records with optional filtering"""
     try:
@@ -277,25 +418,54 @@ def list_onboarding_records(query_params):
         limit = int(query_params.get("limit", 50))
         last_key = query_params.get("lastKey")
         status_filter = query_params.get("status")
+        user_filter = query_params.get("userId")
 
-        scan_kwargs = {"Limit": limit}
+        if limit < 1:
+            return response(400, {"error": "limit must be a positive integer"})
 
+        read_kwargs = {}
         if last_key:
-            scan_kwargs["ExclusiveStartKey"] = {"onboardingId": last_key}
-
-        if status_filter:
-            scan_kwargs["FilterExpression"] = Key("status").eq(status_filter)
-
-        result = table.scan(**scan_kwargs)
+            try:
+                read_kwargs["ExclusiveStartKey"] = decode_cursor(last_key)
+            except ValueError as e:
+                return response(400, {"error": str(e)})
+
+        # Query the matching GSI newest-first; Scan only when no index applies
+        if user_filter:
+            read = get_table().query
+            read_kwargs["IndexName"] = USER_INDEX
+            read_kwargs["KeyConditionExpression"] = Key("userId").eq(user_filter)
+            read_kwargs["ScanIndexForward"] = False
+            if status_filter:
+                read_kwargs["FilterExpression"] = Attr("status").eq(status_filter)
+        elif status_filter:
+            read = get_table().query
+            read_kwargs["IndexName"] = STATUS_INDEX
+            read_kwargs["KeyConditionExpression"] = Key("status").eq(status_filter)
+            read_kwargs["ScanIndexForward"] = False
+        else:
+            read = get_table().scan
+
+        # Keep reading until the page is full; each call only evaluates the
+        # remaining count so the returned cursor never skips items
+        items = []
+        next_key = None
+        while len(items) < limit:
+            result = read(Limit=limit - len(items), **read_kwargs)
+            items.extend(result.get("Items", []))
+            next_key = result.get("LastEvaluatedKey")
+            if not next_key:
+                break
+            read_kwargs["ExclusiveStartKey"] = next_key
 
         response_data = {
             "message": "Onboarding records retrieved successfully",
-            "data": result.get("Items", []),
-            "count": len(result.get("Items", [])),
+            "data": items,
+            "count": len(items),
         }
 
-        if "LastEvaluatedKey" in result:
-            response_data["lastKey"] = result["LastEvaluatedKey"]["onboardingId"]
+        if next_key:
+            response_data["lastKey"] = encode_cursor(next_key)
 
         return response(200, response_data)
 
@@ -306,15 +476,30 @@ def list_onboarding_records(query_params):
         )
 
 
-def delete_onboarding(onboarding_id):
+def delete_onboarding(onboarding_id, query_params=None):
     """Delete an onboarding record"""
     try:
-        # Check if record exists
-        result = table.get_item(Key={"onboardingId": onboarding_id})
-        if "Item" not in result:
-            return response(404, {"error": "Onboarding not found"})
+        try:
+            expected_version = parse_expected_version(
+                (query_params or {}).get("version")
+            )
+        except (TypeError, ValueError):
+            return response(400, {"error": "version must be a positive integer"})
+
+        # The condition replaces a separate existence check
+        try:
+            get_table().delete_item(
+                Key={"onboardingId": onboarding_id},
+                ConditionExpression=write_condition(expected_version),
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except ClientError as e:
+            if is_conditional_check_failure(e):
+                onboarding_cache.invalidate(onboarding_id)
+                return conditional_write_failed(e)
+            raise
 
-        table.delete_item(Key={"onboardingId": onboarding_id})
+        onboarding_cache.invalidate(onboarding_id)
 
         return response(
             200,
@@ -331,11 +516,219 @@ def delete_onboarding(onboarding_id):
         )
 
 
+def build_batch_item(record, timestamp):
+    """Validate one bulk record and build its item.
+
+    Step 1 fields are required; later steps are validated and stored when any
+    of their fields are present, and currentStep is the last step included.
+    Returns ``(item, None)`` or ``(None, error_message)``.
+    """
+    if not isinstance(record, dict):
+        return None, "Record must be an object"
+
+    is_valid, error_msg = validate_step_data(1, record)
+    if not is_valid:
+        return None, error_msg
+
+    item = new_onboarding_item(record, timestamp)
+    for step in (2, 3, 4):
+        fields = STEP_FIELDS[step]
+        if not any(field in record for field in fields):
+            continue
+        is_valid, error_msg = validate_step_data(step, record)
+        if not is_valid:
+            return None, f"Step {step}: {error_msg}"
+        item.update(
+            {field: record.get(field, default) for field, default in fields.items()}
+        )
+        item["currentStep"] = step
+    return item, None
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for throttled batch requests"""
+    return random.uniform(
+        0, min(BATCH_BACKOFF_CAP_SECONDS, BATCH_BACKOFF_BASE_SECONDS * 2**attempt)
+    )
+
+
+def batch_write_items(items):
+    """Write items in 25-item BatchWriteItem calls, retrying UnprocessedItems.
+
+    Returns the set of onboarding IDs that were still unprocessed after the
+    final attempt.
+    """
+    dynamodb = aws_clients.resource("dynamodb")
+    table_name = get_table().name
+    failed = set()
+
+    for start in range(0, len(items), BATCH_WRITE_SIZE):
+        requests = [
+            {"PutRequest": {"Item": item}}
+            for item in items[start : start + BATCH_WRITE_SIZE]
+        ]
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(backoff_delay(attempt))
+            result = dynamodb.batch_write_item(RequestItems={table_name: requests})
+            requests = result.get("UnprocessedItems", {}).get(table_name, [])
+            if not requests:
+                break
+        failed.update(
+            request["PutRequest"]["Item"]["onboardingId"] for request in requests
+        )
+
+    return failed
+
+
+def batch_get_items(onboarding_ids):
+    """Fetch items in 100-key BatchGetItem calls, retrying UnprocessedKeys.
+
+    Returns ``(items_by_id, unprocessed_ids)``.
+    """
+    dynamodb = aws_clients.resource("dynamodb")
+    table_name = get_table().name
+    found = {}
+    unprocessed = set()
+
+    for start in range(0, len(onboarding_ids), BATCH_GET_SIZE):
+        keys = [
+            {"onboardingId": onboarding_id}
+            for onboarding_id in onboarding_ids[start : start + BATCH_GET_SIZE]
+        ]
+        for attempt in range(BATCH_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(backoff_delay(attempt))
+            result = dynamodb.batch_get_item(RequestItems={table_name: {"Keys": keys}})
+            for item in result.get("Responses", {}).get(table_name, []):
+                found[item["onboardingId"]] = item
+            keys = result.get("UnprocessedKeys", {}).get(table_name, {}).get("Keys", [])
+            if not keys:
+                break
+        unprocessed.update(key["onboardingId"] for key in keys)
+
+    return found, unprocessed
+
+
+def create_onboarding_batch(event_body):
+    """Create many onboarding records with BatchWriteItem, reporting a result per record"""
+    try:
+        records = event_body.get("records")
+        if not isinstance(records, list) or not records:
+            return response(400, {"error": "records must be a non-empty list"})
+        if len(records) > BATCH_MAX_RECORDS:
+            return response(
+                400, {"error": f"At most {BATCH_MAX_RECORDS} records per batch"}
+            )
+
+        timestamp = datetime.utcnow().isoformat()
+        results = []
+        items = []
+        for index, record in enumerate(records):
+            item, error_msg = build_batch_item(record, timestamp)
+            if error_msg:
+                results.append({"index": index, "statusCode": 400, "error": error_msg})
+            else:
+                items.append(item)
+                results.append(
+                    {
+                        "index": index,
+                        "statusCode": 201,
+                        "onboardingId": item["onboardingId"],
+                    }
+                )
+
+        failed = batch_write_items(items)
+        for result in results:
+            if result.get("onboardingId") in failed:
+                result.update(
+                    statusCode=503, error="Write was throttled, retry this record"
+                )
+                del result["onboardingId"]
+
+        created = sum(1 for result in results if result["statusCode"] == 201)
+        return response(
+            201 if created == len(results) else 207,
+            {
+                "message": f"{created} of {len(results)} onboarding records created",
+                "created": created,
+                "failed": len(results) - created,
+                "results": results,
+            },
+        )
+
+    except Exception as e:
+        print(f"Error creating onboarding batch: {str(e)}")
+        return response(
+            500, {"error": "Failed to create onboarding batch", "details": str(e)}
+        )
+
+
+def get_onboarding_batch(query_params):
+    """Retrieve many onboarding records by ID with BatchGetItem"""
+    try:
+        onboarding_ids = list(
+            dict.fromkeys(
+                onboarding_id.strip()
+                for onboarding_id in (query_params.get("ids") or "").split(",")
+                if onboarding_id.strip()
+            )
+        )
+        if not onboarding_ids:
+            return response(400, {"error": "ids query parameter is required"})
+        if len(onboarding_ids) > BATCH_MAX_RECORDS:
+            return response(
+                400, {"error": f"At most {BATCH_MAX_RECORDS} ids per batch"}
+            )
+
+        found, unprocessed = batch_get_items(onboarding_ids)
+
+        results = []
+        for onboarding_id in onboarding_ids:
+            if onboarding_id in found:
+                results.append(
+                    {
+                        "onboardingId": onboarding_id,
+                        "statusCode": 200,
+                        "data": found[onboarding_id],
+                    }
+                )
+            elif onboarding_id in unprocessed:
+                results.append(
+                    {
+                        "onboardingId": onboarding_id,
+                        "statusCode": 503,
+                        "error": "Read was throttled, retry this record",
+                    }
+                )
+            else:
+                results.append(
+                    {
+                        "onboardingId": onboarding_id,
+                        "statusCode": 404,
+                        "error": "Onboarding not found",
+                    }
+                )
+
+        return response(
+            200,
+            {
+                "message": "Onboarding records retrieved successfully",
+                "count": len(found),
+                "results": results,
+            },
+        )
+
+    except Exception as e:
+        print(f"Error retrieving onboarding batch: {str(e)}")
+        return response(
+            500, {"error": "Failed to retrieve onboarding batch", "details": str(e)}
+        )
+
+
 def onboarding_logic(event, context):
     """Main Lambda handler"""
     try:
-        print(f"Received event: {json.dumps(event)}")
-
         http_method = event.get("httpMethod", "")
         path = event.get("path", "")
         query_params = event.get("queryStringParameters") or {}
@@ -360,8 +753,17 @@ def onboarding_logic(event, context):
         elif http_method == "GET" and path == "/onboarding":
             return list_onboarding_records(query_params)
 
+        elif http_method == "POST" and path == "/onboarding/batch":
+            return create_onboarding_batch(body)
+
+        elif http_method == "GET" and path == "/onboarding/batch":
+            return get_onboarding_batch(query_params)
+
+        elif http_method == "GET" and onboarding_id and path.endswith("/assessment"):
+            return get_assessment(onboarding_id)
+
         elif http_method == "GET" and onboarding_id:
-            return get_onboarding(onboarding_id)
+            return get_onboarding(onboarding_id, query_params)
 
         elif http_method == "PUT" and onboarding_id and "step" in body:
             return update_onboarding_step(onboarding_id, body)
@@ -370,7 +772,7 @@ def onboarding_logic(event, context):
             return submit_onboarding(onboarding_id, body)
 
         elif http_method == "DELETE" and onboarding_id:
-            return delete_onboarding(onboarding_id)
+            return delete_onboarding(onboarding_id, query_params)
 
         else:
             return response(404, {"error": "Route not found"})
@@ -0,0 +1,170 @@
+import functools
+import json
+import os
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from lambdas import instrumentation
+
+# 0 turns the cache off. Entries written by this container's own mutations
+# are exact; the TTL bounds how stale a read can be after a write made by
+# another container.
+TTL_SECONDS = float(os.environ.get("ONBOARDING_CACHE_TTL_SECONDS", 0))
+MAX_ENTRIES = int(os.environ.get("ONBOARDING_CACHE_MAX_ENTRIES", 1024))
+# e.g. redis://cache.internal:6379/0 to share entries between containers;
+# each container keeps its own otherwise
+CACHE_URL = os.environ.get("ONBOARDING_CACHE_URL", "")
+KEY_PREFIX = "onboarding#"
+
+
+class LocalCache:
+    """Per-container LRU of items, each expiring after its TTL"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, item = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return item
+
+    def set(self, key, item, ttl):
+        self._entries[key] = (time.monotonic() + ttl, item)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key):
+        self._entries.pop(key, None)
+
+
+def _encode(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serialisable")
+
+
+class SharedCache:
+    """Items shared by every container, in a store with a Redis-style client.
+
+    ``client`` needs ``get(key)``, ``set(key, value, px=milliseconds)`` and
+    ``delete(key)``, as ``redis.Redis`` has. Items are stored as JSON and
+    read back with numbers as ``Decimal``, as DynamoDB returns them.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        raw = self.client.get(KEY_PREFIX + key)
+        if raw is None:
+            return None
+        return json.loads(raw, parse_float=Decimal, parse_int=Decimal)
+
+    def set(self, key, item, ttl):
+        value = json.dumps(item, default=_encode, separators=(",", ":"))
+        self.client.set(KEY_PREFIX + key, value, px=int(ttl * 1000))
+
+    def delete(self, key):
+        self.client.delete(KEY_PREFIX + key)
+
+
+class OnboardingCache:
+    """Read-through cache of onboarding items over a LocalCache or SharedCache.
+
+    A failing backend is logged and treated as a miss, so the cache can
+    only ever cost a table read, never fail a request. Hits, misses and
+    lookup latency go to the invocation's metrics.
+    """
+
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+    def get(self, onboarding_id, load):
+        """Return the cached item, else ``load()`` it (``None`` if missing) and cache it"""
+        started = time.perf_counter()
+        try:
+            item = self.backend.get(onboarding_id)
+        except Exception as e:
+            print(f"Error reading onboarding cache: {str(e)}")
+            item = None
+        instrumentation.record("OnboardingCache", started)
+        if item is not None:
+            self.hits += 1
+            instrumentation.count("OnboardingCacheHits")
+            return item
+        self.misses += 1
+        instrumentation.count("OnboardingCacheMisses")
+        item = load()
+        if item is not None:
+            self.put(onboarding_id, item)
+        return item
+
+    def put(self, onboarding_id, item):
+        try:
+            self.backend.set(onboarding_id, item, self.ttl)
+        except Exception as e:
+            print(f"Error writing onboarding cache: {str(e)}")
+
+    def invalidate(self, onboarding_id):
+        try:
+            self.backend.delete(onboarding_id)
+        except Exception as e:
+            print(f"Error invalidating onboarding cache: {str(e)}")
+
+
+def shared_client(url):
+    """Redis client for ONBOARDING_CACHE_URL.
+
+    ``redis`` is imported here rather than at module load since only a
+    shared cache needs it.
+    """
+    import redis
+
+    return redis.Redis.from_url(url)
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache():
+    """Return the container's onboarding cache, or ``None`` when it is off"""
+    if TTL_SECONDS <= 0:
+        return None
+    if CACHE_URL:
+        backend = SharedCache(shared_client(CACHE_URL))
+    else:
+        backend = LocalCache(MAX_ENTRIES)
+    return OnboardingCache(backend, TTL_SECONDS)
+
+
+def refresh(onboarding_id, item):
+    """Replace the cached item with ``item``, e.g. a write's ``ALL_NEW`` result"""
+    cache = get_cache()
+    if cache is not None:
+        cache.put(onboarding_id, item)
+
+
+def invalidate(onboarding_id):
+    cache = get_cache()
+    if cache is not None:
+        cache.invalidate(onboarding_id)
+
+
+def reset():
+    """Drop the container's cache so the next call builds a fresh one (used by tests)."""
+    get_cache.cache_clear()
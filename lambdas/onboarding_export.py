@@ -0,0 +1,309 @@
+import base64
+import gzip
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from lambdas import aws_clients, context_store
+from lambdas.pipeline import out_of_time
+
+EXPORT_BUCKET = os.environ.get("EXPORT_BUCKET", "")
+EXPORT_PREFIX = "exports/onboarding"
+DEFAULT_TOTAL_SEGMENTS = 8
+MAX_TOTAL_SEGMENTS = 64
+SCAN_PAGE_LIMIT = 1000
+# Every part but the last must be at least 5 MiB for S3 multipart uploads
+PART_SIZE_BYTES = 8 * 1024 * 1024
+# Stop scanning this long before the Lambda timeout to save a checkpoint
+TIME_MARGIN_MS = 10_000
+
+
+def from_attribute_value(value):
+    """Convert a low-level DynamoDB AttributeValue straight to a JSON-ready value.
+
+    Numbers become ``int``/``float`` here, so items never pass through
+    ``Decimal`` and need no JSON encoder fallback.
+    """
+    ((kind, data),) = value.items()
+    if kind == "S":
+        return data
+    if kind == "N":
+        return int(data) if data.lstrip("-").isdigit() else float(data)
+    if kind == "M":
+        return {key: from_attribute_value(item) for key, item in data.items()}
+    if kind == "L":
+        return [from_attribute_value(item) for item in data]
+    if kind == "BOOL":
+        return data
+    if kind == "NULL":
+        return None
+    if kind == "SS":
+        return list(data)
+    if kind == "NS":
+        return [int(n) if n.lstrip("-").isdigit() else float(n) for n in data]
+    if kind == "B":
+        return base64.b64encode(data).decode("ascii")
+    if kind == "BS":
+        return [base64.b64encode(item).decode("ascii") for item in data]
+    raise ValueError(f"Unsupported DynamoDB attribute type: {kind}")
+
+
+def item_to_ndjson(item):
+    """Serialise one low-level DynamoDB item as an NDJSON line"""
+    record = {key: from_attribute_value(value) for key, value in item.items()}
+    return json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+class GzipPartWriter:
+    """Buffers gzip-compressed text lines and uploads them as S3 multipart parts.
+
+    Each part is a complete gzip member; concatenated members form one valid
+    gzip file, which is what lets an export resume on a part boundary.
+    """
+
+    def __init__(self, bucket, key, upload_id, parts, compresslevel=9):
+        self.bucket = bucket
+        self.key = key
+        self.upload_id = upload_id
+        self.parts = parts
+        self.compresslevel = compresslevel
+        self._start_member()
+
+    def _start_member(self):
+        self._buffer = io.BytesIO()
+        self._gzip = gzip.GzipFile(
+            fileobj=self._buffer,
+            mode="wb",
+            compresslevel=self.compresslevel,
+            mtime=0,
+        )
+        self.pending_rows = 0
+
+    @property
+    def buffered_bytes(self):
+        return self._buffer.tell()
+
+    def write(self, lines):
+        self._gzip.write("".join(lines).encode("utf-8"))
+        self.pending_rows += len(lines)
+
+    def flush(self):
+        """Upload the buffered member as the next part"""
+        self._gzip.close()
+        part_number = len(self.parts) + 1
+        result = aws_clients.client("s3").upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=self._buffer.getvalue(),
+        )
+        self.parts.append({"PartNumber": part_number, "ETag": result["ETag"]})
+        self._start_member()
+
+    def discard(self):
+        self._gzip.close()
+        self._start_member()
+
+
+def load_checkpoint(export_id):
+    return context_store.load(f"onboarding-export#{export_id}")
+
+
+def save_checkpoint(checkpoint):
+    context_store.save(f"onboarding-export#{checkpoint['exportId']}", checkpoint)
+
+
+def start_export(bucket, table_name, total_segments):
+    export_id = str(uuid.uuid4())
+    key = f"{EXPORT_PREFIX}/{export_id}.ndjson.gz"
+    upload = aws_clients.client("s3").create_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        ContentType="application/x-ndjson",
+        ContentEncoding="gzip",
+    )
+    return {
+        "exportId": export_id,
+        "status": "in_progress",
+        "bucket": bucket,
+        "key": key,
+        "tableName": table_name,
+        "uploadId": upload["UploadId"],
+        "totalSegments": total_segments,
+        "parts": [],
+        "rows": 0,
+        "segments": {
+            str(segment): {"lastKey": None, "done": False}
+            for segment in range(total_segments)
+        },
+    }
+
+
+def scan_segment(checkpoint, segment, start_key, pages, stop):
+    """Scan one parallel-scan segment, queueing each page as NDJSON lines.
+
+    The bounded queue back-pressures the scan so memory stays flat no matter
+    how large the table is.
+    """
+    scan_kwargs = {
+        "TableName": checkpoint["tableName"],
+        "Segment": segment,
+        "TotalSegments": checkpoint["totalSegments"],
+        "Limit": SCAN_PAGE_LIMIT,
+    }
+    if start_key:
+        scan_kwargs["ExclusiveStartKey"] = start_key
+    try:
+        while not stop.is_set():
+            result = aws_clients.client("dynamodb").scan(**scan_kwargs)
+            lines = [item_to_ndjson(item) for item in result.get("Items", [])]
+            next_key = result.get("LastEvaluatedKey")
+            pages.put(("page", segment, lines, next_key))
+            if not next_key:
+                break
+            scan_kwargs["ExclusiveStartKey"] = next_key
+    except Exception as e:
+        pages.put(("error", segment, e, None))
+    finally:
+        pages.put(("done", segment, None, None))
+
+
+def run_export(checkpoint, context):
+    """Scan the remaining segments in parallel and stream them into the upload.
+
+    Returns ``(rows_this_run, finished)``; segment positions are checkpointed
+    only as each part is uploaded, so pages buffered when the run pauses are
+    simply scanned again on resume.
+    """
+    pending = {
+        int(segment): state["lastKey"]
+        for segment, state in checkpoint["segments"].items()
+        if not state["done"]
+    }
+    if not pending:
+        return 0, True
+
+    writer = GzipPartWriter(
+        checkpoint["bucket"],
+        checkpoint["key"],
+        checkpoint["uploadId"],
+        checkpoint["parts"],
+    )
+    positions = {
+        segment: dict(state) for segment, state in checkpoint["segments"].items()
+    }
+    pages = queue.Queue(maxsize=2 * len(pending))
+    stop = threading.Event()
+    errors = []
+    rows_this_run = 0
+    running = len(pending)
+
+    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+        for segment, start_key in pending.items():
+            pool.submit(scan_segment, checkpoint, segment, start_key, pages, stop)
+
+        while running:
+            kind, segment, payload, next_key = pages.get()
+            if kind == "done":
+                running -= 1
+                continue
+            if kind == "error":
+                errors.append(payload)
+                stop.set()
+                continue
+            if stop.is_set():
+                # Drain pages that were already queued; they are not checkpointed
+                continue
+
+            writer.write(payload)
+            positions[str(segment)] = {"lastKey": next_key, "done": next_key is None}
+            if writer.buffered_bytes >= PART_SIZE_BYTES:
+                rows = writer.pending_rows
+                writer.flush()
+                rows_this_run += rows
+                checkpoint["rows"] += rows
+                checkpoint["segments"] = {s: dict(p) for s, p in positions.items()}
+                save_checkpoint(checkpoint)
+            if out_of_time(context, TIME_MARGIN_MS):
+                stop.set()
+
+    if errors:
+        raise errors[0]
+
+    if stop.is_set():
+        writer.discard()
+        return rows_this_run, False
+
+    # Every segment finished: upload what is left as the final part
+    if writer.pending_rows or not checkpoint["parts"]:
+        rows = writer.pending_rows
+        writer.flush()
+        rows_this_run += rows
+        checkpoint["rows"] += rows
+    checkpoint["segments"] = positions
+    return rows_this_run, True
+
+
+def export_onboarding_logic(event, context):
+    """
+    Export every onboarding record to S3 as gzip-compressed NDJSON.
+
+    A DynamoDB parallel scan runs across a thread pool and is streamed into an
+    S3 multipart upload. The run checkpoints its progress in the mna-context
+    table after each part and pauses before the Lambda timeout; invoke again
+    with the returned ``exportId`` to resume.
+    """
+    started = time.perf_counter()
+    export_id = event.get("exportId")
+    if export_id:
+        checkpoint = load_checkpoint(export_id)
+        if checkpoint is None:
+            return {"statusCode": 404, "error": f"Unknown export {export_id}"}
+    else:
+        total_segments = int(event.get("totalSegments", DEFAULT_TOTAL_SEGMENTS))
+        if not 1 <= total_segments <= MAX_TOTAL_SEGMENTS:
+            return {
+                "statusCode": 400,
+                "error": f"totalSegments must be between 1 and {MAX_TOTAL_SEGMENTS}",
+            }
+        bucket = event.get("bucket") or EXPORT_BUCKET
+        if not bucket:
+            # Caught here rather than as a ParamValidationError from S3
+            return {"statusCode": 500, "error": "EXPORT_BUCKET is not configured"}
+        checkpoint = start_export(
+            bucket,
+            os.environ.get("DYNAMODB_TABLE", "mna-onboarding"),
+            total_segments,
+        )
+        save_checkpoint(checkpoint)
+
+    rows = 0
+    if checkpoint["status"] != "complete":
+        rows, finished = run_export(checkpoint, context)
+        if finished:
+            aws_clients.client("s3").complete_multipart_upload(
+                Bucket=checkpoint["bucket"],
+                Key=checkpoint["key"],
+                UploadId=checkpoint["uploadId"],
+                MultipartUpload={"Parts": checkpoint["parts"]},
+            )
+            checkpoint["status"] = "complete"
+        save_checkpoint(checkpoint)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "statusCode": 200,
+        "exportId": checkpoint["exportId"],
+        "status": checkpoint["status"],
+        "location": f"s3://{checkpoint['bucket']}/{checkpoint['key']}",
+        "rows": checkpoint["rows"],
+        "rowsThisRun": rows,
+        "rowsPerSecond": round(rows / elapsed, 1) if elapsed else None,
+        "parts": len(checkpoint["parts"]),
+    }
@@ -0,0 +1,76 @@
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_ITEM, _ERROR, _DONE = range(3)
+
+
+def fan_in(producers, max_workers, max_buffered=64):
+    """Run producers on a bounded thread pool and yield their items as they arrive.
+
+    Args:
+        producers: Zero-argument callables, each returning an iterable.
+        max_workers: Maximum number of producers running at once.
+        max_buffered: Items held between producers and the consumer; producers
+            block when it is full, so memory stays bounded.
+
+    Yields:
+        Items from all producers, in arrival order.
+
+    Raises:
+        Exception: The first exception raised by any producer.
+    """
+    producers = list(producers)
+    items = queue.Queue(maxsize=max_buffered)
+    stop = threading.Event()
+
+    def put(message):
+        while not stop.is_set():
+            try:
+                items.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(producer):
+        try:
+            for item in producer():
+                if not put((_ITEM, item)):
+                    return
+        except Exception as e:
+            put((_ERROR, e))
+        finally:
+            put((_DONE, None))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(producers))))
+    try:
+        for producer in producers:
+            pool.submit(run, producer)
+        remaining = len(producers)
+        while remaining:
+            kind, value = items.get()
+            if kind == _DONE:
+                remaining -= 1
+            elif kind == _ERROR:
+                raise value
+            else:
+                yield value
+    finally:
+        # Unblocks producers if the consumer stopped early or a producer failed
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def out_of_time(context, margin_ms):
+    """Whether the Lambda ``context`` has less than ``margin_ms`` left to run"""
+    remaining = getattr(context, "get_remaining_time_in_millis", None)
+    return remaining is not None and remaining() < margin_ms
+
+
+def batched(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
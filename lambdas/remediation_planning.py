@@ -1,5 +1,815 @@
+import bisect
+import hashlib
+import heapq
+import math
+import os
+import time
+from collections import deque
+
+from lambdas import aurora, context_store, watermarks
+from lambdas.findings import (
+    CLOSED_STATUSES,
+    FINDING_COLUMNS,
+    FINDINGS_DDL,
+    FINDINGS_TABLES,
+    CsvCopyStream,
+    FindingBatch,
+)
+from lambdas.focus_areas import FOCUS_AREAS, classify
+
+# Area -> areas whose tasks in the same account are planned first, e.g. an
+# over-broad IAM policy is fixed before the bucket policy it would bypass
+PREREQUISITES = {
+    "data": ("iam",),
+    "network": ("iam",),
+    "vulnerability": ("network",),
+    "compliance": ("logging",),
+}
+
+
+def _stage(area):
+    return 1 + max(map(_stage, PREREQUISITES.get(area, ())), default=-1)
+
+
+# How many prerequisites deep each area is; of tasks with equal priority the
+# lower stage goes first, so a prerequisite never follows what it unblocks
+STAGES = {area: _stage(area) for area in FOCUS_AREAS}
+EXPOSURE_WEIGHT = 1.5
+FOCUS_WEIGHT = 1.5
+# Extra weight per doubling of the findings a task closes
+COUNT_WEIGHT = 0.1
+PLAN_PREVIEW = int(os.environ.get("REMEDIATION_PLAN_PREVIEW", 50))
+READ_BATCH_SIZE = 10_000
+
+PLAN_COLUMNS = (
+    "onboarding_id",
+    "task_id",
+    "area",
+    "stage",
+    "account_id",
+    "resource_id",
+    "resource_type",
+    "title",
+    "severity",
+    "risk",
+    "priority",
+    "finding_count",
+    "blocked_by",
+)
+
+# Created by the first plan saved to a database without it (see
+# aurora.ensure_schema)
+PLAN_TABLES = ("remediation_tasks",)
+PLAN_DDL = """
+CREATE TABLE IF NOT EXISTS remediation_tasks (
+    onboarding_id text        NOT NULL,
+    task_id       text        NOT NULL,
+    area          text        NOT NULL,
+    stage         smallint    NOT NULL,
+    account_id    text,
+    resource_id   text,
+    resource_type text,
+    title         text,
+    severity      text,
+    risk          double precision NOT NULL,
+    priority      double precision NOT NULL,
+    finding_count integer     NOT NULL,
+    blocked_by    text,
+    planned_at    timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (onboarding_id, task_id)
+);
+CREATE INDEX IF NOT EXISTS remediation_tasks_order_idx
+    ON remediation_tasks
+    (onboarding_id, priority DESC, stage, risk DESC, task_id COLLATE "C");
+"""
+
+_FINDINGS_SQL = f"""
+SELECT {", ".join(FINDING_COLUMNS)}
+FROM findings
+WHERE onboarding_id = %s AND lower(coalesce(status, '')) <> ALL(%s)
+"""
+# Findings on every resource that has a finding changed since the last plan,
+# closed ones included so tasks they closed are dropped
+_CHANGED_FINDINGS_SQL = f"""
+WITH changed AS (
+    SELECT onboarding_id, source, finding_id, account_id, resource_id
+    FROM findings
+    WHERE onboarding_id = %(onboarding_id)s AND changed_at > %(since)s
+)
+SELECT {", ".join(f"f.{column}" for column in FINDING_COLUMNS)}
+FROM findings f
+JOIN (
+    SELECT DISTINCT account_id, resource_id FROM changed WHERE resource_id IS NOT NULL
+) t ON f.resource_id = t.resource_id AND f.account_id IS NOT DISTINCT FROM t.account_id
+WHERE f.onboarding_id = %(onboarding_id)s
+UNION ALL
+SELECT {", ".join(f"f.{column}" for column in FINDING_COLUMNS)}
+FROM findings f
+JOIN changed c USING (onboarding_id, source, finding_id)
+WHERE c.resource_id IS NULL
+"""
+_PLAN_SQL = f"""
+SELECT {", ".join(PLAN_COLUMNS[1:])}
+FROM remediation_tasks
+WHERE onboarding_id = %s
+ORDER BY priority DESC, stage, risk DESC, task_id COLLATE "C"
+"""
+_COPY_PLAN_SQL = (
+    f"COPY remediation_tasks ({', '.join(PLAN_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+_STAGE_PLAN_SQL = (
+    "CREATE TEMP TABLE IF NOT EXISTS remediation_tasks_stage "
+    "(LIKE remediation_tasks INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+)
+_COPY_PLAN_STAGE_SQL = (
+    f"COPY remediation_tasks_stage ({', '.join(PLAN_COLUMNS)}) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+_UPSERT_PLAN_SQL = f"""
+INSERT INTO remediation_tasks ({", ".join(PLAN_COLUMNS)})
+SELECT {", ".join(PLAN_COLUMNS)} FROM remediation_tasks_stage
+ON CONFLICT (onboarding_id, task_id) DO UPDATE SET
+    {", ".join(f"{column} = EXCLUDED.{column}" for column in PLAN_COLUMNS[2:])},
+    planned_at = now()
+"""
+
+_ACCOUNT = FINDING_COLUMNS.index("account_id")
+_RESOURCE_TYPE = FINDING_COLUMNS.index("resource_type")
+_RESOURCE_ID = FINDING_COLUMNS.index("resource_id")
+_SEVERITY = FINDING_COLUMNS.index("severity")
+_SCORE = FINDING_COLUMNS.index("score")
+_TITLE = FINDING_COLUMNS.index("title")
+_SOURCE = FINDING_COLUMNS.index("source")
+_FINDING_ID = FINDING_COLUMNS.index("finding_id")
+_STATUS = FINDING_COLUMNS.index("status")
+
+
+def resource_key(source, finding_id, resource_id):
+    """What a task is for: the resource, or the finding itself if it has none"""
+    return resource_id or f"{source}:{finding_id}"
+
+
+def task_id(area, account_id, resource):
+    key = f"{area}\x1f{account_id or ''}\x1f{resource}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class RemediationPlan:
+    """Remediation tasks as parallel columns, plus the order to work them in.
+
+    Each task closes every finding of one focus area on one resource.
+    ``order`` lists task indexes in plan order; ``blocked_by`` names the
+    areas that must be done first in the task's account.
+    """
+
+    __slots__ = (
+        "onboarding_id",
+        "task_ids",
+        "areas",
+        "account_ids",
+        "resource_ids",
+        "resource_types",
+        "titles",
+        "severities",
+        "risks",
+        "priorities",
+        "finding_counts",
+        "blocked_by",
+        "order",
+    )
+
+    def __init__(self, onboarding_id):
+        self.onboarding_id = onboarding_id
+        for name in self.__slots__[1:]:
+            setattr(self, name, [])
+
+    @classmethod
+    def from_rows(cls, onboarding_id, rows):
+        """A stored plan, from rows in PLAN_COLUMNS order less onboarding_id"""
+        plan = cls(onboarding_id)
+        for row in rows:
+            plan.task_ids.append(row[0])
+            plan.areas.append(row[1])
+            plan.account_ids.append(row[3])
+            plan.resource_ids.append(row[4])
+            plan.resource_types.append(row[5])
+            plan.titles.append(row[6])
+            plan.severities.append(row[7])
+            plan.risks.append(row[8])
+            plan.priorities.append(row[9])
+            plan.finding_counts.append(row[10])
+            plan.blocked_by.append(row[11].split(",") if row[11] else [])
+        plan.order = list(range(len(plan)))
+        return plan
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def take(self, indexes):
+        """A new, unordered plan of the tasks at ``indexes``"""
+        plan = RemediationPlan(self.onboarding_id)
+        for name in self.__slots__[1:-1]:
+            column = getattr(self, name)
+            setattr(plan, name, [column[i] for i in indexes])
+        return plan
+
+    def extend(self, other):
+        """Append the tasks of ``other``; ``order`` is left to the caller"""
+        for name in self.__slots__[1:-1]:
+            getattr(self, name).extend(getattr(other, name))
+
+    def sort_key(self, i):
+        """Plan order: priority, then stage, then risk, then task id"""
+        return (
+            -self.priorities[i],
+            STAGES[self.areas[i]],
+            -self.risks[i],
+            self.task_ids[i],
+        )
+
+    def rows(self, only=None):
+        """Plan rows in PLAN_COLUMNS order, in plan order.
+
+        Args:
+            only: Optional set of task indexes to limit the rows to.
+        """
+        for i in self.order:
+            if only is not None and i not in only:
+                continue
+            yield (
+                self.onboarding_id,
+                self.task_ids[i],
+                self.areas[i],
+                STAGES[self.areas[i]],
+                self.account_ids[i],
+                self.resource_ids[i],
+                self.resource_types[i],
+                self.titles[i],
+                self.severities[i],
+                round(self.risks[i], 4),
+                round(self.priorities[i], 4),
+                self.finding_counts[i],
+                ",".join(self.blocked_by[i]),
+            )
+
+    def preview(self, limit=PLAN_PREVIEW):
+        """The first ``limit`` tasks as JSON-ready dicts"""
+        return [
+            {
+                "position": position,
+                "taskId": self.task_ids[i],
+                "area": self.areas[i],
+                "accountId": self.account_ids[i],
+                "resourceId": self.resource_ids[i],
+                "title": self.titles[i],
+                "severity": self.severities[i],
+                "risk": round(self.risks[i], 4),
+                "priority": round(self.priorities[i], 4),
+                "findings": self.finding_counts[i],
+                "blockedBy": list(self.blocked_by[i]),
+            }
+            for position, i in enumerate(self.order[:limit], 1)
+        ]
+
+
+def finding_risks(findings, focus_areas):
+    """Area and risk of every finding, computed a column at a time.
+
+    Classification is resolved once per distinct (resource type, title), so
+    the per-finding work is lookups and one multiply. Risk is the 0-100
+    score scaled to 0-1, weighted up for exposed resources and for the
+    onboarding's focus areas.
+    """
+    columns = findings.columns
+    kinds = columns[_RESOURCE_TYPE]
+    titles = columns[_TITLE]
+    classes = {key: classify(*key) for key in set(zip(kinds, titles))}
+    focus = set(focus_areas or ())
+    weights = {
+        (area, exposed): (EXPOSURE_WEIGHT if exposed else 1.0)
+        * (FOCUS_WEIGHT if area in focus else 1.0)
+        / 100.0
+        for area in FOCUS_AREAS
+        for exposed in (False, True)
+    }
+    finding_classes = [classes[key] for key in zip(kinds, titles)]
+    risks = [
+        (score or 0.0) * weights[cls]
+        for score, cls in zip(columns[_SCORE], finding_classes)
+    ]
+    return [cls[0] for cls in finding_classes], risks
+
+
+def group_tasks(findings, areas, risks, onboarding_id):
+    """Fold findings into one task per (area, account, resource)"""
+    plan = RemediationPlan(onboarding_id)
+    columns = findings.columns
+    index = {}
+    best = []
+    for i, (area, account_id, resource_id, risk) in enumerate(
+        zip(areas, columns[_ACCOUNT], columns[_RESOURCE_ID], risks)
+    ):
+        resource = resource_key(
+            columns[_SOURCE][i], columns[_FINDING_ID][i], resource_id
+        )
+        key = (area, account_id, resource)
+        task = index.get(key)
+        if task is None:
+            task = index[key] = len(best)
+            best.append(i)
+            plan.task_ids.append(task_id(area, account_id, resource))
+            plan.areas.append(area)
+            plan.account_ids.append(account_id)
+            plan.resource_ids.append(resource_id)
+            plan.risks.append(risk)
+            plan.finding_counts.append(1)
+            continue
+        plan.finding_counts[task] += 1
+        if risk > plan.risks[task]:
+            plan.risks[task] = risk
+            best[task] = i
+    plan.resource_types = [columns[_RESOURCE_TYPE][i] for i in best]
+    plan.titles = [columns[_TITLE][i] for i in best]
+    plan.severities = [columns[_SEVERITY][i] for i in best]
+    plan.blocked_by = [[] for _ in best]
+    # Rounded as stored, so a replan from stored tasks matches a full rebuild
+    plan.risks = [
+        round(risk * (1.0 + COUNT_WEIGHT * math.log2(count)), 4)
+        for risk, count in zip(plan.risks, plan.finding_counts)
+    ]
+    plan.priorities = list(plan.risks)
+    return plan
+
+
+def dependency_graph(plan):
+    """Successor lists over tasks plus one gate node per (account, area).
+
+    A gate follows every task of its area in its account and precedes every
+    task that has that area as a prerequisite there, so the graph stays
+    linear in the number of tasks however many depend on each other.
+
+    Returns:
+        ``(successors, in_degree)`` for ``len(plan)`` tasks followed by the
+        gate nodes.
+    """
+    tasks = len(plan)
+    groups = {}
+    for i, key in enumerate(zip(plan.account_ids, plan.areas)):
+        groups.setdefault(key, []).append(i)
+    successors = [[] for _ in range(tasks)]
+    in_degree = [0] * tasks
+    gates = {}
+    for (account_id, area), members in groups.items():
+        for prerequisite in PREREQUISITES.get(area, ()):
+            blockers = groups.get((account_id, prerequisite))
+            if not blockers:
+                continue
+            gate = gates.get((account_id, prerequisite))
+            if gate is None:
+                gate = gates[(account_id, prerequisite)] = len(successors)
+                successors.append([])
+                in_degree.append(len(blockers))
+                for blocker in blockers:
+                    successors[blocker].append(gate)
+            successors[gate].extend(members)
+            for member in members:
+                in_degree[member] += 1
+                plan.blocked_by[member].append(prerequisite)
+    return successors, in_degree
+
+
+def prioritise(plan, successors, in_degree):
+    """Set each task's priority: the highest risk it or anything after it has.
+
+    Prerequisites of a critical task so move up with it. Priorities are
+    propagated back along a topological order of the graph.
+
+    Raises:
+        ValueError: If the dependencies contain a cycle.
+    """
+    tasks = len(plan)
+    remaining = list(in_degree)
+    ready = deque(node for node, degree in enumerate(remaining) if not degree)
+    topological = []
+    while ready:
+        node = ready.popleft()
+        topological.append(node)
+        for successor in successors[node]:
+            remaining[successor] -= 1
+            if not remaining[successor]:
+                ready.append(successor)
+    if len(topological) != len(successors):
+        raise ValueError("Remediation dependencies contain a cycle")
+
+    priority = plan.risks + [0.0] * (len(successors) - tasks)
+    for node in reversed(topological):
+        for successor in successors[node]:
+            if priority[successor] > priority[node]:
+                priority[node] = priority[successor]
+    plan.priorities = priority[:tasks]
+    return plan
+
+
+def schedule(plan, successors, in_degree):
+    """Order tasks highest priority first, prerequisites before dependents.
+
+    Tasks are taken from a heap of those whose prerequisites are all
+    scheduled, lowest RemediationPlan.sort_key first. A prerequisite's
+    priority is at least that of the tasks it blocks, and on a tie its lower
+    stage puts it first, so the lowest key left is always ready: the order
+    is the one a plain sort by key would give, and the order of any two
+    tasks depends only on their own keys, which is what lets replan()
+    re-sort just the tasks whose keys changed.
+    """
+    prioritise(plan, successors, in_degree)
+    tasks = len(plan)
+    remaining = list(in_degree)
+    ready = []
+    # Nodes past the tasks only link prerequisites to dependents, so they
+    # are released as soon as they are ready rather than queued
+    released = [node for node, degree in enumerate(remaining) if not degree]
+    order = []
+    while released or ready:
+        if released:
+            node = released.pop()
+            if node < tasks:
+                heapq.heappush(ready, (plan.sort_key(node), node))
+                continue
+        else:
+            node = heapq.heappop(ready)[1]
+            order.append(node)
+        for successor in successors[node]:
+            remaining[successor] -= 1
+            if not remaining[successor]:
+                released.append(successor)
+    plan.order = order
+    return plan
+
+
+def plan_remediation(findings, focus_areas, onboarding_id=None):
+    """Build the remediation plan for a FindingBatch of findings"""
+    findings.normalise()
+    areas, risks = finding_risks(findings, focus_areas)
+    plan = group_tasks(findings, areas, risks, onboarding_id)
+    return schedule(plan, *dependency_graph(plan))
+
+
+class PlanDiff:
+    """Tasks added, changed, moved and removed between two plans.
+
+    ``added`` holds ``(index, position)`` and ``changed``/``moved`` hold
+    ``(index, position, previous_position)`` of tasks in the new plan;
+    ``removed`` holds ``(task_id, previous_position)`` of the old one.
+    Changed tasks had their risk, priority, findings or blockers change;
+    moved ones only their position.
+    """
+
+    __slots__ = ("added", "changed", "moved", "removed")
+
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.moved = []
+        self.removed = []
+
+    def written(self):
+        """Indexes of the new plan's tasks whose stored row is out of date"""
+        return {entry[0] for entry in self.added + self.changed}
+
+    def summary(self, plan, limit=PLAN_PREVIEW):
+        """Counts, plus the first ``limit`` added/changed/removed tasks"""
+        entries = [
+            {"taskId": plan.task_ids[i], "change": "added", "position": position}
+            for i, position in self.added
+        ] + [
+            {
+                "taskId": plan.task_ids[i],
+                "change": "changed",
+                "position": position,
+                "previousPosition": previous_position,
+            }
+            for i, position, previous_position in self.changed
+        ]
+        entries.sort(key=lambda entry: entry["position"])
+        entries += [
+            {"taskId": task, "change": "removed", "previousPosition": position}
+            for task, position in self.removed
+        ]
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "moved": len(self.moved),
+            "removed": len(self.removed),
+            "tasks": entries[:limit],
+        }
+
+
+def _details(plan, i):
+    """What a task's stored row holds besides its identity"""
+    return (
+        plan.risks[i],
+        plan.priorities[i],
+        plan.finding_counts[i],
+        plan.severities[i],
+        plan.titles[i],
+        plan.blocked_by[i],
+    )
+
+
+def plan_diff(previous, plan):
+    """The PlanDiff that turns ``previous`` into ``plan``"""
+    before = {
+        previous.task_ids[i]: (position, i)
+        for position, i in enumerate(previous.order, 1)
+    }
+    diff = PlanDiff()
+    for position, i in enumerate(plan.order, 1):
+        seen = before.pop(plan.task_ids[i], None)
+        if seen is None:
+            diff.added.append((i, position))
+        elif _details(plan, i) != _details(previous, seen[1]):
+            diff.changed.append((i, position, seen[0]))
+        elif position != seen[0]:
+            diff.moved.append((i, position, seen[0]))
+    diff.removed = [(task, position) for task, (position, _) in before.items()]
+    return diff
+
+
+def replan(previous, findings, touched, focus_areas):
+    """Update a plan for the findings on a few resources having changed.
+
+    The tasks of the touched resources are rebuilt from their findings and
+    priorities are recomputed only in the accounts those tasks are in, as
+    dependencies never cross accounts. Tasks whose sort key is unchanged
+    keep their stored order and the rest are inserted into it, which gives
+    the plan a full rebuild would. The diff is worked out along the way,
+    comparing only the tasks that were rebuilt or reprioritised.
+
+    Args:
+        previous: The stored RemediationPlan.
+        findings: FindingBatch of every open finding on the touched resources.
+        touched: Set of ``(account_id, resource_key)`` with changed findings.
+        focus_areas: The focus areas ``previous`` was planned with.
+
+    Returns:
+        ``(plan, diff)``: the new RemediationPlan and its PlanDiff against
+        ``previous``, as plan_diff() would give it.
+    """
+    findings.normalise()
+    stale = {
+        task_id(area, account_id, resource)
+        for account_id, resource in touched
+        for area in FOCUS_AREAS
+    }
+    areas, risks = finding_risks(findings, focus_areas)
+    fresh = group_tasks(findings, areas, risks, previous.onboarding_id)
+
+    replaced = {}
+    keep, positions = [], []
+    for position, i in enumerate(previous.order, 1):
+        task = previous.task_ids[i]
+        if task in stale:
+            replaced[task] = (position, i)
+        else:
+            keep.append(i)
+            positions.append(position)
+    accounts = set(fresh.account_ids)
+    accounts.update(previous.account_ids[i] for _, i in replaced.values())
+    plan = previous.take(keep)
+    kept = len(plan)
+    plan.extend(fresh)
+
+    members = [
+        i for i, account_id in enumerate(plan.account_ids) if account_id in accounts
+    ]
+    affected = plan.take(members)
+    affected.blocked_by = [[] for _ in members]
+    prioritise(affected, *dependency_graph(affected))
+    rekeyed = set(range(kept, len(plan)))
+    changed = set()
+    for i, priority, blocked_by in zip(
+        members, affected.priorities, affected.blocked_by
+    ):
+        if priority != plan.priorities[i]:
+            plan.priorities[i] = priority
+            rekeyed.add(i)
+            changed.add(i)
+        elif blocked_by != plan.blocked_by[i]:
+            changed.add(i)
+        plan.blocked_by[i] = blocked_by
+
+    # Kept tasks with unchanged keys are still in order
+    order = [i for i in range(kept) if i not in rekeyed]
+    for i in rekeyed:
+        order.insert(bisect.bisect(order, plan.sort_key(i), key=plan.sort_key), i)
+    plan.order = order
+
+    diff = PlanDiff()
+    for position, i in enumerate(order, 1):
+        if i >= kept:
+            seen = replaced.pop(plan.task_ids[i], None)
+            if seen is None:
+                diff.added.append((i, position))
+            elif _details(plan, i) != _details(previous, seen[1]):
+                diff.changed.append((i, position, seen[0]))
+            elif position != seen[0]:
+                diff.moved.append((i, position, seen[0]))
+        elif i in changed:
+            diff.changed.append((i, position, positions[i]))
+        elif position != positions[i]:
+            diff.moved.append((i, position, positions[i]))
+    diff.removed = [(task, position) for task, (position, _) in replaced.items()]
+    return plan, diff
+
+
+def load_findings(onboarding_id, connection_factory=aurora.get_connection):
+    """Open findings of an onboarding from Aurora, as one FindingBatch.
+
+    Rows are streamed through a server-side cursor rather than fetched in
+    one result set.
+    """
+    connection = connection_factory()
+    # Before any import has run there is nothing to plan, not an error
+    aurora.ensure_schema(connection, FINDINGS_DDL, FINDINGS_TABLES)
+    batch = FindingBatch()
+    try:
+        with connection.cursor(name="remediation_findings") as cursor:
+            cursor.itersize = READ_BATCH_SIZE
+            cursor.execute(_FINDINGS_SQL, (onboarding_id, list(CLOSED_STATUSES)))
+            for row in cursor:
+                batch.append(*row)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    # Stored findings were normalised on the way in
+    batch.normalised = True
+    return batch
+
+
+def load_changed_findings(
+    onboarding_id, since, connection_factory=aurora.get_connection
+):
+    """Open findings on every resource with a finding changed after ``since``.
+
+    Returns:
+        ``(findings, touched)``: a FindingBatch of the open findings and the
+        set of ``(account_id, resource_key)`` that had changes.
+    """
+    connection = connection_factory()
+    aurora.ensure_schema(connection, FINDINGS_DDL, FINDINGS_TABLES)
+    batch = FindingBatch()
+    touched = set()
+    try:
+        with connection.cursor(name="remediation_changed_findings") as cursor:
+            cursor.itersize = READ_BATCH_SIZE
+            cursor.execute(
+                _CHANGED_FINDINGS_SQL, {"onboarding_id": onboarding_id, "since": since}
+            )
+            for row in cursor:
+                touched.add(
+                    (
+                        row[_ACCOUNT],
+                        resource_key(row[_SOURCE], row[_FINDING_ID], row[_RESOURCE_ID]),
+                    )
+                )
+                if (row[_STATUS] or "").lower() not in CLOSED_STATUSES:
+                    batch.append(*row)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    batch.normalised = True
+    return batch, touched
+
+
+def load_plan(onboarding_id, connection_factory=aurora.get_connection):
+    """The onboarding's stored RemediationPlan, in plan order"""
+    connection = connection_factory()
+    try:
+        with connection.cursor(name="remediation_plan") as cursor:
+            cursor.itersize = READ_BATCH_SIZE
+            cursor.execute(_PLAN_SQL, (onboarding_id,))
+            plan = RemediationPlan.from_rows(onboarding_id, cursor)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return plan
+
+
+def save_plan(plan, connection_factory=aurora.get_connection, diff=None):
+    """Store ``plan`` for its onboarding in one transaction.
+
+    Without a ``diff`` the stored plan is replaced; with one, removed tasks
+    are deleted and only the tasks the diff names are upserted.
+    """
+    connection = connection_factory()
+    aurora.ensure_schema(connection, PLAN_DDL, PLAN_TABLES)
+    try:
+        with connection.cursor() as cursor:
+            if diff is None:
+                cursor.execute(
+                    "DELETE FROM remediation_tasks WHERE onboarding_id = %s",
+                    (plan.onboarding_id,),
+                )
+                cursor.copy_expert(_COPY_PLAN_SQL, CsvCopyStream(plan.rows()))
+            else:
+                if diff.removed:
+                    cursor.execute(
+                        "DELETE FROM remediation_tasks "
+                        "WHERE onboarding_id = %s AND task_id = ANY(%s)",
+                        (plan.onboarding_id, [task for task, _ in diff.removed]),
+                    )
+                cursor.execute(_STAGE_PLAN_SQL)
+                cursor.copy_expert(
+                    _COPY_PLAN_STAGE_SQL,
+                    CsvCopyStream(plan.rows(only=diff.written())),
+                )
+                cursor.execute(_UPSERT_PLAN_SQL)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+
+def plan_state_id(onboarding_id):
+    return f"remediation_plan#{onboarding_id}"
+
+
+def onboarding_focus_areas(onboarding_id):
+    from lambdas.onboarding import get_table
+
+    item = get_table().get_item(
+        Key={"onboardingId": onboarding_id}, ProjectionExpression="focusAreas"
+    )
+    return (item.get("Item") or {}).get("focusAreas") or []
+
+
 def remediation_planning_logic(event, context):
     """
     Logic for remediation planning.
+
+    The onboarding's open findings are read from Aurora and folded into one
+    task per focus area and resource, each scored by severity, exposure and
+    the onboarding's focus areas. Priorities are propagated over the tasks'
+    dependency graph, so prerequisites (IAM before data, network before
+    vulnerabilities, ...) come first, and the plan is stored in the
+    remediation_tasks table.
+
+    Once a plan exists, later runs with the same focus areas only replan
+    the resources whose findings changed since (see replan()); pass
+    ``"fullRebuild": true`` to plan from every finding again. Either way
+    the response carries a diff against the previous plan.
     """
-    raise NotImplementedError("Remediation planning logic not implemented yet.")
+    onboarding_id = event.get("onboardingId")
+    if not onboarding_id:
+        return {"statusCode": 400, "error": "onboardingId is required"}
+    focus_areas = event.get("focusAreas")
+    if focus_areas is None:
+        focus_areas = onboarding_focus_areas(onboarding_id)
+    unknown = set(focus_areas) - set(FOCUS_AREAS)
+    if unknown:
+        return {"statusCode": 400, "error": f"Unknown focusAreas: {sorted(unknown)}"}
+
+    state = context_store.load(plan_state_id(onboarding_id))
+    incremental = (
+        bool(state)
+        and not event.get("fullRebuild")
+        and state["focusAreas"] == sorted(focus_areas)
+    )
+    # Taken before reading, as for import watermarks, so changes written
+    # while this run is in flight are picked up by the next one
+    planned_at = watermarks.high_water_mark()
+    previous = load_plan(onboarding_id) if state else RemediationPlan(onboarding_id)
+    if incremental:
+        findings, touched = load_changed_findings(onboarding_id, state["plannedAt"])
+        started = time.perf_counter()
+        plan, diff = replan(previous, findings, touched, focus_areas)
+    else:
+        findings = load_findings(onboarding_id)
+        started = time.perf_counter()
+        plan = plan_remediation(findings, focus_areas, onboarding_id)
+        diff = plan_diff(previous, plan)
+    elapsed = time.perf_counter() - started
+    save_plan(plan, diff=diff if incremental else None)
+    context_store.save(
+        plan_state_id(onboarding_id),
+        {"plannedAt": planned_at, "focusAreas": sorted(focus_areas)},
+    )
+
+    areas = {}
+    for area in plan.areas:
+        areas[area] = areas.get(area, 0) + 1
+    return {
+        "statusCode": 200,
+        "onboardingId": onboarding_id,
+        "focusAreas": list(focus_areas),
+        "mode": "incremental" if incremental else "full",
+        "findings": len(findings),
+        "tasks": len(plan),
+        "tasksByArea": areas,
+        "planSeconds": round(elapsed, 3),
+        "plan": plan.preview(),
+        "diff": diff.summary(plan),
+    }
@@ -37,6 +37,9 @@ resource "aws_ssm_parameter" "db_endpoint" {
   }
 }
 
+# Schema is created by the Lambdas on first write, not by Terraform: the
+# findings table and its finding_fingerprints index table (cross-source
+# dedup and change-only upserts) are defined in lambdas/findings.py
 resource "aws_rds_cluster" "aurora" {
   cluster_identifier      = "${var.project_name}-aurora-cluster"
   engine                  = "aurora-postgresql"
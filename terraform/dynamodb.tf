@@ -12,3 +12,49 @@ resource "aws_dynamodb_table" "mna_context" {
     Project = var.project_name
   }
 }
+
+resource "aws_dynamodb_table" "onboarding" {
+  name         = "${var.project_name}-onboarding"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "onboardingId"
+
+  attribute {
+    name = "onboardingId"
+    type = "S"
+  }
+
+  attribute {
+    name = "status"
+    type = "S"
+  }
+
+  attribute {
+    name = "userId"
+    type = "S"
+  }
+
+  attribute {
+    name = "updatedAt"
+    type = "S"
+  }
+
+  # GET /onboarding?status=... reads newest-first from this index
+  global_secondary_index {
+    name            = "status-updatedAt-index"
+    hash_key        = "status"
+    range_key       = "updatedAt"
+    projection_type = "ALL"
+  }
+
+  # GET /onboarding?userId=... reads newest-first from this index
+  global_secondary_index {
+    name            = "userId-updatedAt-index"
+    hash_key        = "userId"
+    range_key       = "updatedAt"
+    projection_type = "ALL"
+  }
+
+  tags = {
+    Project = var.project_name
+  }
+}
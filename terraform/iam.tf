@@ -47,6 +47,32 @@ resource "aws_iam_policy" "lambda_custom_policy" {
           "${aws_s3_bucket.frontend_bucket.arn}/*"
         ]
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:PutObject",
+          "s3:GetObject",
+          "s3:AbortMultipartUpload",
+          "s3:ListMultipartUploadParts"
+        ]
+        Resource = "${aws_s3_bucket.exports_bucket.arn}/*"
+      },
+      {
+        Effect   = "Allow"
+        Action   = ["s3:GetObject"]
+        Resource = "${aws_s3_bucket.crawls_bucket.arn}/*"
+      },
+      # import_aws reads Security Hub only through the customer's roles,
+      # always passing the onboarding's externalId
+      {
+        Effect   = "Allow"
+        Action   = ["sts:AssumeRole"]
+        Resource = "arn:aws:iam::*:role/*"
+        Condition = {
+          Null = { "sts:ExternalId" = "false" }
+        }
+      },
+      # Integration credentials, stored as mna/<onboardingId>/<source>
       {
         Effect = "Allow"
         Action = [
@@ -54,7 +80,14 @@ resource "aws_iam_policy" "lambda_custom_policy" {
           "secretsmanager:CreateSecret",
           "secretsmanager:PutSecretValue"
         ]
-        Resource = "*"
+        Resource = "arn:aws:secretsmanager:${var.aws_region}:${data.aws_caller_identity.current.account_id}:secret:mna/*"
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = "arn:aws:lambda:*:*:function:${var.project_name}-*"
       },
       {
         Effect = "Allow"
@@ -64,9 +97,15 @@ resource "aws_iam_policy" "lambda_custom_policy" {
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
           "dynamodb:Query",
-          "dynamodb:Scan"
+          "dynamodb:Scan",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:BatchGetItem"
+        ]
+        Resource = [
+          aws_dynamodb_table.mna_context.arn,
+          aws_dynamodb_table.onboarding.arn,
+          "${aws_dynamodb_table.onboarding.arn}/index/*"
         ]
-        Resource = aws_dynamodb_table.mna_context.arn
       }
     ]
   })
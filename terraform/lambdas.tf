@@ -10,7 +10,9 @@ locals {
     import_coralogix     = "handlers.import_coralogix_handler"
     remediation_planning = "handlers.remediation_planning_handler"
     reporting            = "handlers.reporting_handler"
-    frontend_proxy       = "handlers.frontend_proxy_handler" # Assuming you added this to handlers.py
+    assessment           = "handlers.assessment_handler"
+    frontend_proxy       = "handlers.frontend_proxy_handler"
+    onboarding_export    = "handlers.onboarding_export_handler"
   }
 }
 
@@ -39,15 +41,26 @@ resource "aws_lambda_function" "functions" {
   environment {
     variables = {
       FRONTEND_BUCKET = aws_s3_bucket.frontend_bucket.id
+      EXPORT_BUCKET   = aws_s3_bucket.exports_bucket.id
+      CRAWL_BUCKET    = aws_s3_bucket.crawls_bucket.id
       DB_HOST         = aws_rds_cluster.aurora.endpoint
       DB_NAME         = aws_rds_cluster.aurora.database_name
       DB_USER         = var.db_username
       DB_PASSWORD     = random_password.db_password.result
       MNA_CONTEXT_TABLE = aws_dynamodb_table.mna_context.name
+      DYNAMODB_TABLE    = aws_dynamodb_table.onboarding.name
+      # Per-container cache of GET /onboarding/{id}, refreshed by the writes
+      ONBOARDING_CACHE_TTL_SECONDS = 5
+      # submit_onboarding starts the assessment, which runs each step as
+      # its own function
+      ASSESSMENT_FUNCTION        = "${var.project_name}-assessment"
+      ASSESSMENT_EXECUTOR        = "lambda"
+      ASSESSMENT_FUNCTION_PREFIX = "${var.project_name}-"
     }
   }
 
-  timeout = 60
+  # The assessment waits on its importers, each with up to a minute per invocation
+  timeout = each.key == "assessment" ? 900 : 60
 
   tags = {
     Project = var.project_name
@@ -13,4 +13,38 @@ resource "aws_s3_bucket_versioning" "frontend_versioning" {
   }
 }
 
+# Onboarding exports (gzip NDJSON written by the onboarding_export function)
+resource "aws_s3_bucket" "exports_bucket" {
+  bucket = "${var.project_name}-exports-${data.aws_caller_identity.current.account_id}"
+
+  tags = {
+    Project = var.project_name
+  }
+}
+
+resource "aws_s3_bucket_lifecycle_configuration" "exports_lifecycle" {
+  bucket = aws_s3_bucket.exports_bucket.id
+
+  rule {
+    id     = "abort-incomplete-multipart-uploads"
+    status = "Enabled"
+
+    filter {}
+
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 7
+    }
+  }
+}
+
+# Katana crawl output (JSONL) read by the import_katana function. Upload
+# each crawl under crawls/<onboardingId>/; no other bucket is imported from.
+resource "aws_s3_bucket" "crawls_bucket" {
+  bucket = "${var.project_name}-crawls-${data.aws_caller_identity.current.account_id}"
+
+  tags = {
+    Project = var.project_name
+  }
+}
+
 data "aws_caller_identity" "current" {}
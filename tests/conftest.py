@@ -7,3 +7,88 @@ load_dotenv()
 
 # Ensure the project root is in sys.path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_aws_clients():
+    """Drop cached boto3 clients so each test sees its own mocks."""
+    from lambdas import aws_clients
+
+    aws_clients.reset()
+    yield
+    aws_clients.reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_onboarding_cache():
+    """Start each test without entries cached by an earlier one."""
+    from lambdas import onboarding_cache
+
+    onboarding_cache.reset()
+    yield
+    onboarding_cache.reset()
+
+
+@pytest.fixture
+def aws_credentials(monkeypatch):
+    """Fake credentials so moto-backed tests never reach real AWS."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_SECURITY_TOKEN", "testing")
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+
+
+@pytest.fixture
+def mock_onboarding_table(aws_credentials, monkeypatch):
+    """Moto-backed onboarding table with the GSIs from terraform/dynamodb.tf."""
+    import boto3
+    from moto import mock_aws
+
+    monkeypatch.setenv("DYNAMODB_TABLE", "test-onboarding")
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb")
+        table = dynamodb.create_table(
+            TableName="test-onboarding",
+            KeySchema=[{"AttributeName": "onboardingId", "KeyType": "HASH"}],
+            AttributeDefinitions=[
+                {"AttributeName": "onboardingId", "AttributeType": "S"},
+                {"AttributeName": "status", "AttributeType": "S"},
+                {"AttributeName": "userId", "AttributeType": "S"},
+                {"AttributeName": "updatedAt", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": index_name,
+                    "KeySchema": [
+                        {"AttributeName": hash_key, "KeyType": "HASH"},
+                        {"AttributeName": "updatedAt", "KeyType": "RANGE"},
+                    ],
+                    "Projection": {"ProjectionType": "ALL"},
+                }
+                for index_name, hash_key in (
+                    ("status-updatedAt-index", "status"),
+                    ("userId-updatedAt-index", "userId"),
+                )
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield table
+
+
+@pytest.fixture
+def mock_context_table(aws_credentials, monkeypatch):
+    """Moto-backed mna-context table (job state, checkpoints, watermarks)."""
+    import boto3
+    from moto import mock_aws
+
+    monkeypatch.setenv("MNA_CONTEXT_TABLE", "test-mna-context")
+    with mock_aws():
+        yield boto3.resource("dynamodb").create_table(
+            TableName="test-mna-context",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
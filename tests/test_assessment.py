@@ -0,0 +1,326 @@
+import io
+import json
+import threading
+import time
+
+import pytest
+from botocore.stub import Stubber
+
+import handlers
+from lambdas import assessment, aws_clients, onboarding
+from lambdas.assessment import LambdaExecutor, plan_assessment, run_assessment
+
+ITEM = {
+    "onboardingId": "ob-1",
+    "status": "submitted",
+    "cloudProviders": ["AWS", "azure"],
+    "focusAreas": ["iam", "logging", "not-an-area"],
+    "externalId": "ext-1",
+    "integrations": {
+        "aws": {"accounts": [{"roleArn": "arn:aws:iam::111111111111:role/cmmx"}]},
+        "wiz": {"secretId": "mna/ob-1/wiz", "timeoutSeconds": 30},
+        "coralogix": {"secretId": "mna/ob-1/coralogix"},
+    },
+}
+
+
+class FakeExecutor:
+    """Runs steps by returning canned results, recording when each ran"""
+
+    def __init__(self, results=None, delay=0.05):
+        self.results = results or {}
+        self.delay = delay
+        self.runs = []
+        self.running = 0
+        self.most_running = 0
+        self.lock = threading.Lock()
+
+    def run(self, step, context):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        started = time.monotonic()
+        time.sleep(self.delay)
+        with self.lock:
+            self.running -= 1
+            self.runs.append((step.name, started, time.monotonic()))
+        result = self.results.get(step.name, {"statusCode": 200})
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def names(self):
+        return [name for name, _, _ in self.runs]
+
+
+def stored(onboarding_id="ob-1"):
+    return assessment.load_progress(onboarding_id)
+
+
+def test_plan_picks_importers_from_providers_and_focus_areas():
+    steps, skipped = plan_assessment(ITEM)
+
+    assert [step.name for step in steps] == [
+        "import_aws",
+        "import_wiz",
+        "import_coralogix",
+        "remediation_planning",
+        "reporting",
+    ]
+    assert skipped == {
+        "import_azure": "integrations.azure needs secretId, subscriptions"
+    }
+    wiz = steps[1]
+    assert wiz.event == {"secretId": "mna/ob-1/wiz", "onboardingId": "ob-1"}
+    assert wiz.timeout == 30
+    assert steps[0].event["accounts"] == [
+        {
+            "accountId": "111111111111",
+            "roleArn": "arn:aws:iam::111111111111:role/cmmx",
+            "externalId": "ext-1",
+        }
+    ]
+    planning = steps[3]
+    assert planning.event == {"onboardingId": "ob-1", "focusAreas": ["iam", "logging"]}
+    assert planning.after == ("import_aws", "import_wiz", "import_coralogix")
+
+
+@pytest.mark.parametrize(
+    "aws, reason",
+    [
+        (None, "integrations.aws needs accounts"),
+        (
+            {"accounts": [{"accountId": "111"}]},
+            "integrations.aws needs roleArn for every accounts entry",
+        ),
+        (
+            {"accounts": [{"roleArn": "arn:role/cmmx"}]},
+            "integrations.aws needs an IAM role ARN, not arn:role/cmmx",
+        ),
+    ],
+)
+def test_aws_is_skipped_without_a_role_for_every_account(aws, reason):
+    item = dict(ITEM, cloudProviders=["aws"], focusAreas=[], integrations={})
+    if aws is not None:
+        item["integrations"] = {"aws": aws}
+
+    steps, skipped = plan_assessment(item)
+
+    assert [step.name for step in steps] == ["remediation_planning", "reporting"]
+    assert skipped["import_aws"] == reason
+
+
+def test_privileged_settings_must_belong_to_the_onboarding(monkeypatch):
+    monkeypatch.setattr(assessment, "CRAWL_BUCKET", "cmmx-crawls")
+    item = dict(
+        ITEM,
+        cloudProviders=["aws"],
+        focusAreas=["network"],
+        integrations={
+            # A client-supplied externalId is replaced by the onboarding's
+            "aws": {
+                "accounts": [
+                    {
+                        "roleArn": "arn:aws:iam::111111111111:role/cmmx",
+                        "externalId": "guess",
+                    }
+                ]
+            },
+            "wiz": {"secretId": "mna/ob-2/wiz"},
+            "katana": {"bucket": "other", "key": "crawls/ob-1/site.jsonl"},
+        },
+    )
+
+    steps, skipped = plan_assessment(item)
+
+    assert skipped["import_wiz"] == "integrations.wiz needs secretId mna/ob-1/wiz"
+    events = {step.name: step.event for step in steps}
+    assert events["import_aws"]["accounts"][0]["externalId"] == "ext-1"
+    assert events["import_katana"] == {
+        "bucket": "cmmx-crawls",
+        "key": "crawls/ob-1/site.jsonl",
+        "onboardingId": "ob-1",
+    }
+
+    item["integrations"]["katana"]["key"] = "crawls/ob-2/site.jsonl"
+    del item["externalId"]
+    _, skipped = plan_assessment(item)
+    assert skipped["import_katana"] == (
+        "integrations.katana needs a key under crawls/ob-1/"
+    )
+    assert skipped["import_aws"] == (
+        "integrations.aws needs an externalId issued by the onboarding"
+    )
+
+
+def test_imports_run_concurrently_then_planning_and_reporting(
+    mock_context_table, monkeypatch
+):
+    monkeypatch.setattr(assessment, "MAX_WORKERS", 2)
+    executor = FakeExecutor()
+
+    state = run_assessment(ITEM, executor)
+
+    runs = {name: (started, ended) for name, started, ended in executor.runs}
+    last_import = max(runs[name][1] for name in runs if name.startswith("import_"))
+    assert executor.most_running == 2
+    assert runs["remediation_planning"][0] >= last_import
+    assert runs["reporting"][0] >= last_import
+    assert state["status"] == "succeeded"
+    assert stored() == state
+    assert stored()["steps"]["import_azure"]["status"] == "skipped"
+    assert stored()["steps"]["reporting"]["result"] == {"statusCode": 200}
+
+
+def test_failures_and_timeouts_do_not_block_downstream_steps(mock_context_table):
+    item = dict(
+        ITEM,
+        integrations={
+            "aws": ITEM["integrations"]["aws"],
+            "wiz": {"secretId": "mna/ob-1/wiz", "timeoutSeconds": 0.1},
+        },
+    )
+    executor = FakeExecutor(
+        {"import_aws": RuntimeError("Security Hub unavailable")}, delay=0.3
+    )
+
+    state = run_assessment(item, executor)
+
+    steps = state["steps"]
+    assert steps["import_aws"]["status"] == "failed"
+    assert steps["import_aws"]["error"] == "Security Hub unavailable"
+    assert steps["import_wiz"]["status"] == "timed_out"
+    assert steps["remediation_planning"]["status"] == "succeeded"
+    assert steps["reporting"]["status"] == "succeeded"
+    assert state["status"] == "failed"
+
+
+def test_resume_reruns_unfinished_steps_and_what_depends_on_them(mock_context_table):
+    run_assessment(ITEM, FakeExecutor({"import_wiz": {"statusCode": 500}}))
+    assert stored()["steps"]["import_wiz"]["status"] == "failed"
+
+    executor = FakeExecutor()
+    state = run_assessment(ITEM, executor)
+
+    assert sorted(executor.names()) == [
+        "import_wiz",
+        "remediation_planning",
+        "reporting",
+    ]
+    assert state["status"] == "succeeded"
+    assert len(run_assessment(ITEM, executor, restart=True)["steps"]) == 6
+
+
+def test_paused_importers_are_resumed_while_time_is_left(mock_context_table):
+    results = iter([{"status": "in_progress"}, {"status": "complete"}])
+
+    class Resumable(FakeExecutor):
+        def run(self, step, context):
+            if step.name == "import_wiz":
+                return next(results)
+            return super().run(step, context)
+
+    state = run_assessment(ITEM, Resumable())
+
+    assert state["steps"]["import_wiz"]["result"] == {"status": "complete"}
+
+
+def test_lambda_executor_invokes_the_step_function(aws_credentials):
+    executor = LambdaExecutor(prefix="cmmx-")
+    step = assessment.Step("import_aws", {"onboardingId": "ob-1"})
+    with Stubber(executor.client) as stubber:
+        stubber.add_response(
+            "invoke",
+            {"StatusCode": 200, "Payload": io.BytesIO(b'{"statusCode": 200}')},
+            {"FunctionName": "cmmx-import_aws", "Payload": '{"onboardingId": "ob-1"}'},
+        )
+        stubber.add_response(
+            "invoke",
+            {
+                "StatusCode": 200,
+                "FunctionError": "Unhandled",
+                "Payload": io.BytesIO(b'{"errorMessage": "boom"}'),
+            },
+        )
+        assert executor.run(step, None) == {"statusCode": 200}
+        with pytest.raises(RuntimeError, match="import_aws failed: boom"):
+            executor.run(step, None)
+
+
+def call(method, path, body=None):
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": None,
+        "body": json.dumps(body) if body is not None else None,
+    }
+    response = onboarding.onboarding_logic(event, {})
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_submit_starts_the_assessment_which_runs_locally(
+    mock_onboarding_table, mock_context_table, monkeypatch
+):
+    monkeypatch.setattr(assessment, "ASSESSMENT_FUNCTION", "cmmx-assessment")
+    _, created = call("POST", "/onboarding", {"userId": "user123"})
+    onboarding_id = created["onboardingId"]
+    call(
+        "PUT",
+        f"/onboarding/{onboarding_id}/step",
+        {
+            "step": 3,
+            "data": {
+                "cloudProviders": ["aws"],
+                "integrations": {
+                    "aws": {
+                        "accounts": [{"roleArn": "arn:aws:iam::111111111111:role/cmmx"}]
+                    }
+                },
+            },
+        },
+    )
+    # Re-saving step 3 from the form, which has no integrations, keeps them
+    call(
+        "PUT",
+        f"/onboarding/{onboarding_id}/step",
+        {"step": 3, "data": {"cloudProviders": ["aws"]}},
+    )
+    _, saved = call("GET", f"/onboarding/{onboarding_id}")
+    assert saved["data"]["integrations"]["aws"]["accounts"]
+    assert handlers.assessment_handler({"onboardingId": onboarding_id}, None) == {
+        "statusCode": 409,
+        "error": "Onboarding has not been submitted",
+    }
+
+    with Stubber(aws_clients.client("lambda")) as stubber:
+        stubber.add_response(
+            "invoke",
+            {"StatusCode": 202},
+            {
+                "FunctionName": "cmmx-assessment",
+                "InvocationType": "Event",
+                "Payload": json.dumps({"onboardingId": onboarding_id}),
+            },
+        )
+        status, submitted = call("POST", f"/onboarding/{onboarding_id}/submit", {})
+    assert status == 200
+    assert submitted["assessmentStarted"] is True
+
+    ran = []
+    for module, name in [
+        ("import_aws", "import_aws_logic"),
+        ("remediation_planning", "remediation_planning_logic"),
+        ("reporting", "reporting_logic"),
+    ]:
+        monkeypatch.setattr(
+            f"lambdas.{module}.{name}",
+            lambda event, context, name=name: ran.append(name) or {"statusCode": 200},
+        )
+    result = handlers.assessment_handler({"onboardingId": onboarding_id}, None)
+
+    assert result["status"] == "succeeded"
+    assert ran[0] == "import_aws_logic"
+    status, body = call("GET", f"/onboarding/{onboarding_id}/assessment")
+    assert status == 200
+    assert body["data"]["steps"]["import_aws"]["status"] == "succeeded"
+    assert call("GET", "/onboarding/other/assessment")[0] == 404
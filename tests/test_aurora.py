@@ -0,0 +1,181 @@
+from unittest.mock import MagicMock
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from lambdas import aurora
+
+
+@pytest.fixture(autouse=True)
+def fresh_connection():
+    aurora.close()
+    yield
+    aurora.close()
+
+
+@pytest.fixture
+def connect(monkeypatch):
+    """psycopg2.connect replaced by a factory of idle MagicMock connections"""
+    connections = []
+
+    def connect(**kwargs):
+        connection = MagicMock(closed=0)
+        connection.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+        connection.kwargs = kwargs
+        connections.append(connection)
+        return connection
+
+    monkeypatch.setattr(psycopg2, "connect", connect)
+    return connections
+
+
+def executed(connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    return [call.args for call in cursor.execute.call_args_list]
+
+
+def test_connection_is_opened_lazily_and_reused(connect, monkeypatch):
+    monkeypatch.setenv("AWS_LAMBDA_FUNCTION_NAME", "cmmx-reporting")
+    assert connect == []
+
+    first = aurora.get_connection()
+
+    assert aurora.get_connection() is first
+    assert len(connect) == 1
+    assert first.kwargs["application_name"] == "cmmx-reporting"
+    assert first.kwargs["keepalives"] == 1
+    # Used moments ago, so it is trusted without a round trip
+    assert executed(first) == []
+
+
+def test_idle_connection_is_pinged_and_replaced_if_dead(connect, monkeypatch):
+    first = aurora.get_connection()
+    monkeypatch.setattr(aurora, "PING_AFTER_SECONDS", 0)
+
+    assert aurora.get_connection() is first
+    assert executed(first) == [("SELECT 1",)]
+
+    cursor = first.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = psycopg2.OperationalError("server closed")
+    second = aurora.get_connection()
+
+    assert second is not first
+    first.close.assert_called_once()
+
+
+def test_connection_left_mid_transaction_is_rolled_back(connect):
+    first = aurora.get_connection()
+    first.info.transaction_status = extensions.TRANSACTION_STATUS_INERROR
+
+    assert aurora.get_connection() is first
+    first.rollback.assert_called_once()
+
+    first.info.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+    assert aurora.get_connection() is not first
+
+
+def test_statements_are_prepared_once_per_connection():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.connection = connection
+    sql = "SELECT * FROM t WHERE a = %s AND b LIKE 'x%%' AND c = ANY(%s)"
+
+    aurora.execute(cursor, sql, ("a", ["c"]))
+    aurora.execute(cursor, sql, ("b", ["d"]))
+
+    prepare, first, second = executed(connection)
+    name = prepare[0].split()[1]
+    assert prepare == (
+        f"PREPARE {name} AS SELECT * FROM t WHERE a = $1 AND b LIKE 'x%' "
+        "AND c = ANY($2)",
+    )
+    assert first == (f"EXECUTE {name} (%s, %s)", ("a", ["c"]))
+    assert second == (f"EXECUTE {name} (%s, %s)", ("b", ["d"]))
+
+    other = MagicMock()
+    other_cursor = other.cursor.return_value.__enter__.return_value
+    other_cursor.connection = other
+    aurora.execute(other_cursor, sql, ("a", ["c"]))
+    assert executed(other)[0][0].startswith("PREPARE ")
+
+
+def test_prepared_statements_are_bounded_and_can_be_turned_off(monkeypatch):
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.connection = connection
+    monkeypatch.setattr(aurora, "PREPARED_LIMIT", 2)
+    for n in range(3):
+        aurora.execute(cursor, f"SELECT {n}")
+
+    assert ("DEALLOCATE ALL",) in executed(connection)
+    assert len(aurora._prepared[connection]) == 1
+
+    monkeypatch.setattr(aurora, "PREPARED_STATEMENTS", False)
+    cursor.execute.reset_mock()
+    aurora.execute(cursor, "SELECT %s", (1,))
+    assert executed(connection) == [("SELECT %s", (1,))]
+
+
+def test_schema_ddl_runs_only_when_tables_are_missing():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [("a",)]
+
+    aurora.ensure_schema(connection, "CREATE TABLE b ()", ("a", "b"))
+    aurora.ensure_schema(connection, "CREATE TABLE b ()", ("a", "b"))
+    present = MagicMock()
+    present.cursor.return_value.__enter__.return_value.fetchall.return_value = [
+        ("a",),
+        ("b",),
+    ]
+    aurora.ensure_schema(present, "CREATE TABLE b ()", ("a", "b"))
+
+    statements = [args[0] for args in executed(connection)]
+    assert "information_schema.tables" in statements[0]
+    assert statements[1:] == ["CREATE TABLE b ()"]
+    assert len(executed(present)) == 1
+    assert connection.commit.call_count == present.commit.call_count == 1
+
+
+@pytest.fixture
+def postgres():
+    """The PostgreSQL the DB_* environment points at, e.g. ``make postgres``"""
+    try:
+        connection = aurora.get_connection()
+    except psycopg2.OperationalError as exc:
+        pytest.skip(f"no PostgreSQL to test against: {exc}")
+    return connection
+
+
+def test_warm_connection_against_postgres(postgres, monkeypatch):
+    sql = "SELECT n, n %% 2 = 0 FROM generate_series(1, %s) AS n WHERE n > %s"
+    for _ in range(2):
+        with postgres.cursor() as cursor:
+            aurora.execute(cursor, sql, (4, 2))
+            assert cursor.fetchall() == [(3, False), (4, True)]
+        postgres.commit()
+    assert len(aurora._prepared[postgres]) == 1
+
+    # A failed invocation leaves the transaction aborted
+    with postgres.cursor() as cursor:
+        with pytest.raises(psycopg2.errors.DivisionByZero):
+            cursor.execute("SELECT 1 / 0")
+    assert aurora.get_connection() is postgres
+    with postgres.cursor() as cursor:
+        aurora.execute(cursor, sql, (3, 0))
+        assert len(cursor.fetchall()) == 3
+    postgres.rollback()
+
+    # The server drops the connection while the container is frozen
+    admin = aurora._connect()
+    with admin.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(%s)", (postgres.info.backend_pid,))
+    admin.close()
+    monkeypatch.setattr(aurora, "PING_AFTER_SECONDS", 0)
+    replacement = aurora.get_connection()
+    assert replacement is not postgres
+    with replacement.cursor() as cursor:
+        aurora.execute(cursor, sql, (4, 2))
+        assert cursor.fetchall() == [(3, False), (4, True)]
+    replacement.rollback()
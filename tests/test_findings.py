@@ -0,0 +1,356 @@
+import csv
+import io
+from unittest.mock import MagicMock
+
+import pytest
+
+from lambdas.findings import (
+    FINDING_COLUMNS,
+    AuroraFindingSink,
+    CsvCopyStream,
+    FindingBatch,
+    ListFindingSink,
+    write_findings,
+)
+from lambdas.focus_areas import FOCUS_AREAS
+
+ROW = ("aws", "f-1", "ob-1", None, None, None, None, "low", None, "t", None, None)
+
+
+@pytest.fixture
+def connection():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.copied = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: cursor.copied.append(
+        buffer.read()
+    )
+    cursor.fetchone.return_value = (0,)
+    return connection
+
+
+def copied_rows(connection):
+    """Rows COPY received, without the trailing hashes and focus area"""
+    cursor = connection.cursor.return_value.__enter__.return_value
+    rows = list(csv.reader(io.StringIO("".join(cursor.copied))))
+    for row in rows:
+        assert all(value.startswith("\\x") and len(value) == 34 for value in row[-3:-1])
+        assert row[-1] in FOCUS_AREAS
+    return [row[:-3] for row in rows]
+
+
+def fingerprints(rows):
+    batch = FindingBatch.from_rows(rows).normalise()
+    return list(zip(*batch.hashes()))
+
+
+def test_aurora_sink_copies_rows_as_csv_and_upserts(connection):
+    sink = AuroraFindingSink(connection_factory=lambda: connection)
+    rows = [
+        (
+            "aws",
+            "f-1",
+            "ob-1",
+            "123",
+            "us-east-1",
+            "AwsS3Bucket",
+            "arn",
+            "HIGH",
+            70,
+            'Title, "quoted"',
+            "NEW",
+            "2026-01-01T00:00:00Z",
+        ),
+        ("aws", "f-2", "ob-1", None, None, None, None, "low", None, "t", None, None),
+    ]
+
+    sink.write(rows)
+
+    cursor = connection.cursor.return_value.__enter__.return_value
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert "information_schema.tables" in statements[0]
+    assert "CREATE TABLE IF NOT EXISTS findings" in statements[1]
+    assert "CREATE TABLE IF NOT EXISTS finding_fingerprints" in statements[1]
+    assert "ALTER TABLE" not in statements[1]
+    # The merge is prepared once per connection and then executed by name
+    merge, execute = statements[-2:]
+    assert merge.startswith("PREPARE ")
+    assert "INSERT INTO finding_fingerprints" in merge
+    assert "ON CONFLICT (onboarding_id, source, finding_id) DO UPDATE" in merge
+    assert "onboarding_id = EXCLUDED.onboarding_id" not in merge
+    assert "INSERT INTO finding_rollups" in merge
+    assert execute == f"EXECUTE {merge.split()[1]}"
+    assert cursor.copied[0].startswith(
+        'aws,f-1,ob-1,123,us-east-1,AwsS3Bucket,arn,high,70.0,"Title, ""quoted""",'
+    )
+    assert copied_rows(connection) == [
+        [
+            "aws",
+            "f-1",
+            "ob-1",
+            "123",
+            "us-east-1",
+            "AwsS3Bucket",
+            "arn",
+            "high",
+            "70.0",
+            'Title, "quoted"',
+            "NEW",
+            "2026-01-01T00:00:00Z",
+        ],
+        ["aws", "f-2", "ob-1", "", "", "", "", "low", "10.0", "t", "", ""],
+    ]
+    # The schema is set up in a transaction of its own, then the batch
+    assert connection.commit.call_count == 2
+
+
+def test_aurora_sink_creates_schema_once(connection):
+    sink = AuroraFindingSink(connection_factory=lambda: connection)
+
+    sink.write([ROW])
+    sink.write([ROW])
+
+    cursor = connection.cursor.return_value.__enter__.return_value
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert sum("CREATE TABLE IF NOT EXISTS findings" in s for s in statements) == 1
+
+
+def test_aurora_sink_rolls_back_failed_batches(connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.copy_expert.side_effect = RuntimeError("copy failed")
+    sink = AuroraFindingSink(connection_factory=lambda: connection)
+
+    with pytest.raises(RuntimeError):
+        sink.write([ROW])
+
+    connection.rollback.assert_called_once()
+    # Only the schema setup was committed
+    connection.commit.assert_called_once()
+
+
+def test_write_findings_batches_rows():
+    sink = ListFindingSink()
+
+    assert write_findings(iter([ROW] * 10), sink, batch_size=4) == 10
+    assert sink.batches == 3
+    assert sink.rows == [ROW] * 10
+
+
+def test_finding_batch_stores_columns_and_iterates_rows(connection):
+    batch = FindingBatch()
+    batch.append("azure", "f-1", "ob-1", *[None] * 9)
+    batch.append("azure", "f-2", "ob-1", *[None] * 9)
+
+    assert len(batch) == 2
+    assert batch.columns[FINDING_COLUMNS.index("finding_id")] == ["f-1", "f-2"]
+    assert list(batch)[1] == ("azure", "f-2", "ob-1", *[None] * 9)
+
+    AuroraFindingSink(connection_factory=lambda: connection).write(batch)
+    assert copied_rows(connection) == [
+        ["azure", "f-1", "ob-1", "", "", "", "", "informational", "0.0", "", "", ""],
+        ["azure", "f-2", "ob-1", "", "", "", "", "informational", "0.0", "", "", ""],
+    ]
+
+
+def test_finding_batch_interns_low_cardinality_columns():
+    batch = FindingBatch.from_rows(
+        [
+            ("aws", "f-1", "".join(["ob-", "1"]), *[None] * 9),
+            ("aws", "f-2", "".join(["ob-", "1"]), *[None] * 9),
+        ]
+    )
+
+    onboarding_ids = batch.columns[FINDING_COLUMNS.index("onboarding_id")]
+    assert onboarding_ids[0] is onboarding_ids[1]
+
+
+@pytest.mark.parametrize(
+    "source, severity, score, expected",
+    [
+        ("aws", "CRITICAL", 95, ("critical", 95.0)),
+        ("aws", "Moderate", None, ("medium", 40.0)),
+        ("wiz", "HIGH", 7.5, ("high", 75.0)),
+        ("wiz", "INFO", None, ("informational", 0.0)),
+        ("katana", None, None, ("informational", 0.0)),
+        ("azure", "unknown", 250, ("informational", 100.0)),
+    ],
+)
+def test_finding_batch_normalises_severity_and_score(source, severity, score, expected):
+    batch = FindingBatch()
+    batch.append(
+        source, "f-1", "ob-1", None, None, None, None, severity, score, *[None] * 3
+    )
+
+    batch.normalise().normalise()
+
+    row = dict(zip(FINDING_COLUMNS, next(iter(batch))))
+    assert (row["severity"], row["score"]) == expected
+
+
+def test_csv_copy_stream_reads_in_pieces(monkeypatch):
+    monkeypatch.setattr("lambdas.findings.COPY_CHUNK_ROWS", 3)
+    rows = [("aws", f"f-{i}", *[None] * 10) for i in range(10)]
+    stream = CsvCopyStream(rows)
+
+    pieces = []
+    while piece := stream.read(7):
+        assert len(piece) <= 7
+        pieces.append(piece)
+
+    assert "".join(pieces) == "".join(f"aws,f-{i},,,,,,,,,,\r\n" for i in range(10))
+
+
+def test_same_resource_and_title_fingerprint_alike_across_sources():
+    aws, wiz, other_resource, other_onboarding = fingerprints(
+        [
+            (
+                "aws",
+                "arn-1",
+                "ob-1",
+                "1",
+                "eu-west-1",
+                "AwsS3Bucket",
+                "arn:aws:s3:::logs",
+                "HIGH",
+                70,
+                "S3 bucket is public.",
+                "NEW",
+                None,
+            ),
+            (
+                "wiz",
+                "issue:9",
+                "ob-1",
+                "1",
+                None,
+                "BUCKET",
+                "ARN:AWS:S3:::logs ",
+                "high",
+                7.0,
+                "S3 Bucket is Public",
+                "OPEN",
+                None,
+            ),
+            (
+                "wiz",
+                "issue:10",
+                "ob-1",
+                "1",
+                None,
+                "BUCKET",
+                "arn:aws:s3:::other",
+                "high",
+                7.0,
+                "S3 Bucket is Public",
+                "OPEN",
+                None,
+            ),
+            (
+                "aws",
+                "arn-1",
+                "ob-2",
+                "1",
+                "eu-west-1",
+                "AwsS3Bucket",
+                "arn:aws:s3:::logs",
+                "HIGH",
+                70,
+                "S3 bucket is public.",
+                "NEW",
+                None,
+            ),
+        ]
+    )
+
+    assert aws[0] == wiz[0]
+    assert len({aws[0], other_resource[0], other_onboarding[0]}) == 3
+    assert len(aws[0]) == len(aws[1]) == 16
+
+
+def test_findings_without_a_resource_are_only_themselves():
+    first, second = fingerprints(
+        [
+            (
+                "katana",
+                "a",
+                "ob-1",
+                None,
+                None,
+                None,
+                None,
+                "info",
+                None,
+                "t",
+                None,
+                None,
+            ),
+            (
+                "katana",
+                "b",
+                "ob-1",
+                None,
+                None,
+                None,
+                None,
+                "info",
+                None,
+                "t",
+                None,
+                None,
+            ),
+        ]
+    )
+
+    assert first[0] != second[0]
+    assert first[1] == second[1]
+
+
+def test_content_hash_ignores_updated_at_only():
+    row = (
+        "aws",
+        "f-1",
+        "ob-1",
+        "1",
+        "r",
+        "t",
+        "arn",
+        "HIGH",
+        70,
+        "x",
+        "NEW",
+        "2026-01-01",
+    )
+    bumped = (*row[:-1], "2026-02-01")
+    resolved = (*row[:-2], "RESOLVED", row[-1])
+
+    original, same, changed = fingerprints([row, bumped, resolved])
+
+    assert original == same
+    assert original[0] == changed[0]
+    assert original[1] != changed[1]
+
+
+def test_aurora_sink_counts_written_and_skipped_rows(connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (1,)
+    sink = AuroraFindingSink(connection_factory=lambda: connection)
+
+    sink.write([ROW, (*ROW[:1], "f-2", *ROW[2:])])
+
+    assert (sink.written, sink.skipped) == (1, 1)
+
+
+def test_aurora_sink_stages_each_findings_focus_area(connection):
+    sink = AuroraFindingSink(connection_factory=lambda: connection)
+    rows = [
+        (*ROW[:5], "AwsS3Bucket", "arn", "high", None, "Bucket is public", None, None),
+        (*ROW[:1], "f-2", *ROW[2:9], "IAM user without MFA", None, None),
+        (*ROW[:1], "f-3", *ROW[2:]),
+    ]
+
+    sink.write(rows)
+
+    cursor = connection.cursor.return_value.__enter__.return_value
+    staged = list(csv.reader(io.StringIO("".join(cursor.copied))))
+    assert [row[-1] for row in staged] == ["data", "iam", "compliance"]
+    assert FindingBatch.from_rows(rows).focus_areas() == ["data", "iam", "compliance"]
@@ -0,0 +1,253 @@
+import base64
+import gzip
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from lambdas import aws_clients, frontend_proxy
+
+BUCKET = "test-frontend-bucket"
+
+
+@pytest.fixture
+def s3_bucket(aws_credentials, monkeypatch):
+    monkeypatch.setattr(frontend_proxy, "S3_BUCKET", BUCKET)
+    frontend_proxy.asset_cache.clear()
+    frontend_proxy.missing_keys.clear()
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        s3.put_object(Bucket=BUCKET, Key="index.html", Body=b"<html>v1</html>")
+        s3.put_object(Bucket=BUCKET, Key="app.js", Body=b"console.log(1);")
+        s3.put_object(Bucket=BUCKET, Key="logo.png", Body=b"\x89PNG\x00")
+        yield s3
+    frontend_proxy.asset_cache.clear()
+    frontend_proxy.missing_keys.clear()
+
+
+@pytest.fixture
+def get_object_calls(s3_bucket):
+    calls = []
+    aws_clients.client("s3").meta.events.register(
+        "provide-client-params.s3.GetObject",
+        lambda params, **kwargs: calls.append(dict(params)),
+    )
+    return calls
+
+
+def test_serves_asset_with_etag_and_cache_control(s3_bucket):
+    response = frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+
+    assert response["statusCode"] == 200
+    assert response["body"] == "console.log(1);"
+    assert (
+        response["headers"]["ETag"]
+        == s3_bucket.head_object(Bucket=BUCKET, Key="app.js")["ETag"]
+    )
+    assert response["headers"]["Cache-Control"].startswith("public, max-age=")
+
+
+def test_html_is_revalidated_by_browser(s3_bucket):
+    response = frontend_proxy.lambda_handler({"rawPath": "/"}, {})
+
+    assert response["headers"]["Content-Type"] == "text/html"
+    assert response["headers"]["Cache-Control"] == "no-cache"
+
+
+def test_binary_assets_are_base64_encoded(s3_bucket):
+    response = frontend_proxy.lambda_handler({"rawPath": "/logo.png"}, {})
+
+    assert response["isBase64Encoded"] is True
+    assert base64.b64decode(response["body"]) == b"\x89PNG\x00"
+
+
+def test_repeat_requests_are_served_from_cache(get_object_calls):
+    frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+    frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+
+    assert len(get_object_calls) == 1
+
+
+def test_if_none_match_returns_304_without_body(s3_bucket):
+    first = frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+    event = {
+        "rawPath": "/app.js",
+        "headers": {"If-None-Match": first["headers"]["ETag"]},
+    }
+
+    response = frontend_proxy.lambda_handler(event, {})
+
+    assert response["statusCode"] == 304
+    assert response["body"] == ""
+    assert response["headers"]["ETag"] == first["headers"]["ETag"]
+
+
+def test_stale_entry_is_revalidated_with_if_none_match(
+    s3_bucket, get_object_calls, monkeypatch
+):
+    monkeypatch.setattr(frontend_proxy, "CACHE_TTL_SECONDS", 0)
+    first = frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+
+    second = frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+
+    assert second["body"] == first["body"]
+    assert get_object_calls[1]["IfNoneMatch"] == first["headers"]["ETag"]
+
+
+def test_stale_entry_picks_up_changed_object(s3_bucket, monkeypatch):
+    monkeypatch.setattr(frontend_proxy, "CACHE_TTL_SECONDS", 0)
+    frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+    s3_bucket.put_object(Bucket=BUCKET, Key="app.js", Body=b"console.log(2);")
+
+    response = frontend_proxy.lambda_handler({"rawPath": "/app.js"}, {})
+
+    assert response["body"] == "console.log(2);"
+
+
+def test_unknown_path_falls_back_to_index(s3_bucket):
+    response = frontend_proxy.lambda_handler({"rawPath": "/dashboard/123"}, {})
+
+    assert response["statusCode"] == 200
+    assert response["body"] == "<html>v1</html>"
+
+
+def test_spa_route_is_served_from_pinned_index_with_one_fetch(get_object_calls):
+    for route in ("/dashboard/123", "/dashboard/456", "/settings"):
+        response = frontend_proxy.lambda_handler({"rawPath": route}, {})
+        assert response["body"] == "<html>v1</html>"
+
+    assert [call["Key"] for call in get_object_calls] == ["index.html"]
+
+
+def test_missing_asset_is_remembered(get_object_calls):
+    for _ in range(3):
+        response = frontend_proxy.lambda_handler({"rawPath": "/missing.js"}, {})
+        assert response["body"] == "<html>v1</html>"
+
+    assert [call["Key"] for call in get_object_calls] == ["missing.js", "index.html"]
+    assert "missing.js" in frontend_proxy.missing_keys
+
+
+def test_missing_key_cache_expires_and_is_bounded(monkeypatch):
+    cache = frontend_proxy.MissingKeyCache(max_entries=2, ttl_seconds=30)
+    clock = iter([0, 0, 0, 10, 40])
+    monkeypatch.setattr(frontend_proxy.time, "monotonic", lambda: next(clock))
+    cache.add("a")
+    cache.add("b")
+    cache.add("c")
+
+    assert "b" in cache
+    assert "c" not in cache
+    assert len(cache) == 1
+
+
+def test_is_spa_route():
+    assert frontend_proxy.is_spa_route("dashboard/123")
+    assert not frontend_proxy.is_spa_route("assets/app.js")
+
+
+def test_pinned_entries_are_never_evicted():
+    cache = frontend_proxy.AssetCache(max_bytes=10, pinned=["index.html"])
+    asset = frontend_proxy.CachedAsset("x" * 6, False, "text/html", "e", 0)
+    cache.put("index.html", asset)
+    cache.put("a.js", frontend_proxy.CachedAsset("x" * 6, False, "text/plain", "e", 0))
+
+    assert "index.html" in cache
+    assert "a.js" not in cache
+
+
+def test_cache_evicts_least_recently_used_by_bytes():
+    cache = frontend_proxy.AssetCache(max_bytes=10)
+    for key in ("a", "b", "c"):
+        cache.put(key, frontend_proxy.CachedAsset("x" * 4, False, "text/plain", key, 0))
+
+    assert "a" not in cache
+    assert "b" in cache and "c" in cache
+    assert cache.current_bytes == 8
+
+
+def test_cache_skips_entries_larger_than_capacity():
+    cache = frontend_proxy.AssetCache(max_bytes=3)
+    cache.put("big", frontend_proxy.CachedAsset("x" * 4, False, "text/plain", "e", 0))
+
+    assert len(cache) == 0
+
+
+LARGE_CSS = b"body { color: red; }\n" * 200
+
+
+@pytest.fixture
+def css_assets(s3_bucket):
+    s3_bucket.put_object(Bucket=BUCKET, Key="style.css", Body=LARGE_CSS)
+    s3_bucket.put_object(
+        Bucket=BUCKET, Key="app.js.gz", Body=gzip.compress(b"console.log(1);")
+    )
+    return s3_bucket
+
+
+def test_accepted_encodings_ranks_by_quality():
+    event = {"headers": {"Accept-Encoding": "gzip;q=0.8, br;q=0.5, deflate"}}
+
+    assert frontend_proxy.accepted_encodings(event) == ["gzip", "br"]
+    assert frontend_proxy.accepted_encodings({"headers": {}}) == []
+    assert frontend_proxy.accepted_encodings(
+        {"headers": {"accept-encoding": "br, gzip;q=0"}}
+    ) == ["br"]
+
+
+def test_precompressed_sibling_is_served(css_assets):
+    event = {"rawPath": "/app.js", "headers": {"Accept-Encoding": "gzip"}}
+
+    response = frontend_proxy.lambda_handler(event, {})
+
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert response["headers"]["Content-Type"] == "text/javascript"
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    assert response["isBase64Encoded"] is True
+    assert gzip.decompress(base64.b64decode(response["body"])) == b"console.log(1);"
+
+
+def test_asset_without_sibling_is_compressed_once_and_cached(
+    css_assets, get_object_calls
+):
+    event = {"rawPath": "/style.css", "headers": {"Accept-Encoding": "gzip"}}
+
+    first = frontend_proxy.lambda_handler(event, {})
+    second = frontend_proxy.lambda_handler(event, {})
+
+    assert first["headers"]["Content-Encoding"] == "gzip"
+    assert gzip.decompress(base64.b64decode(first["body"])) == LARGE_CSS
+    assert second["body"] == first["body"]
+    assert [call["Key"] for call in get_object_calls] == [
+        "style.css",
+        "style.css.gz",
+    ]
+
+
+def test_compressed_variant_has_its_own_etag(css_assets):
+    plain = frontend_proxy.lambda_handler({"rawPath": "/style.css"}, {})
+    event = {"rawPath": "/style.css", "headers": {"Accept-Encoding": "gzip"}}
+    compressed = frontend_proxy.lambda_handler(event, {})
+    event["headers"]["If-None-Match"] = compressed["headers"]["ETag"]
+
+    revalidated = frontend_proxy.lambda_handler(event, {})
+
+    assert compressed["headers"]["ETag"] != plain["headers"]["ETag"]
+    assert revalidated["statusCode"] == 304
+
+
+def test_identity_response_still_varies_on_accept_encoding(css_assets):
+    response = frontend_proxy.lambda_handler({"rawPath": "/style.css"}, {})
+
+    assert "Content-Encoding" not in response["headers"]
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    assert response["body"] == LARGE_CSS.decode("utf-8")
+
+
+def test_binary_assets_are_not_compressed(css_assets):
+    event = {"rawPath": "/logo.png", "headers": {"Accept-Encoding": "gzip"}}
+
+    response = frontend_proxy.lambda_handler(event, {})
+
+    assert "Content-Encoding" not in response["headers"]
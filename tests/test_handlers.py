@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+from lambdas import aws_clients
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_handlers_module_does_not_import_logic_modules():
+    code = (
+        "import sys, handlers; "
+        "loaded = [m for m in sys.modules if m.startswith(('lambdas', 'boto'))]; "
+        "print(','.join(sorted(loaded)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PROJECT_ROOT,
+    )
+    # Only the stdlib-only instrumentation every handler is wrapped in
+    assert result.stdout.strip() == "lambdas,lambdas.instrumentation"
+
+
+LOGIC_MODULES = {
+    "lambdas.onboarding",
+    "lambdas.onboarding_export",
+    "lambdas.frontend_proxy",
+    "lambdas.import_aws",
+    "lambdas.import_azure",
+    "lambdas.import_wiz",
+    "lambdas.import_katana",
+    "lambdas.import_coralogix",
+    "lambdas.remediation_planning",
+    "lambdas.reporting",
+    "lambdas.assessment",
+}
+
+
+def test_handler_imports_only_its_own_logic_module():
+    code = (
+        "import sys, handlers\n"
+        "handlers.import_aws_handler({}, {})\n"
+        "print(','.join(sorted(m for m in sys.modules if m.startswith('lambdas.'))))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PROJECT_ROOT,
+    )
+    loaded = set(result.stdout.strip().splitlines()[-1].split(","))
+    assert loaded & LOGIC_MODULES == {"lambdas.import_aws"}
+
+
+@patch("boto3.client")
+def test_clients_are_created_once_and_reused(mock_boto_client):
+    first = aws_clients.client("s3")
+    second = aws_clients.client("s3")
+
+    assert first is second
+    mock_boto_client.assert_called_once_with("s3")
+
+
+@patch("boto3.resource")
+def test_tables_are_created_once_and_reused(mock_boto_resource):
+    first = aws_clients.table("test-table")
+    second = aws_clients.table("test-table")
+
+    assert first is second
+    mock_boto_resource.assert_called_once_with("dynamodb")
+    mock_boto_resource.return_value.Table.assert_called_once_with("test-table")
@@ -1,7 +1,201 @@
+import boto3
 import pytest
-from lambdas.import_aws import import_aws_logic
+from botocore.exceptions import ClientError
 
+from lambdas import context_store, import_aws, watermarks
+from lambdas.findings import FINDING_COLUMNS, ListFindingSink
+from lambdas.import_aws import import_aws_findings, import_aws_logic
 
-def test_import_aws_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        import_aws_logic({}, {})
+OTHER_ACCOUNT = "111111111111"
+
+
+def asff_finding(finding_id, account_id, region, label="HIGH"):
+    return {
+        "SchemaVersion": "2018-10-08",
+        "Id": finding_id,
+        "ProductArn": f"arn:aws:securityhub:{region}::product/aws/securityhub",
+        "GeneratorId": "aws-foundational-security-best-practices/S3.1",
+        "AwsAccountId": account_id,
+        "Region": region,
+        "Types": ["Software and Configuration Checks"],
+        "CreatedAt": "2026-01-01T00:00:00Z",
+        "UpdatedAt": "2026-01-02T00:00:00Z",
+        "Severity": {"Label": label, "Normalized": 70},
+        "Title": "S3 bucket allows public access",
+        "Description": "desc",
+        "Resources": [{"Type": "AwsS3Bucket", "Id": f"arn:aws:s3:::{finding_id}"}],
+        "Workflow": {"Status": "NEW"},
+    }
+
+
+def securityhub_for(account_id, region):
+    session = boto3.session.Session(region_name=region)
+    if account_id != "123456789012":
+        credentials = session.client("sts").assume_role(
+            RoleArn=f"arn:aws:iam::{account_id}:role/audit", RoleSessionName="seed"
+        )["Credentials"]
+        session = boto3.session.Session(
+            aws_access_key_id=credentials["AccessKeyId"],
+            aws_secret_access_key=credentials["SecretAccessKey"],
+            aws_session_token=credentials["SessionToken"],
+            region_name=region,
+        )
+    return session.client("securityhub")
+
+
+@pytest.fixture
+def seeded_hubs(mock_context_table):
+    for account_id in ("123456789012", OTHER_ACCOUNT):
+        for region in ("us-east-1", "eu-west-1"):
+            findings = [
+                asff_finding(f"{account_id}-{region}-{i}", account_id, region)
+                for i in range(150)
+            ]
+            client = securityhub_for(account_id, region)
+            for start in range(0, len(findings), 100):
+                client.batch_import_findings(Findings=findings[start : start + 100])
+
+
+@pytest.fixture
+def requested_filters(monkeypatch):
+    """Filters sent with each GetFindings call, keyed by region"""
+    requested = {}
+    real_session = import_aws.account_session
+
+    def recording_session(account, region):
+        def record(params, **kwargs):
+            requested[region] = params["Filters"]
+
+        session = real_session(account, region)
+        session.events.register("provide-client-params.securityhub.GetFindings", record)
+        return session
+
+    monkeypatch.setattr(import_aws, "account_session", recording_session)
+    return requested
+
+
+def test_import_aws_logic_requires_onboarding_id():
+    assert import_aws_logic({}, {})["statusCode"] == 400
+
+
+@pytest.mark.parametrize(
+    "accounts",
+    [None, [{"accountId": "111"}], [{"roleArn": "arn:aws:iam::1:role/r"}]],
+)
+def test_import_aws_logic_never_uses_its_own_credentials(accounts):
+    response = import_aws_logic({"onboardingId": "ob-1", "accounts": accounts}, {})
+
+    assert response == {
+        "statusCode": 400,
+        "error": "accounts must each have a roleArn and externalId",
+    }
+
+
+def test_normalise_finding_maps_asff_fields():
+    row = import_aws.normalise_finding(
+        asff_finding("f-1", "123456789012", "us-east-1", label="CRITICAL"), "ob-1"
+    )
+
+    assert dict(zip(FINDING_COLUMNS, row)) == {
+        "source": "aws",
+        "finding_id": "f-1",
+        "onboarding_id": "ob-1",
+        "account_id": "123456789012",
+        "region": "us-east-1",
+        "resource_type": "AwsS3Bucket",
+        "resource_id": "arn:aws:s3:::f-1",
+        "severity": "critical",
+        "score": 70,
+        "title": "S3 bucket allows public access",
+        "status": "NEW",
+        "updated_at": "2026-01-02T00:00:00Z",
+    }
+
+    archived = dict(asff_finding("f-2", "123456789012", "us-east-1"))
+    archived["RecordState"] = "ARCHIVED"
+    assert import_aws.normalise_finding(archived, "ob-1")[10] == "ARCHIVED"
+
+
+def test_import_fans_out_across_accounts_and_regions(seeded_hubs, monkeypatch):
+    monkeypatch.setattr(import_aws, "WRITE_BATCH_SIZE", 250)
+    sink = ListFindingSink()
+    event = {
+        "onboardingId": "ob-1",
+        "accounts": [
+            {"accountId": "123456789012"},
+            {
+                "accountId": OTHER_ACCOUNT,
+                "roleArn": f"arn:aws:iam::{OTHER_ACCOUNT}:role/audit",
+            },
+        ],
+        "regions": ["us-east-1", "eu-west-1"],
+    }
+
+    result = import_aws_findings(event, sink)
+
+    assert result["findings"] == 600
+    assert result["errors"] == []
+    assert sink.batches == 3
+    assert len({row[1] for row in sink.rows}) == 600
+    assert {(row[3], row[4]) for row in sink.rows} == {
+        ("123456789012", "us-east-1"),
+        ("123456789012", "eu-west-1"),
+        (OTHER_ACCOUNT, "us-east-1"),
+        (OTHER_ACCOUNT, "eu-west-1"),
+    }
+
+
+def test_failing_region_is_reported_and_others_still_import(seeded_hubs, monkeypatch):
+    real_session = import_aws.account_session
+
+    def session_or_denied(account, region):
+        if region == "eu-west-1":
+            raise ClientError(
+                {"Error": {"Code": "InvalidAccessException", "Message": "disabled"}},
+                "GetFindings",
+            )
+        return real_session(account, region)
+
+    monkeypatch.setattr(import_aws, "account_session", session_or_denied)
+    sink = ListFindingSink()
+
+    result = import_aws_findings(
+        {"onboardingId": "ob-1", "regions": ["us-east-1", "eu-west-1"]}, sink
+    )
+
+    assert result["findings"] == 150
+    assert result["errors"] == [
+        {
+            "accountId": None,
+            "region": "eu-west-1",
+            "partition": "default#eu-west-1",
+            "error": "InvalidAccessException",
+        }
+    ]
+    watermark = context_store.load(watermarks.watermark_id("ob-1", "aws"))
+    assert set(watermark["partitions"]) == {"default#us-east-1"}
+
+
+def test_second_run_fetches_only_findings_updated_since_the_watermark(
+    seeded_hubs, requested_filters
+):
+    event = {"onboardingId": "ob-1", "regions": ["us-east-1"]}
+
+    first = import_aws_findings(event, ListFindingSink())
+    assert first["mode"] == "full"
+    assert "UpdatedAt" not in requested_filters.pop("us-east-1")
+    mark = context_store.load(watermarks.watermark_id("ob-1", "aws"))["partitions"][
+        "default#us-east-1"
+    ]
+
+    second = import_aws_findings(event, ListFindingSink())
+    assert second["mode"] == "incremental"
+    filters = requested_filters.pop("us-east-1")
+    # Archived and resolved findings are fetched too, so they close
+    assert "RecordState" not in filters
+    assert filters["UpdatedAt"][0]["Start"] == mark
+    assert filters["UpdatedAt"][0]["End"] > mark
+
+    resync = import_aws_findings({**event, "fullResync": True}, ListFindingSink())
+    assert resync["mode"] == "full"
+    assert "UpdatedAt" not in requested_filters.pop("us-east-1")
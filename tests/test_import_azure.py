@@ -1,7 +1,348 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
 import pytest
-from lambdas.import_azure import import_azure_logic
 
+from lambdas import context_store, import_azure, watermarks
+from lambdas.findings import FINDING_COLUMNS, FindingBatch, ListFindingSink
+from lambdas.import_azure import (
+    AzureError,
+    PageReader,
+    ResourceGraphClient,
+    import_azure_findings,
+    import_azure_logic,
+)
+
+COLUMNS = [
+    {"name": "id", "type": "string"},
+    {"name": "subscriptionId", "type": "string"},
+    {"name": "location", "type": "string"},
+    {"name": "resourceId", "type": "string"},
+    {"name": "severity", "type": "string"},
+    {"name": "displayName", "type": "string"},
+    {"name": "status", "type": "string"},
+    {"name": "timeGenerated", "type": "string"},
+]
+
+
+def assessment_row(subscription_id, i):
+    resource_id = (
+        f"/subscriptions/{subscription_id}/resourceGroups/rg/providers/"
+        f"Microsoft.Compute/virtualMachines/vm-{i}"
+    )
+    return [
+        f"{resource_id}/providers/Microsoft.Security/assessments/a-{i}",
+        subscription_id,
+        "westeurope",
+        resource_id,
+        "High",
+        "Machines should have vulnerability findings resolved",
+        "Unhealthy",
+        "2026-01-02T00:00:00Z",
+    ]
+
+
+# Shape of a recorded Resource Graph response with resultFormat=table
+RECORDED_PAGE = {
+    "totalRecords": 3,
+    "count": 2,
+    "data": {
+        "columns": COLUMNS,
+        "rows": [
+            assessment_row("sub-1", 0),
+            ["a-1", "sub-1", None, None, None, "Überwachung – ✓", "Unhealthy", None],
+        ],
+    },
+    "facets": [],
+    "resultTruncated": "false",
+    "$skipToken": "token-2",
+}
+
+
+def chunks(data, size):
+    return (data[start : start + size] for start in range(0, len(data), size))
+
+
+class StubResourceGraph(BaseHTTPRequestHandler):
+    """Serves the AAD token endpoint and paginated Resource Graph queries."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        if self.path.endswith("/oauth2/v2.0/token"):
+            self.send_json(200, {"access_token": "token", "expires_in": 3599})
+            return
+
+        request = json.loads(body)
+        (subscription_id,) = request["subscriptions"]
+        options = request["options"]
+        incremental = "timeGeneratedUtc) > datetime(" in request["query"]
+        with server.lock:
+            server.queries.append((subscription_id, options.get("$skipToken")))
+            server.texts.append(request["query"])
+            throttle = server.throttle_remaining > 0
+            if throttle:
+                server.throttle_remaining -= 1
+        if throttle:
+            self.send_json(
+                429, {"error": {"code": "RateLimiting"}}, {"Retry-After": "0"}
+            )
+            return
+        if subscription_id in server.forbidden:
+            self.send_json(403, {"error": {"code": "AuthorizationFailed"}})
+            return
+
+        # An incremental query only matches the assessments that changed
+        total = server.changed if incremental else server.per_subscription
+        start = int(options.get("$skipToken") or 0)
+        end = min(total, start + options["$top"])
+        payload = {
+            "totalRecords": total,
+            "count": end - start,
+            "data": {
+                "columns": COLUMNS,
+                "rows": [assessment_row(subscription_id, i) for i in range(start, end)],
+            },
+            "facets": [],
+            "resultTruncated": "false",
+        }
+        if end < total:
+            payload["$skipToken"] = str(end)
+        self.send_json(200, payload)
+
+
+@pytest.fixture
+def resource_graph(mock_context_table, monkeypatch):
+    monkeypatch.setattr(import_azure, "PAGE_SIZE", 100)
+    monkeypatch.setattr(import_azure, "WRITE_BATCH_SIZE", 120)
+    import_azure.http_pool.cache_clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubResourceGraph)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.queries = []
+    server.texts = []
+    server.changed = 4
+    server.throttle_remaining = 0
+    server.forbidden = set()
+    server.per_subscription = 250
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+    import_azure.http_pool.cache_clear()
+
+
+def make_client(server):
+    return ResourceGraphClient(
+        tenant_id="tenant",
+        client_id="id",
+        client_secret="secret",
+        authority_url=server.url,
+        management_url=server.url,
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_page_reader_streams_rows_across_chunk_boundaries(chunk_size):
+    body = json.dumps(RECORDED_PAGE, ensure_ascii=False).encode("utf-8")
+    page = PageReader(chunks(body, chunk_size))
+
+    rows = list(page.rows())
+
+    assert rows == RECORDED_PAGE["data"]["rows"]
+    assert page.columns == [column["name"] for column in COLUMNS]
+    assert page.skip_token == "token-2"
+
+
+def test_page_reader_handles_skip_token_before_data_and_empty_rows():
+    body = b'{"$skipToken": null, "count": 0, "data": {"columns": [], "rows": []}}'
+    page = PageReader(chunks(body, 5))
+
+    assert list(page.rows()) == []
+    assert page.skip_token is None
+
+
+def test_page_reader_rejects_truncated_responses():
+    body = json.dumps(RECORDED_PAGE).encode("utf-8")[:-40]
+    with pytest.raises(AzureError):
+        list(PageReader(chunks(body, 16)).rows())
+
+
+def test_normalises_rows_into_column_batches():
+    batch = FindingBatch()
+    append = import_azure.normaliser(
+        [column["name"] for column in COLUMNS], "ob-1", batch
+    )
+    for row in RECORDED_PAGE["data"]["rows"]:
+        append(row)
+
+    first, second = list(batch)
+    assert dict(zip(FINDING_COLUMNS, first)) == {
+        "source": "azure",
+        "finding_id": RECORDED_PAGE["data"]["rows"][0][0],
+        "onboarding_id": "ob-1",
+        "account_id": "sub-1",
+        "region": "westeurope",
+        "resource_type": "Microsoft.Compute/virtualMachines",
+        "resource_id": RECORDED_PAGE["data"]["rows"][0][3],
+        "severity": "high",
+        "score": None,
+        "title": "Machines should have vulnerability findings resolved",
+        "status": "Unhealthy",
+        "updated_at": "2026-01-02T00:00:00Z",
+    }
+    assert second[FINDING_COLUMNS.index("severity")] == "informational"
+    assert second[FINDING_COLUMNS.index("resource_type")] is None
+
+
+def test_resource_type_includes_nested_types():
+    assert (
+        import_azure.resource_type(
+            "/subscriptions/s/resourceGroups/rg/providers/Microsoft.Sql/servers/db1"
+            "/databases/orders"
+        )
+        == "Microsoft.Sql/servers/databases"
+    )
+    assert import_azure.resource_type("/subscriptions/s") is None
+
+
+def test_imports_every_page_of_every_subscription(resource_graph):
+    sink = ListFindingSink()
+    event = {"onboardingId": "ob-1", "subscriptions": ["sub-1", "sub-2", "sub-3"]}
+
+    result = import_azure_findings(event, make_client(resource_graph), sink)
+
+    assert result["findings"] == 750
+    assert result["errors"] == []
+    ids = {row[FINDING_COLUMNS.index("finding_id")] for row in sink.rows}
+    assert len(ids) == 750
+    # Three pages per subscription, the later ones requested by skip token
+    assert len(resource_graph.queries) == 9
+    assert set(resource_graph.queries) == {
+        (subscription, token)
+        for subscription in ("sub-1", "sub-2", "sub-3")
+        for token in (None, "100", "200")
+    }
+    # Batches are flushed at WRITE_BATCH_SIZE, independent of page boundaries
+    assert sink.batches == 9
+
+
+def test_retries_throttled_queries(resource_graph):
+    resource_graph.throttle_remaining = 2
+    sink = ListFindingSink()
+
+    result = import_azure_findings(
+        {"onboardingId": "ob-1", "subscriptions": ["sub-1"]},
+        make_client(resource_graph),
+        sink,
+    )
+
+    assert result["findings"] == 250
+    assert len(resource_graph.queries) == 3 + 2
+
+
+def test_records_errors_per_subscription(resource_graph):
+    resource_graph.forbidden = {"sub-2"}
+    sink = ListFindingSink()
+
+    result = import_azure_findings(
+        {"onboardingId": "ob-1", "subscriptions": ["sub-1", "sub-2"]},
+        make_client(resource_graph),
+        sink,
+    )
+
+    assert result["findings"] == 250
+    assert result["errors"] == [
+        {"subscriptionId": "sub-2", "error": "Resource Graph request failed (403)"}
+    ]
+    watermark = context_store.load(watermarks.watermark_id("ob-1", "azure"))
+    assert set(watermark["subscriptions"]) == {"sub-1"}
+
+
+def test_second_run_queries_only_assessments_evaluated_since_the_watermark(
+    resource_graph,
+):
+    event = {"onboardingId": "ob-1", "subscriptions": ["sub-1", "sub-2"]}
+    client = make_client(resource_graph)
+
+    first = import_azure_findings(event, client, ListFindingSink())
+    assert first["mode"] == "full"
+    assert first["findings"] == 500
+    assert all('== "Unhealthy"' in text for text in resource_graph.texts)
+    mark = context_store.load(watermarks.watermark_id("ob-1", "azure"))[
+        "subscriptions"
+    ]["sub-1"]
+
+    resource_graph.queries.clear()
+    resource_graph.texts.clear()
+    second = import_azure_findings(event, client, ListFindingSink())
+    assert second["mode"] == "incremental"
+    assert second["findings"] == 8
+    assert len(resource_graph.queries) == 2
+    assert all(f"datetime({mark})" in text for text in resource_graph.texts)
+    # Assessments that turned healthy are fetched too, so their findings close
+    assert not any('== "Unhealthy"' in text for text in resource_graph.texts)
+
+    resync = import_azure_findings(
+        {**event, "fullResync": True}, client, ListFindingSink()
+    )
+    assert resync["mode"] == "full"
+    assert resync["findings"] == 500
+
+
+def test_import_azure_logic_validates_event():
+    assert import_azure_logic({}, None)["statusCode"] == 400
+    assert import_azure_logic({"onboardingId": "ob-1"}, None)["statusCode"] == 400
+    response = import_azure_logic({"onboardingId": "ob-1", "secretId": "s"}, None)
+    assert response == {
+        "statusCode": 400,
+        "error": "secretId must be mna/ob-1/azure",
+    }
+    response = import_azure_logic(
+        {"onboardingId": "ob-1", "secretId": "mna/ob-1/azure"}, None
+    )
+    assert response == {"statusCode": 400, "error": "subscriptions is required"}
+
+
+def test_import_azure_logic_reads_service_principal_from_secret(
+    resource_graph, monkeypatch
+):
+    sink = ListFindingSink()
+    monkeypatch.setattr(import_azure, "AuroraFindingSink", lambda: sink)
+    boto3.client("secretsmanager").create_secret(
+        Name="mna/ob-1/azure",
+        SecretString=json.dumps(
+            {
+                "tenantId": "tenant",
+                "clientId": "id",
+                "clientSecret": "secret",
+                "authorityUrl": resource_graph.url,
+                "managementUrl": resource_graph.url,
+            }
+        ),
+    )
+    result = import_azure_logic(
+        {"onboardingId": "ob-1", "secretId": "mna/ob-1/azure", "subscriptions": ["s"]},
+        None,
+    )
 
-def test_import_azure_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        import_azure_logic({}, {})
+    assert result["statusCode"] == 200
+    assert len(sink.rows) == 250
@@ -1,7 +1,313 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
 import pytest
-from lambdas.import_coralogix import import_coralogix_logic
 
+from lambdas import import_coralogix
+from lambdas.findings import FINDING_COLUMNS, ListFindingSink
+from lambdas.import_coralogix import (
+    DataPrimeClient,
+    LogAggregate,
+    import_coralogix_findings,
+    import_coralogix_logic,
+)
+
+WINDOW_START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+WINDOW_END = WINDOW_START + timedelta(days=30)
+BURST_START = WINDOW_START + timedelta(days=10, hours=3)
+
+
+def parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def log_row(moment, application, subsystem, severity, text):
+    return {
+        "metadata": [
+            {"key": "timestamp", "value": moment.isoformat().replace("+00:00", "Z")},
+            {"key": "severity", "value": severity},
+        ],
+        "labels": [
+            {"key": "applicationname", "value": application},
+            {"key": "subsystemname", "value": subsystem},
+        ],
+        "userData": json.dumps({"message": text}),
+    }
+
+
+def stub_logs():
+    """An hourly warning for 30 days plus a burst of 600 failed logins in one hour"""
+    logs = [
+        (WINDOW_START + timedelta(hours=h), "api", "auth", "4", "token refreshed")
+        for h in range(30 * 24)
+    ]
+    logs += [
+        (
+            BURST_START + timedelta(seconds=6 * i),
+            "api",
+            "login",
+            "5",
+            "Authentication failed for user admin",
+        )
+        for i in range(600)
+    ]
+    return sorted(logs)
+
+
+class StubDataPrime(BaseHTTPRequestHandler):
+    """Streams DataPrime query results as NDJSON, honouring the row limit."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.queries.append(request)
+            throttle = server.throttle_remaining > 0
+            if throttle:
+                server.throttle_remaining -= 1
+        try:
+            time.sleep(0.005)
+            if throttle:
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            metadata = request["metadata"]
+            start = parse_time(metadata["startDate"])
+            end = parse_time(metadata["endDate"])
+            rows = [log_row(*log) for log in server.logs if start <= log[0] < end][
+                : metadata["limit"]
+            ]
+            lines = [json.dumps({"queryId": {"queryId": "q-1"}})]
+            for offset in range(0, len(rows), 100):
+                results = rows[offset : offset + 100]
+                lines.append(json.dumps({"result": {"results": results}}))
+            body = ("\n".join(lines) + "\n").encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def dataprime(mock_context_table, monkeypatch):
+    monkeypatch.setattr(import_coralogix, "RESULT_LIMIT", 200)
+    monkeypatch.setattr(import_coralogix, "MAX_CONCURRENCY", 4)
+    import_coralogix.http_pool.cache_clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubDataPrime)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.logs = stub_logs()
+    server.queries = []
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.throttle_remaining = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+    import_coralogix.http_pool.cache_clear()
+
+
+EVENT = {
+    "onboardingId": "ob-1",
+    "start": "2026-01-01T00:00:00Z",
+    "end": "2026-01-31T00:00:00Z",
+}
+
+
+def test_aggregates_sharded_window_and_splits_capped_shards(dataprime):
+    sink = ListFindingSink()
+    result = import_coralogix_findings(
+        EVENT, DataPrimeClient(dataprime.url, "key"), sink
+    )
+
+    assert result["logRows"] == 30 * 24 + 600
+    assert result["shards"] == 30
+    assert result["splits"] > 0
+    assert result["truncatedShards"] == 0
+    assert result["signals"] == {"authentication_failure": 600}
+    assert result["requests"] == len(dataprime.queries) == 30 + 2 * result["splits"]
+
+    findings = {
+        row[FINDING_COLUMNS.index("resource_id")]: dict(zip(FINDING_COLUMNS, row))
+        for row in sink.rows
+    }
+    assert result["streams"]["api/auth:Warning"] == 720
+    assert findings["api/auth"]["title"] == "Warning log events"
+    assert findings["api/auth"]["severity"] == "medium"
+    assert findings["api/login"]["title"] == "Error log events"
+    assert findings["api/login"]["severity"] == "high"
+    assert findings["api/login"]["updated_at"] == "2026-01-11T03:59:54Z"
+    assert findings["authentication_failure"]["resource_type"] == "log_signal"
+    assert findings["authentication_failure"]["title"] == (
+        "authentication failure log events"
+    )
+
+
+def test_second_run_queries_only_shards_not_aggregated_before(dataprime):
+    client = DataPrimeClient(dataprime.url, "key")
+    first_sink = ListFindingSink()
+    first = import_coralogix_findings(EVENT, client, first_sink)
+    assert first["mode"] == "full"
+
+    dataprime.queries.clear()
+    sink = ListFindingSink()
+    second = import_coralogix_findings(
+        {
+            "onboardingId": "ob-1",
+            "start": "2026-01-02T00:00:00Z",
+            "end": "2026-02-01T00:00:00Z",
+        },
+        client,
+        sink,
+    )
+
+    assert second["mode"] == "incremental"
+    assert second["cachedShards"] == 29
+    assert [query["metadata"]["startDate"] for query in dataprime.queries] == [
+        "2026-01-31T00:00:00Z"
+    ]
+    # The day that left the window no longer counts
+    assert second["logRows"] == 29 * 24 + 600
+    assert second["streams"]["api/auth:Warning"] == 696
+    # New counts, same findings: titles (and so fingerprints) are stable
+    title = FINDING_COLUMNS.index("title")
+    assert sorted(row[title] for row in sink.rows) == sorted(
+        row[title] for row in first_sink.rows
+    )
+
+    dataprime.queries.clear()
+    resync = import_coralogix_findings({**EVENT, "fullResync": True}, client, sink)
+    assert resync["mode"] == "full"
+    assert len(dataprime.queries) >= 30
+
+
+def test_shard_grid_is_fixed_to_the_epoch():
+    start = datetime(2026, 1, 1, 18, tzinfo=timezone.utc)
+    bounds = import_coralogix.shard_bounds(start, start + timedelta(days=1))
+
+    assert bounds == [
+        (start, datetime(2026, 1, 2, tzinfo=timezone.utc)),
+        (datetime(2026, 1, 2, tzinfo=timezone.utc), start + timedelta(days=1)),
+    ]
+
+
+def test_shards_run_concurrently_within_the_semaphore(dataprime):
+    import_coralogix_findings(
+        EVENT, DataPrimeClient(dataprime.url, "key"), ListFindingSink()
+    )
+
+    assert 1 < dataprime.max_in_flight <= 4
+
+
+def test_keeps_truncated_shards_that_cannot_be_split(dataprime, monkeypatch):
+    monkeypatch.setattr(import_coralogix, "MIN_SHARD_SECONDS", 24 * 3600)
+
+    result = import_coralogix_findings(
+        EVENT, DataPrimeClient(dataprime.url, "key"), ListFindingSink()
+    )
+
+    assert result["splits"] == 0
+    assert result["truncatedShards"] == 1
+    assert result["logRows"] == 29 * 24 + 200
+
+
+def test_retries_throttled_queries(dataprime):
+    dataprime.throttle_remaining = 2
+
+    result = import_coralogix_findings(
+        EVENT, DataPrimeClient(dataprime.url, "key"), ListFindingSink()
+    )
+
+    assert result["logRows"] == 30 * 24 + 600
+
+
+def test_log_aggregates_merge_counts_and_time_bounds():
+    left, right = LogAggregate(), LogAggregate()
+    left.add("app", "sub", "Error", "2026-01-02T00:00:00Z", "Access Denied")
+    right.add("app", "sub", "Error", "2026-01-01T00:00:00Z", "ok")
+    right.add("app", "sub", "Error", "2026-01-03T00:00:00Z", "sudo su -")
+
+    merged = left.merge(right)
+
+    assert merged.rows == 3
+    assert merged.groups == {
+        ("app", "sub", "Error"): [3, "2026-01-01T00:00:00Z", "2026-01-03T00:00:00Z"]
+    }
+    assert merged.signals == {
+        "access_denied": [1, "2026-01-02T00:00:00Z", "2026-01-02T00:00:00Z"],
+        "privilege_change": [1, "2026-01-03T00:00:00Z", "2026-01-03T00:00:00Z"],
+    }
+
+
+def test_import_coralogix_logic_validates_event():
+    assert import_coralogix_logic({}, None)["statusCode"] == 400
+    assert import_coralogix_logic({"onboardingId": "ob-1"}, None)["statusCode"] == 400
+    # Another onboarding's credentials are refused
+    response = import_coralogix_logic(
+        {"onboardingId": "ob-1", "secretId": "mna/ob-2/coralogix"}, None
+    )
+    assert response == {
+        "statusCode": 400,
+        "error": "secretId must be mna/ob-1/coralogix",
+    }
+
+
+@pytest.mark.parametrize(
+    "window, error",
+    [
+        ({"start": "last week"}, "Invalid date: Invalid isoformat string: 'last week'"),
+        (
+            {"start": "2026-10-02", "end": "2026-10-01T00:00:00Z"},
+            "start must be before end",
+        ),
+    ],
+)
+def test_import_coralogix_logic_validates_the_window(window, error):
+    event = {"onboardingId": "ob-1", "secretId": "mna/ob-1/coralogix", **window}
+
+    assert import_coralogix_logic(event, None) == {"statusCode": 400, "error": error}
+
+
+def test_dates_without_an_offset_are_utc(dataprime):
+    sink = ListFindingSink()
+    result = import_coralogix_findings(
+        {"onboardingId": "ob-1", "start": "2026-01-01", "end": "2026-01-31T00:00:00"},
+        DataPrimeClient(dataprime.url, "key"),
+        sink,
+    )
+
+    assert result["start"] == "2026-01-01T00:00:00Z"
+    assert result["end"] == "2026-01-31T00:00:00Z"
+    assert result["logRows"] == 30 * 24 + 600
+
+
+def test_import_coralogix_logic_reads_api_key_from_secret(dataprime, monkeypatch):
+    sink = ListFindingSink()
+    monkeypatch.setattr(import_coralogix, "AuroraFindingSink", lambda: sink)
+    boto3.client("secretsmanager").create_secret(
+        Name="mna/ob-1/coralogix",
+        SecretString=json.dumps({"apiUrl": dataprime.url, "apiKey": "key"}),
+    )
+    result = import_coralogix_logic({**EVENT, "secretId": "mna/ob-1/coralogix"}, None)
 
-def test_import_coralogix_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        import_coralogix_logic({}, {})
+    assert result["statusCode"] == 200
+    assert len(sink.rows) == 3
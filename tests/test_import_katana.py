@@ -1,7 +1,263 @@
+import hashlib
+import json
+
+import boto3
 import pytest
-from lambdas.import_katana import import_katana_logic
+from moto import mock_aws
+
+from lambdas import aws_clients, context_store, import_katana
+from lambdas.findings import FINDING_COLUMNS, ListFindingSink
+from lambdas.import_katana import (
+    BloomFilter,
+    canonical_url,
+    import_katana_findings,
+    import_katana_logic,
+)
+
+BUCKET = "test-katana-crawls"
+KEY = "crawls/ob-1/example.jsonl"
+
+
+class FakeContext:
+    """Lambda context whose remaining time runs out after a number of checks."""
+
+    def __init__(self, checks_before_timeout):
+        self.checks_left = checks_before_timeout
+
+    def get_remaining_time_in_millis(self):
+        self.checks_left -= 1
+        return 60_000 if self.checks_left > 0 else 0
+
+
+def katana_line(endpoint, method="GET", status_code=200):
+    return json.dumps(
+        {
+            "timestamp": "2026-01-02T00:00:00.000000Z",
+            "request": {
+                "method": method,
+                "endpoint": endpoint,
+                "tag": "a",
+                "attribute": "href",
+                "source": "https://example.com/",
+            },
+            "response": {
+                "status_code": status_code,
+                "headers": {"content_type": "text/html"},
+                "body": "<html>" + "x" * 50 + "</html>",
+            },
+        }
+    )
+
+
+@pytest.fixture
+def crawl_bucket(aws_credentials, monkeypatch):
+    monkeypatch.setenv("MNA_CONTEXT_TABLE", "test-mna-context")
+    monkeypatch.setattr(import_katana, "RANGE_BYTES", 256)
+    monkeypatch.setattr(import_katana, "WRITE_BATCH_SIZE", 10)
+    monkeypatch.setattr(import_katana, "DEDUPE_CAPACITY", 10_000)
+    with mock_aws():
+        boto3.resource("dynamodb").create_table(
+            TableName="test-mna-context",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        boto3.client("s3").create_bucket(Bucket=BUCKET)
+        yield
+
+
+def put_crawl(lines):
+    body = "\n".join(lines) + "\n"
+    boto3.client("s3").put_object(Bucket=BUCKET, Key=KEY, Body=body.encode("utf-8"))
+    return len(body.encode("utf-8"))
+
+
+def crawl_lines(unique, repeats):
+    lines = []
+    for r in range(repeats):
+        for i in range(unique):
+            # Same endpoint each repeat, spelled differently
+            lines.append(katana_line(f"https://Example.com:443/app/{i}/?page={r}#x"))
+    return lines
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (
+            "https://Example.COM:443/a/./b/../c?b=2&a=1#frag",
+            "https://example.com/a/c?a&b",
+        ),
+        ("http://example.com:8080//x//y/", "http://example.com:8080/x/y"),
+        (
+            "https://example.com/%7euser/caf%c3%a9",
+            "https://example.com/~user/caf%C3%A9",
+        ),
+        ("https://example.com", "https://example.com/"),
+        ("http://[::1]:80/admin", "http://[::1]/admin"),
+        ("mailto:someone@example.com", None),
+        ("javascript:void(0)", None),
+        ("https://example.com:99999/", None),
+    ],
+)
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+
+def test_bloom_filter_reports_repeats():
+    seen = BloomFilter(capacity=1000, error_rate=1e-4)
+    digests = [
+        hashlib.blake2b(str(i).encode(), digest_size=16).digest() for i in range(1000)
+    ]
+
+    assert all(seen.add(d) for d in digests)
+    assert not any(seen.add(d) for d in digests)
+    assert len(seen.bits) < 1000 * 3
+
+
+def test_streams_unique_endpoints_in_batches(crawl_bucket):
+    size = put_crawl(crawl_lines(unique=25, repeats=4) + ["not json", "{}"])
+    requested_ranges = []
+    aws_clients.client("s3").meta.events.register(
+        "provide-client-params.s3.GetObject",
+        lambda params, **kwargs: requested_ranges.append(params["Range"]),
+    )
+    sink = ListFindingSink()
+
+    result = import_katana_findings(
+        {"onboardingId": "ob-1", "bucket": BUCKET, "key": KEY}, sink
+    )
+
+    assert result["status"] == "complete"
+    assert result["lines"] == 102
+    assert result["endpoints"] == 25
+    assert result["duplicates"] == 75
+    assert result["malformed"] == 2
+    assert sink.batches == 3
+    endpoints = sorted(row[FINDING_COLUMNS.index("resource_id")] for row in sink.rows)
+    assert endpoints == sorted(f"https://example.com/app/{i}?page" for i in range(25))
+    row = dict(zip(FINDING_COLUMNS, sink.rows[0]))
+    assert row["source"] == "katana"
+    assert row["resource_type"] == "http_endpoint"
+    assert row["status"] == "200"
+    assert len(row["finding_id"]) == 32
+    # Only ranged reads, each at most RANGE_BYTES, covering the object once
+    assert len(requested_ranges) == -(-size // 256)
+    assert requested_ranges[0] == "bytes=0-255"
+    assert (
+        requested_ranges[-1] == f"bytes={256 * (len(requested_ranges) - 1)}-{size - 1}"
+    )
+    assert context_store.load(import_katana.checkpoint_id("ob-1", BUCKET, KEY)) is None
+
+
+def test_methods_are_distinct_endpoints(crawl_bucket):
+    put_crawl(
+        [
+            katana_line("https://example.com/login"),
+            katana_line("https://example.com/login", method="post"),
+            katana_line("https://example.com/login/"),
+        ]
+    )
+    sink = ListFindingSink()
+
+    import_katana_findings({"onboardingId": "ob-1", "bucket": BUCKET, "key": KEY}, sink)
+
+    titles = sorted(row[FINDING_COLUMNS.index("title")] for row in sink.rows)
+    assert titles == ["GET https://example.com/login", "POST https://example.com/login"]
+
+
+def test_fingerprints_are_scoped_to_the_onboarding(crawl_bucket):
+    put_crawl([katana_line("https://example.com/")])
+    first, second = ListFindingSink(), ListFindingSink()
+    event = {"bucket": BUCKET, "key": KEY}
+
+    import_katana_findings({**event, "onboardingId": "ob-1"}, first)
+    import_katana_findings({**event, "onboardingId": "ob-2"}, second)
+
+    index = FINDING_COLUMNS.index("finding_id")
+    assert first.rows[0][index] != second.rows[0][index]
+
+
+def test_resumes_from_checkpointed_offset_after_timeout(crawl_bucket):
+    put_crawl(crawl_lines(unique=40, repeats=1))
+    event = {"onboardingId": "ob-1", "bucket": BUCKET, "key": KEY}
+    sink = ListFindingSink()
+
+    first = import_katana_findings(event, sink, FakeContext(2))
+    assert first["status"] == "in_progress"
+    assert first["endpoints"] == 20
+    checkpoint = context_store.load(import_katana.checkpoint_id("ob-1", BUCKET, KEY))
+    assert checkpoint["offset"] == first["offset"] > 0
+
+    second = import_katana_findings(event, sink, FakeContext(100))
+    assert second["status"] == "complete"
+    assert second["lines"] == 20
+    assert second["totalEndpoints"] == 40
+    ids = [row[FINDING_COLUMNS.index("finding_id")] for row in sink.rows]
+    assert len(ids) == len(set(ids)) == 40
+
+
+def test_skips_a_crawl_already_imported_unchanged(crawl_bucket):
+    put_crawl(crawl_lines(unique=5, repeats=1))
+    event = {"onboardingId": "ob-1", "bucket": BUCKET, "key": KEY}
+    assert import_katana_findings(event, ListFindingSink())["endpoints"] == 5
+
+    reads = []
+    aws_clients.client("s3").meta.events.register(
+        "provide-client-params.s3.GetObject",
+        lambda params, **kwargs: reads.append(params["Range"]),
+    )
+    sink = ListFindingSink()
+    second = import_katana_findings(event, sink)
+    assert second["status"] == "unchanged"
+    assert reads == [] and sink.rows == []
+
+    resync = import_katana_findings({**event, "fullResync": True}, sink)
+    assert resync["status"] == "complete"
+    assert resync["endpoints"] == 5
+
+    put_crawl(crawl_lines(unique=7, repeats=1))
+    changed = import_katana_findings(event, ListFindingSink())
+    assert changed["status"] == "complete"
+    assert changed["endpoints"] == 7
+
+
+def test_handles_missing_trailing_newline(crawl_bucket):
+    body = "\n".join(crawl_lines(unique=3, repeats=1))
+    boto3.client("s3").put_object(Bucket=BUCKET, Key=KEY, Body=body.encode("utf-8"))
+    sink = ListFindingSink()
+
+    result = import_katana_findings(
+        {"onboardingId": "ob-1", "bucket": BUCKET, "key": KEY}, sink
+    )
+
+    assert result["endpoints"] == 3
+    assert result["offset"] == len(body)
+
+
+def test_import_katana_logic_validates_event(monkeypatch):
+    monkeypatch.setattr(import_katana, "CRAWL_BUCKET", BUCKET)
+    assert import_katana_logic({}, None)["statusCode"] == 400
+    response = import_katana_logic({"onboardingId": "ob-1", "bucket": BUCKET}, None)
+    assert response == {"statusCode": 400, "error": "key is required"}
+
 
+def test_import_katana_logic_only_reads_the_crawl_bucket(monkeypatch):
+    event = {"onboardingId": "ob-1", "bucket": "someone-elses-bucket", "key": KEY}
 
-def test_import_katana_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        import_katana_logic({}, {})
+    monkeypatch.setattr(import_katana, "CRAWL_BUCKET", "")
+    assert import_katana_logic(event, None) == {
+        "statusCode": 500,
+        "error": "CRAWL_BUCKET is not configured",
+    }
+    monkeypatch.setattr(import_katana, "CRAWL_BUCKET", BUCKET)
+    assert import_katana_logic(event, None) == {
+        "statusCode": 400,
+        "error": f"bucket must be {BUCKET}",
+    }
+    # Another onboarding's crawl is refused
+    event = {"onboardingId": "ob-2", "bucket": BUCKET, "key": KEY}
+    assert import_katana_logic(event, None) == {
+        "statusCode": 400,
+        "error": "key must start with crawls/ob-2/",
+    }
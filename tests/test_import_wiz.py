@@ -1,7 +1,391 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import boto3
 import pytest
-from lambdas.import_wiz import import_wiz_logic
 
+from lambdas import context_store, import_wiz
+from lambdas.findings import FINDING_COLUMNS, ListFindingSink
+from lambdas.import_wiz import (
+    AdaptiveLimiter,
+    WizClient,
+    import_wiz_findings,
+    import_wiz_logic,
+)
+
+
+class FakeContext:
+    """Lambda context whose remaining time runs out after a number of checks."""
+
+    def __init__(self, checks_before_timeout):
+        self.checks_left = checks_before_timeout
+
+    def get_remaining_time_in_millis(self):
+        self.checks_left -= 1
+        return 60_000 if self.checks_left > 0 else 0
+
+
+def issue_node(i):
+    return {
+        "id": f"i-{i}",
+        "severity": "HIGH",
+        "status": "OPEN",
+        "updatedAt": "2026-01-02T00:00:00Z",
+        "sourceRule": {"id": "r-1", "name": "Public bucket"},
+        "entitySnapshot": {
+            "id": f"e-{i}",
+            "type": "BUCKET",
+            "nativeType": "AWS::S3::Bucket",
+            "subscriptionExternalId": "123456789012",
+            "region": "us-east-1",
+        },
+    }
+
+
+def vulnerability_node(i):
+    return {
+        "id": f"v-{i}",
+        "name": f"CVE-2026-{i:04d}",
+        "severity": "CRITICAL",
+        "status": "OPEN",
+        "score": 9.8,
+        "lastDetectedAt": "2026-01-03T00:00:00Z",
+        "vulnerableAsset": {
+            "id": f"vm-{i}",
+            "type": "VIRTUAL_MACHINE",
+            "subscriptionExternalId": "sub-1",
+            "region": "westeurope",
+        },
+    }
+
+
+class StubWiz(BaseHTTPRequestHandler):
+    """Serves the OAuth token endpoint and a paginated GraphQL endpoint."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        if self.path == "/oauth/token":
+            server.token_requests += 1
+            self.send_json(200, {"access_token": "token", "expires_in": 3600})
+            return
+        if self.headers["Authorization"] != "Bearer token":
+            self.send_json(401, {"error": "unauthorized"})
+            return
+
+        request = json.loads(body)
+        variables = request["variables"]
+        field = (
+            "issuesV2" if "issuesV2" in request["query"] else "vulnerabilityFindings"
+        )
+        with server.lock:
+            server.requests.append((field, variables["after"]))
+            server.filters.append(variables["filterBy"])
+            throttle = server.throttle_remaining > 0
+            if throttle:
+                server.throttle_remaining -= 1
+        if throttle:
+            self.send_json(429, {"errors": []}, {"Retry-After": "0"})
+            return
+
+        total, make_node = server.datasets[field]
+        if "updatedAt" in variables["filterBy"]:
+            # Only the first few nodes changed since any watermark
+            total = min(total, server.changed)
+        start = int(variables["after"] or 0)
+        end = min(total, start + variables["first"])
+        has_next = end < total
+        self.send_json(
+            200,
+            {
+                "data": {
+                    field: {
+                        "nodes": [make_node(i) for i in range(start, end)],
+                        "pageInfo": {
+                            "hasNextPage": has_next,
+                            "endCursor": str(end) if has_next else None,
+                        },
+                    }
+                }
+            },
+        )
+        if field == "issuesV2" and variables["after"]:
+            server.later_page_requested.set()
+
+
+@pytest.fixture
+def wiz_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubWiz)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.token_requests = 0
+    server.requests = []
+    server.filters = []
+    server.changed = 3
+    server.throttle_remaining = 0
+    server.later_page_requested = threading.Event()
+    server.datasets = {
+        "issuesV2": (250, issue_node),
+        "vulnerabilityFindings": (120, vulnerability_node),
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def wiz_env(wiz_server, aws_credentials, monkeypatch):
+    from moto import mock_aws
+
+    monkeypatch.setenv("MNA_CONTEXT_TABLE", "test-mna-context")
+    monkeypatch.setattr(import_wiz, "PAGE_SIZE", 50)
+    monkeypatch.setattr(import_wiz, "WRITE_BATCH_SIZE", 1)
+    import_wiz.http_pool.cache_clear()
+    with mock_aws():
+        boto3.resource("dynamodb").create_table(
+            TableName="test-mna-context",
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield wiz_server
+    import_wiz.http_pool.cache_clear()
+
+
+def make_client(server):
+    return WizClient(
+        api_url=f"{server.url}/graphql",
+        auth_url=f"{server.url}/oauth/token",
+        client_id="id",
+        client_secret="secret",
+        limiter=AdaptiveLimiter(4),
+    )
+
+
+def test_imports_every_page_of_both_streams(wiz_env):
+    sink = ListFindingSink()
+    result = import_wiz_findings({"onboardingId": "ob-1"}, make_client(wiz_env), sink)
+
+    assert result["status"] == "complete"
+    assert result["findings"] == 370
+    ids = {row[FINDING_COLUMNS.index("finding_id")] for row in sink.rows}
+    assert len(ids) == 370
+    assert "issue:i-0" in ids and "vulnerability:v-119" in ids
+    # Pages are requested once each and the checkpoint is cleared on completion
+    assert len(wiz_env.requests) == len(set(wiz_env.requests)) == 5 + 3
+    assert context_store.load("import-wiz#ob-1") is None
+
+
+def test_normalises_wiz_nodes():
+    issue = import_wiz.normalise_issue(issue_node(1), "ob-1")
+    vulnerability = import_wiz.normalise_vulnerability(vulnerability_node(2), "ob-1")
+
+    assert dict(zip(FINDING_COLUMNS, issue)) == {
+        "source": "wiz",
+        "finding_id": "issue:i-1",
+        "onboarding_id": "ob-1",
+        "account_id": "123456789012",
+        "region": "us-east-1",
+        "resource_type": "AWS::S3::Bucket",
+        "resource_id": "e-1",
+        "severity": "high",
+        "score": None,
+        "title": "Public bucket",
+        "status": "OPEN",
+        "updated_at": "2026-01-02T00:00:00Z",
+    }
+    assert vulnerability[FINDING_COLUMNS.index("severity")] == "critical"
+    assert vulnerability[FINDING_COLUMNS.index("score")] == 9.8
+
+
+def test_reuses_keep_alive_connections(wiz_env):
+    client = make_client(wiz_env)
+    import_wiz_findings({"onboardingId": "ob-1"}, client, ListFindingSink())
+
+    assert wiz_env.token_requests == 1
+    # Bounded by the pool size, not by the number of requests
+    assert wiz_env.connections <= 2 * import_wiz.MAX_CONCURRENCY
+    assert wiz_env.connections < client.requests
+
+
+def test_next_page_is_fetched_while_current_page_is_written(wiz_env):
+    class BlockingSink(ListFindingSink):
+        def write(self, rows):
+            if not self.rows:
+                # Only returns in time if the next page was requested meanwhile
+                assert wiz_env.later_page_requested.wait(timeout=5)
+            super().write(rows)
+
+    result = import_wiz_findings(
+        {"onboardingId": "ob-1", "streams": ["issues"]},
+        make_client(wiz_env),
+        BlockingSink(),
+    )
+    assert result["findings"] == 250
+
+
+def test_backs_off_and_lowers_concurrency_when_throttled(wiz_env):
+    wiz_env.throttle_remaining = 3
+    client = make_client(wiz_env)
+    result = import_wiz_findings({"onboardingId": "ob-1"}, client, ListFindingSink())
+
+    assert result["status"] == "complete"
+    assert result["findings"] == 370
+    assert result["throttled"] == 3
+    # Throttled requests are retried, not skipped
+    assert client.requests == 5 + 3 + 3
+
+
+def test_limiter_adapts_to_throttling():
+    limiter = AdaptiveLimiter(8)
+    limiter.throttled(0)
+    limiter.throttled(0)
+    assert limiter.limit == 2
+    for _ in range(20):
+        limiter.succeeded()
+    assert 2 < limiter.limit <= 8
+    for _ in range(10):
+        limiter.throttled(0)
+    assert limiter.limit == limiter.minimum
+
+
+def test_resumes_from_checkpointed_cursor_after_timeout(wiz_env):
+    event = {"onboardingId": "ob-1", "streams": ["issues"]}
+    sink = ListFindingSink()
+
+    first = import_wiz_findings(event, make_client(wiz_env), sink, FakeContext(2))
+    assert first["status"] == "in_progress"
+    assert 0 < first["findings"] < 250
+    checkpoint = context_store.load("import-wiz#ob-1")
+    assert checkpoint["partitions"]["issues"]["done"] is False
+    resume_cursor = checkpoint["partitions"]["issues"]["after"]
+
+    wiz_env.requests.clear()
+    second = import_wiz_findings(event, make_client(wiz_env), sink, FakeContext(100))
+    assert second["status"] == "complete"
+    assert second["totalFindings"] == 250
+    # The second run starts at the saved cursor and never re-reads written pages
+    assert wiz_env.requests[0] == ("issuesV2", resume_cursor)
+    ids = [row[FINDING_COLUMNS.index("finding_id")] for row in sink.rows]
+    assert len(ids) == len(set(ids)) == 250
+
+
+def test_second_run_requests_only_nodes_updated_since_the_watermark(wiz_env):
+    event = {"onboardingId": "ob-1"}
+
+    first = import_wiz_findings(event, make_client(wiz_env), ListFindingSink())
+    assert first["mode"] == "full"
+    assert not any("updatedAt" in filters for filters in wiz_env.filters)
+    watermark = context_store.load("watermark#ob-1#wiz")
+    assert set(watermark["partitions"]) == {"issues", "vulnerabilities"}
+
+    wiz_env.requests.clear()
+    wiz_env.filters.clear()
+    second = import_wiz_findings(event, make_client(wiz_env), ListFindingSink())
+    assert second["mode"] == "incremental"
+    assert second["findings"] == 6
+    assert len(wiz_env.requests) == 2
+    assert (
+        wiz_env.filters
+        == [{"updatedAt": {"after": watermark["partitions"]["issues"]}}] * 2
+    )
+
+    resync = import_wiz_findings(
+        {**event, "fullResync": True}, make_client(wiz_env), ListFindingSink()
+    )
+    assert resync["mode"] == "full"
+    assert resync["findings"] == 370
+
+
+def test_resumed_run_keeps_filtering_on_the_watermark_it_started_with(wiz_env):
+    event = {"onboardingId": "ob-1", "streams": ["issues"]}
+    import_wiz_findings(event, make_client(wiz_env), ListFindingSink())
+    mark = context_store.load("watermark#ob-1#wiz")["partitions"]["issues"]
+    wiz_env.changed = 120
+
+    first = import_wiz_findings(
+        event, make_client(wiz_env), ListFindingSink(), FakeContext(2)
+    )
+    assert first["status"] == "in_progress"
+    assert context_store.load("watermark#ob-1#wiz")["partitions"]["issues"] == mark
+
+    wiz_env.filters.clear()
+    second = import_wiz_findings(
+        event, make_client(wiz_env), ListFindingSink(), FakeContext(100)
+    )
+    assert second["status"] == "complete"
+    assert second["totalFindings"] == 120
+    assert wiz_env.filters[0] == {"updatedAt": {"after": mark}}
+
+
+def test_splits_streams_per_project(wiz_env):
+    result = import_wiz_findings(
+        {
+            "onboardingId": "ob-1",
+            "streams": ["vulnerabilities"],
+            "projects": ["a", "b"],
+        },
+        make_client(wiz_env),
+        ListFindingSink(),
+    )
+    # The stub ignores the filter, so each project partition pages everything
+    assert result["findings"] == 240
+
+
+def test_import_wiz_logic_validates_event():
+    assert import_wiz_logic({}, None)["statusCode"] == 400
+    assert import_wiz_logic({"onboardingId": "ob-1"}, None)["statusCode"] == 400
+    response = import_wiz_logic({"onboardingId": "ob-1", "secretId": "s"}, None)
+    assert response == {"statusCode": 400, "error": "secretId must be mna/ob-1/wiz"}
+    response = import_wiz_logic(
+        {"onboardingId": "ob-1", "secretId": "mna/ob-1/wiz", "streams": ["alerts"]},
+        None,
+    )
+    assert response["statusCode"] == 400
+
+
+def test_import_wiz_logic_reads_credentials_from_secret(wiz_env, monkeypatch):
+    boto3.client("secretsmanager").create_secret(
+        Name="mna/ob-1/wiz",
+        SecretString=json.dumps(
+            {
+                "clientId": "id",
+                "clientSecret": "secret",
+                "apiUrl": f"{wiz_env.url}/graphql",
+                "authUrl": f"{wiz_env.url}/oauth/token",
+            }
+        ),
+    )
+    sink = ListFindingSink()
+    monkeypatch.setattr(import_wiz, "AuroraFindingSink", lambda: sink)
 
-def test_import_wiz_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        import_wiz_logic({}, {})
+    result = import_wiz_logic(
+        {"onboardingId": "ob-1", "secretId": "mna/ob-1/wiz"}, None
+    )
+    assert result["statusCode"] == 200
+    assert len(sink.rows) == 370
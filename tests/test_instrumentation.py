@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+import handlers
+from lambdas import instrumentation
+from lambdas.instrumentation import emf_lines, instrumented
+
+
+@pytest.fixture(autouse=True)
+def cold_container(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_cold_start", True)
+    monkeypatch.setattr(instrumentation, "LOG_EVENT_SAMPLE_RATE", 0)
+
+
+def emitted(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_handler_emits_emf_with_cold_start_and_dynamodb_latency(
+    mock_onboarding_table, capsys
+):
+    mock_onboarding_table.put_item(Item={"onboardingId": "ob-1"})
+    event = {"httpMethod": "GET", "path": "/onboarding/ob-1"}
+
+    assert handlers.onboarding_handler(event, None)["statusCode"] == 200
+    assert handlers.onboarding_handler(event, None)["statusCode"] == 200
+
+    first, second = emitted(capsys)
+    assert first["Handler"] == "onboarding_handler"
+    assert (first["ColdStart"], second["ColdStart"]) == (1, 0)
+    assert first["Errors"] == 0
+    assert first["DynamoDBCalls"] == 1
+    assert 0 < first["DynamoDBLatency"][0] < first["Duration"]
+    definition = first["_aws"]["CloudWatchMetrics"][0]
+    assert definition["Namespace"] == instrumentation.NAMESPACE
+    assert definition["Dimensions"] == [["Handler"]]
+    metrics = {metric["Name"]: metric["Unit"] for metric in definition["Metrics"]}
+    assert metrics == {
+        "Duration": "Milliseconds",
+        "ColdStart": "Count",
+        "Errors": "Count",
+        "DynamoDBCalls": "Count",
+        "DynamoDBLatency": "Milliseconds",
+    }
+    assert all(name in first for name in metrics)
+
+
+def test_failures_and_server_errors_count_as_errors(capsys):
+    @instrumented
+    def failing(event, context):
+        raise RuntimeError("boom")
+
+    @instrumented
+    def server_error(event, context):
+        return {"statusCode": 503}
+
+    with pytest.raises(RuntimeError):
+        failing({}, None)
+    server_error({}, None)
+
+    assert [document["Errors"] for document in emitted(capsys)] == [1, 1]
+
+
+def test_events_are_logged_sampled_and_size_capped(monkeypatch, capsys):
+    handler = instrumented(lambda event, context: {"statusCode": 200})
+    event = {"body": "x" * 5000}
+
+    handler(event, None)
+    assert len(emitted(capsys)) == 1
+
+    monkeypatch.setattr(instrumentation, "LOG_EVENT_SAMPLE_RATE", 1)
+    monkeypatch.setattr(instrumentation, "LOG_EVENT_MAX_BYTES", 100)
+    handler(event, None)
+
+    log, metrics = emitted(capsys)
+    assert log["message"] == "Received event"
+    assert log["eventBytes"] == len(json.dumps(event))
+    assert len(log["event"]) == 100
+    assert log["truncated"] is True
+    assert "Duration" in metrics
+
+
+def test_latencies_beyond_the_emf_limit_continue_in_more_documents():
+    documents = [
+        json.loads(line)
+        for line in emf_lines("h", 12.0, False, False, {"S3": [1.0] * 250}, timestamp=1)
+    ]
+
+    assert documents[0]["S3Calls"] == 250
+    assert [len(document["S3Latency"]) for document in documents] == [100, 100, 50]
+    assert [
+        metric["Name"]
+        for metric in documents[2]["_aws"]["CloudWatchMetrics"][0]["Metrics"]
+    ] == ["S3Latency"]
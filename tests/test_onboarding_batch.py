@@ -0,0 +1,178 @@
+import json
+
+import pytest
+
+from lambdas import aws_clients, onboarding
+
+
+def record(i, **extra):
+    return dict(
+        companyName=f"Company {i}",
+        contactName="Jane Doe",
+        contactEmail=f"jane{i}@example.com",
+        **extra,
+    )
+
+
+def call(method, body=None, query_params=None):
+    event = {
+        "httpMethod": method,
+        "path": "/onboarding/batch",
+        "queryStringParameters": query_params,
+        "body": json.dumps(body) if body is not None else None,
+    }
+    response = onboarding.onboarding_logic(event, {})
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture
+def dynamodb_calls(mock_onboarding_table):
+    calls = []
+    aws_clients.resource("dynamodb").meta.client.meta.events.register(
+        "before-call.dynamodb",
+        lambda model, **kwargs: calls.append(model.name),
+    )
+    return calls
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    delays = []
+    monkeypatch.setattr(onboarding.time, "sleep", delays.append)
+    return delays
+
+
+def test_batch_create_chunks_into_25_item_writes(mock_onboarding_table, dynamodb_calls):
+    status, body = call("POST", {"records": [record(i) for i in range(60)]})
+
+    assert status == 201
+    assert body["created"] == 60
+    assert dynamodb_calls == ["BatchWriteItem"] * 3
+    assert len(mock_onboarding_table.scan()["Items"]) == 60
+
+
+def test_batch_create_reports_per_record_validation(mock_onboarding_table):
+    records = [
+        record(0),
+        {"companyName": "No contact"},
+        record(2, cloudProviders=["aws"]),
+        record(3, transactionType="merger"),
+    ]
+
+    status, body = call("POST", {"records": records})
+
+    assert status == 207
+    assert [result["statusCode"] for result in body["results"]] == [201, 400, 201, 400]
+    assert body["results"][1]["error"] == (
+        "Missing required fields: contactName, contactEmail"
+    )
+    assert body["results"][3]["error"].startswith("Step 2: Missing required fields")
+
+    stored = mock_onboarding_table.get_item(
+        Key={"onboardingId": body["results"][2]["onboardingId"]}
+    )["Item"]
+    assert stored["cloudProviders"] == ["aws"]
+    assert stored["currentStep"] == 3
+
+
+def test_batch_create_retries_unprocessed_items(mock_onboarding_table, no_sleep):
+    dynamodb = aws_clients.resource("dynamodb")
+    real_batch_write = dynamodb.batch_write_item
+    throttled = {"remaining": 2}
+
+    def flaky_batch_write(RequestItems):
+        # Write half of each request and hand the rest back as unprocessed
+        if not throttled["remaining"]:
+            return real_batch_write(RequestItems=RequestItems)
+        throttled["remaining"] -= 1
+        ((table_name, requests),) = RequestItems.items()
+        half = len(requests) // 2
+        real_batch_write(RequestItems={table_name: requests[:half]})
+        return {"UnprocessedItems": {table_name: requests[half:]}}
+
+    dynamodb.batch_write_item = flaky_batch_write
+
+    status, body = call("POST", {"records": [record(i) for i in range(10)]})
+
+    assert status == 201
+    assert len(no_sleep) == 2
+    assert all(0 <= delay <= onboarding.BATCH_BACKOFF_CAP_SECONDS for delay in no_sleep)
+    assert len(mock_onboarding_table.scan()["Items"]) == 10
+
+
+def test_batch_create_reports_items_that_stay_unprocessed(
+    mock_onboarding_table, no_sleep
+):
+    dynamodb = aws_clients.resource("dynamodb")
+    dynamodb.batch_write_item = lambda RequestItems: {"UnprocessedItems": RequestItems}
+
+    status, body = call("POST", {"records": [record(0)]})
+
+    assert status == 207
+    assert body["results"][0]["statusCode"] == 503
+    assert len(no_sleep) == onboarding.BATCH_MAX_ATTEMPTS - 1
+
+
+@pytest.mark.parametrize("body", [{}, {"records": []}, {"records": "nope"}])
+def test_batch_create_requires_records(mock_onboarding_table, body):
+    status, _ = call("POST", body)
+
+    assert status == 400
+
+
+def test_batch_get_chunks_into_100_key_reads(mock_onboarding_table, dynamodb_calls):
+    _, created = call("POST", {"records": [record(i) for i in range(150)]})
+    ids = [result["onboardingId"] for result in created["results"]]
+    dynamodb_calls.clear()
+
+    status, body = call("GET", query_params={"ids": ",".join(ids + ["missing"])})
+
+    assert status == 200
+    assert body["count"] == 150
+    assert dynamodb_calls == ["BatchGetItem"] * 2
+    assert [result["onboardingId"] for result in body["results"]] == ids + ["missing"]
+    assert body["results"][-1]["statusCode"] == 404
+    assert body["results"][0]["data"]["companyName"] == "Company 0"
+
+
+def test_batch_get_deduplicates_ids(mock_onboarding_table):
+    _, created = call("POST", {"records": [record(0)]})
+    onboarding_id = created["results"][0]["onboardingId"]
+
+    status, body = call("GET", query_params={"ids": f"{onboarding_id},{onboarding_id}"})
+
+    assert status == 200
+    assert len(body["results"]) == 1
+
+
+def test_batch_get_retries_unprocessed_keys(mock_onboarding_table, no_sleep):
+    _, created = call("POST", {"records": [record(i) for i in range(4)]})
+    ids = [result["onboardingId"] for result in created["results"]]
+    dynamodb = aws_clients.resource("dynamodb")
+    real_batch_get = dynamodb.batch_get_item
+    throttled = {"remaining": 1}
+
+    def flaky_batch_get(RequestItems):
+        if not throttled["remaining"]:
+            return real_batch_get(RequestItems=RequestItems)
+        throttled["remaining"] -= 1
+        ((table_name, request),) = RequestItems.items()
+        keys = request["Keys"]
+        result = real_batch_get(RequestItems={table_name: {"Keys": keys[:1]}})
+        result["UnprocessedKeys"] = {table_name: {"Keys": keys[1:]}}
+        return result
+
+    dynamodb.batch_get_item = flaky_batch_get
+
+    status, body = call("GET", query_params={"ids": ",".join(ids)})
+
+    assert status == 200
+    assert body["count"] == 4
+    assert len(no_sleep) == 1
+
+
+def test_batch_get_requires_ids(mock_onboarding_table):
+    status, body = call("GET", query_params={"ids": ""})
+
+    assert status == 400
+    assert body["error"] == "ids query parameter is required"
@@ -0,0 +1,186 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import handlers
+from lambdas import aws_clients, instrumentation, onboarding, onboarding_cache
+from lambdas.onboarding_cache import LocalCache, OnboardingCache, SharedCache
+
+STEP_1 = {
+    "companyName": "Test Corp",
+    "contactName": "Jane Doe",
+    "contactEmail": "jane@example.com",
+}
+
+
+class FakeRedis:
+    """The slice of the redis.Redis API SharedCache uses, in memory"""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, px=None):
+        self.values[key] = value.encode("utf-8")
+        self.ttls[key] = px
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def call(method, path, body=None, query_params=None):
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": query_params,
+        "body": json.dumps(body) if body is not None else None,
+    }
+    response = onboarding.onboarding_logic(event, {})
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture(params=["local", "shared"])
+def cache(request, monkeypatch):
+    monkeypatch.setattr(onboarding_cache, "TTL_SECONDS", 5)
+    if request.param == "shared":
+        monkeypatch.setattr(onboarding_cache, "CACHE_URL", "redis://fake")
+        monkeypatch.setattr(onboarding_cache, "shared_client", lambda url: FakeRedis())
+    onboarding_cache.reset()
+    return onboarding_cache.get_cache()
+
+
+@pytest.fixture
+def onboarding_id(mock_onboarding_table, cache):
+    _, body = call("POST", "/onboarding", {"userId": "user123"})
+    # Start from an empty cache rather than the entry the create left
+    cache.invalidate(body["onboardingId"])
+    return body["onboardingId"]
+
+
+@pytest.fixture
+def dynamodb_calls(onboarding_id):
+    calls = []
+    aws_clients.resource("dynamodb").meta.client.meta.events.register(
+        "before-parameter-build.dynamodb",
+        lambda model, params, **kwargs: calls.append(
+            (model.name, params.get("ConsistentRead"))
+        ),
+    )
+    return calls
+
+
+def test_polls_are_served_from_the_cache(onboarding_id, dynamodb_calls, cache):
+    first = call("GET", f"/onboarding/{onboarding_id}")
+    second = call("GET", f"/onboarding/{onboarding_id}")
+
+    assert first == second
+    assert first[1]["data"]["version"] == 1
+    assert dynamodb_calls == [("GetItem", False)]
+    assert (cache.hits, cache.misses, cache.hit_ratio) == (1, 1, 0.5)
+
+
+def test_writes_refresh_the_cached_item(onboarding_id, dynamodb_calls):
+    call("GET", f"/onboarding/{onboarding_id}")
+    call("PUT", f"/onboarding/{onboarding_id}/step", {"step": 1, "data": STEP_1})
+    _, step = call("GET", f"/onboarding/{onboarding_id}")
+    call("POST", f"/onboarding/{onboarding_id}/submit", {"version": 2})
+    _, submitted = call("GET", f"/onboarding/{onboarding_id}")
+
+    assert step["data"]["companyName"] == "Test Corp"
+    assert submitted["data"]["status"] == "submitted"
+    assert submitted["data"]["version"] == 3
+    assert [name for name, _ in dynamodb_calls] == [
+        "GetItem",
+        "UpdateItem",
+        "UpdateItem",
+    ]
+
+
+def test_delete_and_conflicts_invalidate(onboarding_id, dynamodb_calls, cache):
+    call("GET", f"/onboarding/{onboarding_id}")
+    status, _ = call("POST", f"/onboarding/{onboarding_id}/submit", {"version": 7})
+    assert status == 409
+    assert cache.backend.get(onboarding_id) is None
+
+    call("GET", f"/onboarding/{onboarding_id}")
+    assert call("DELETE", f"/onboarding/{onboarding_id}")[0] == 200
+
+    assert call("GET", f"/onboarding/{onboarding_id}")[0] == 404
+    assert [name for name, _ in dynamodb_calls].count("GetItem") == 3
+
+
+def test_consistent_flag_bypasses_and_refreshes_the_cache(
+    onboarding_id, dynamodb_calls
+):
+    call("GET", f"/onboarding/{onboarding_id}")
+    call("GET", f"/onboarding/{onboarding_id}", query_params={"consistent": "true"})
+    call("GET", f"/onboarding/{onboarding_id}")
+
+    assert dynamodb_calls == [("GetItem", False), ("GetItem", True)]
+
+
+def test_cache_is_off_by_default(mock_onboarding_table):
+    _, body = call("POST", "/onboarding", {"userId": "user123"})
+
+    assert onboarding_cache.get_cache() is None
+    assert call("GET", f"/onboarding/{body['onboardingId']}")[0] == 200
+
+
+def test_hits_misses_and_latency_are_emitted(onboarding_id, capsys, monkeypatch):
+    monkeypatch.setattr(instrumentation, "LOG_EVENT_SAMPLE_RATE", 0)
+    event = {"httpMethod": "GET", "path": f"/onboarding/{onboarding_id}"}
+    handlers.onboarding_handler(event, None)
+    handlers.onboarding_handler(event, None)
+
+    miss, hit = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert miss["OnboardingCacheMisses"] == 1
+    assert miss["DynamoDBCalls"] == 1
+    assert hit["OnboardingCacheHits"] == 1
+    assert hit["OnboardingCacheCalls"] == 1
+    assert "DynamoDBCalls" not in hit
+
+
+def test_local_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(onboarding_cache.time, "monotonic", lambda: now[0])
+    local = LocalCache(max_entries=2)
+    local.set("a", {"v": 1}, 5)
+    local.set("b", {"v": 2}, 5)
+    assert local.get("a") == {"v": 1}
+    local.set("c", {"v": 3}, 5)
+
+    assert local.get("b") is None
+    assert local.get("a") == {"v": 1}
+    now[0] += 5
+    assert local.get("a") is None
+
+
+def test_shared_cache_round_trips_dynamodb_numbers():
+    redis = FakeRedis()
+    shared = SharedCache(redis)
+    item = {"onboardingId": "ob-1", "version": Decimal(3), "score": Decimal("0.5")}
+
+    shared.set("ob-1", item, 2.5)
+
+    assert redis.ttls == {"onboarding#ob-1": 2500}
+    assert shared.get("ob-1") == item
+    assert isinstance(shared.get("ob-1")["version"], Decimal)
+    shared.delete("ob-1")
+    assert shared.get("ob-1") is None
+
+
+def test_failing_backend_falls_back_to_the_table():
+    class Down(FakeRedis):
+        def get(self, key):
+            raise ConnectionError("cache unreachable")
+
+    cache = OnboardingCache(SharedCache(Down()), 5)
+
+    assert cache.get("ob-1", lambda: {"onboardingId": "ob-1"}) == {
+        "onboardingId": "ob-1"
+    }
+    assert cache.misses == 1
@@ -0,0 +1,158 @@
+import gzip
+import json
+from decimal import Decimal
+
+import boto3
+import pytest
+
+from lambdas import onboarding_export
+
+BUCKET = "test-export-bucket"
+
+
+class FakeContext:
+    """Lambda context whose remaining time runs out after a number of checks."""
+
+    def __init__(self, checks_before_timeout):
+        self.checks_left = checks_before_timeout
+
+    def get_remaining_time_in_millis(self):
+        self.checks_left -= 1
+        return 60_000 if self.checks_left > 0 else 0
+
+
+@pytest.fixture
+def export_env(mock_onboarding_table, monkeypatch):
+    monkeypatch.setenv("MNA_CONTEXT_TABLE", "test-mna-context")
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 1)
+    boto3.resource("dynamodb").create_table(
+        TableName="test-mna-context",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    with mock_onboarding_table.batch_writer() as batch:
+        for i in range(300):
+            batch.put_item(
+                Item={
+                    "onboardingId": f"id-{i:03d}",
+                    "status": "draft",
+                    "updatedAt": "2026-01-01T00:00:00",
+                    "currentStep": i % 4 + 1,
+                    "score": Decimal("0.5"),
+                    "cloudProviders": ["aws", "azure"],
+                    "formData": {"accounts": Decimal(i)},
+                }
+            )
+    return s3
+
+
+def read_export(s3, result):
+    key = result["location"].split(f"s3://{BUCKET}/", 1)[1]
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    return [json.loads(line) for line in gzip.decompress(body).splitlines()]
+
+
+def test_from_attribute_value_converts_numbers_without_decimal():
+    value = {
+        "M": {
+            "n": {"N": "3"},
+            "f": {"N": "0.25"},
+            "neg": {"N": "-7"},
+            "l": {"L": [{"S": "a"}, {"BOOL": True}, {"NULL": True}]},
+            "ns": {"NS": ["1", "2.5"]},
+        }
+    }
+
+    assert onboarding_export.from_attribute_value(value) == {
+        "n": 3,
+        "f": 0.25,
+        "neg": -7,
+        "l": ["a", True, None],
+        "ns": [1, 2.5],
+    }
+
+
+def test_export_streams_every_record_once(export_env):
+    result = onboarding_export.export_onboarding_logic(
+        {"bucket": BUCKET, "totalSegments": 4}, {}
+    )
+
+    assert result["status"] == "complete"
+    assert result["rows"] == 300
+    records = read_export(export_env, result)
+    assert sorted(r["onboardingId"] for r in records) == [
+        f"id-{i:03d}" for i in range(300)
+    ]
+    first = next(r for r in records if r["onboardingId"] == "id-007")
+    assert first["formData"] == {"accounts": 7}
+    assert first["score"] == 0.5
+    assert first["currentStep"] == 4
+
+
+def test_export_uploads_multiple_gzip_parts(export_env, monkeypatch):
+    monkeypatch.setattr(onboarding_export, "SCAN_PAGE_LIMIT", 20)
+    monkeypatch.setattr(onboarding_export, "PART_SIZE_BYTES", 1)
+
+    result = onboarding_export.export_onboarding_logic(
+        {"bucket": BUCKET, "totalSegments": 2}, {}
+    )
+
+    assert result["parts"] > 1
+    assert len(read_export(export_env, result)) == 300
+
+
+def test_export_resumes_from_checkpoint_without_duplicates(export_env, monkeypatch):
+    monkeypatch.setattr(onboarding_export, "SCAN_PAGE_LIMIT", 20)
+    monkeypatch.setattr(onboarding_export, "PART_SIZE_BYTES", 1)
+
+    first = onboarding_export.export_onboarding_logic(
+        {"bucket": BUCKET, "totalSegments": 3}, FakeContext(checks_before_timeout=2)
+    )
+    assert first["status"] == "in_progress"
+    assert first["rows"] < 300
+
+    second = onboarding_export.export_onboarding_logic(
+        {"exportId": first["exportId"]}, FakeContext(checks_before_timeout=10_000)
+    )
+
+    assert second["status"] == "complete"
+    assert second["rows"] == 300
+    records = read_export(export_env, second)
+    assert sorted(r["onboardingId"] for r in records) == [
+        f"id-{i:03d}" for i in range(300)
+    ]
+
+
+def test_completed_export_is_not_rerun(export_env):
+    first = onboarding_export.export_onboarding_logic({"bucket": BUCKET}, {})
+
+    again = onboarding_export.export_onboarding_logic(
+        {"exportId": first["exportId"]}, {}
+    )
+
+    assert again["status"] == "complete"
+    assert again["rowsThisRun"] == 0
+    assert again["rows"] == 300
+
+
+def test_unknown_export_id(export_env):
+    result = onboarding_export.export_onboarding_logic({"exportId": "nope"}, {})
+
+    assert result["statusCode"] == 404
+
+
+def test_invalid_segment_count(export_env):
+    result = onboarding_export.export_onboarding_logic({"totalSegments": 0}, {})
+
+    assert result["statusCode"] == 400
+
+
+def test_export_needs_a_bucket(export_env, monkeypatch):
+    monkeypatch.setattr(onboarding_export, "EXPORT_BUCKET", "")
+
+    result = onboarding_export.export_onboarding_logic({}, {})
+
+    assert result == {"statusCode": 500, "error": "EXPORT_BUCKET is not configured"}
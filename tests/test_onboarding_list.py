@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from lambdas import aws_clients, onboarding
+
+
+def list_records(**query_params):
+    event = {
+        "httpMethod": "GET",
+        "path": "/onboarding",
+        "queryStringParameters": query_params or None,
+    }
+    response = onboarding.onboarding_logic(event, {})
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture
+def seeded_table(mock_onboarding_table):
+    # 30 records: every third one submitted, split across two users
+    for i in range(30):
+        mock_onboarding_table.put_item(
+            Item={
+                "onboardingId": f"id-{i:02d}",
+                "userId": "alice" if i % 2 == 0 else "bob",
+                "status": "submitted" if i % 3 == 0 else "draft",
+                "updatedAt": f"2026-01-01T00:00:{i:02d}",
+            }
+        )
+    return mock_onboarding_table
+
+
+@pytest.fixture
+def dynamodb_calls(seeded_table):
+    calls = []
+    aws_clients.resource("dynamodb").meta.client.meta.events.register(
+        "before-call.dynamodb",
+        lambda model, **kwargs: calls.append(model.name),
+    )
+    return calls
+
+
+def test_status_filter_queries_index_newest_first(dynamodb_calls):
+    status, body = list_records(status="submitted", limit="4")
+
+    assert dynamodb_calls == ["Query"]
+    assert status == 200
+    assert [item["onboardingId"] for item in body["data"]] == [
+        "id-27",
+        "id-24",
+        "id-21",
+        "id-18",
+    ]
+    assert "lastKey" in body
+
+
+def test_cursor_pages_through_index_without_gaps(seeded_table):
+    seen = []
+    params = {"status": "draft", "limit": "7"}
+    while True:
+        status, body = list_records(**params)
+        assert status == 200
+        seen.extend(item["onboardingId"] for item in body["data"])
+        if "lastKey" not in body:
+            break
+        params["lastKey"] = body["lastKey"]
+
+    expected = [f"id-{i:02d}" for i in reversed(range(30)) if i % 3 != 0]
+    assert seen == expected
+
+
+def test_cursor_encodes_full_index_key(seeded_table):
+    _, body = list_records(status="submitted", limit="1")
+
+    assert onboarding.decode_cursor(body["lastKey"]) == {
+        "onboardingId": "id-27",
+        "status": "submitted",
+        "updatedAt": "2026-01-01T00:00:27",
+    }
+
+
+def test_user_filter_with_status_fills_the_page(seeded_table):
+    status, body = list_records(userId="alice", status="submitted", limit="3")
+
+    assert status == 200
+    assert [item["onboardingId"] for item in body["data"]] == [
+        "id-24",
+        "id-18",
+        "id-12",
+    ]
+
+
+def test_unfiltered_listing_falls_back_to_scan(dynamodb_calls):
+    status, body = list_records(limit="100")
+
+    assert dynamodb_calls == ["Scan"]
+    assert status == 200
+    assert body["count"] == 30
+    assert "lastKey" not in body
+
+
+def test_invalid_cursor_is_rejected(seeded_table):
+    status, body = list_records(lastKey="not-a-cursor")
+
+    assert status == 400
+    assert body["error"] == "Invalid lastKey cursor"
+
+
+def test_create_without_user_id_omits_index_key(mock_onboarding_table):
+    event = {"httpMethod": "POST", "path": "/onboarding", "body": json.dumps({})}
+
+    response = onboarding.onboarding_logic(event, {})
+
+    assert response["statusCode"] == 201
+    assert "userId" not in json.loads(response["body"])["data"]
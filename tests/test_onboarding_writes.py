@@ -0,0 +1,157 @@
+import json
+
+import pytest
+
+from lambdas import aws_clients, onboarding
+
+STEP_1 = {
+    "companyName": "Test Corp",
+    "contactName": "Jane Doe",
+    "contactEmail": "jane@example.com",
+}
+
+
+def call(method, path, body=None, query_params=None):
+    event = {
+        "httpMethod": method,
+        "path": path,
+        "queryStringParameters": query_params,
+        "body": json.dumps(body) if body is not None else None,
+    }
+    response = onboarding.onboarding_logic(event, {})
+    return response["statusCode"], json.loads(response["body"])
+
+
+def update_step(onboarding_id, version=None, company="Test Corp"):
+    body = {"step": 1, "data": dict(STEP_1, companyName=company)}
+    if version is not None:
+        body["version"] = version
+    return call("PUT", f"/onboarding/{onboarding_id}/step", body)
+
+
+@pytest.fixture
+def onboarding_id(mock_onboarding_table):
+    _, body = call("POST", "/onboarding", {"userId": "user123"})
+    return body["onboardingId"]
+
+
+@pytest.fixture
+def dynamodb_calls(onboarding_id):
+    calls = []
+    aws_clients.resource("dynamodb").meta.client.meta.events.register(
+        "before-call.dynamodb",
+        lambda model, **kwargs: calls.append(model.name),
+    )
+    return calls
+
+
+def test_create_starts_at_version_1(onboarding_id):
+    _, body = call("GET", f"/onboarding/{onboarding_id}")
+
+    assert body["data"]["version"] == 1
+
+
+def test_external_id_is_issued_on_create_and_never_taken_from_a_request(
+    onboarding_id,
+):
+    _, created = call("GET", f"/onboarding/{onboarding_id}")
+    external_id = created["data"]["externalId"]
+    assert external_id
+
+    call(
+        "PUT",
+        f"/onboarding/{onboarding_id}/step",
+        {"step": 1, "data": dict(STEP_1, externalId="chosen")},
+    )
+    _, body = call("POST", "/onboarding", dict(STEP_1, externalId="chosen"))
+
+    assert call("GET", f"/onboarding/{onboarding_id}")[1]["data"]["externalId"] == (
+        external_id
+    )
+    assert body["data"]["externalId"] not in ("chosen", external_id)
+
+
+def test_step_update_is_one_conditional_write(onboarding_id, dynamodb_calls):
+    status, body = update_step(onboarding_id, version=1)
+
+    assert status == 200
+    assert body["data"]["version"] == 2
+    assert dynamodb_calls == ["UpdateItem"]
+
+
+def test_submit_and_delete_are_one_call_each(onboarding_id, dynamodb_calls):
+    assert call("POST", f"/onboarding/{onboarding_id}/submit", {})[0] == 200
+    assert call("DELETE", f"/onboarding/{onboarding_id}")[0] == 200
+
+    assert dynamodb_calls == ["UpdateItem", "DeleteItem"]
+
+
+@pytest.mark.parametrize(
+    "method, suffix, body",
+    [
+        ("PUT", "/step", {"step": 1, "data": STEP_1}),
+        ("POST", "/submit", {}),
+        ("DELETE", "", None),
+    ],
+)
+def test_missing_record_returns_404(mock_onboarding_table, method, suffix, body):
+    status, response_body = call(method, f"/onboarding/missing{suffix}", body)
+
+    assert status == 404
+    assert response_body["error"] == "Onboarding not found"
+    assert mock_onboarding_table.scan()["Items"] == []
+
+
+def test_stale_version_returns_409_with_current_version(onboarding_id):
+    # Two writers both read version 1; the second write must not clobber the first
+    assert update_step(onboarding_id, version=1, company="First")[0] == 200
+
+    status, body = update_step(onboarding_id, version=1, company="Second")
+
+    assert status == 409
+    assert body["currentVersion"] == 2
+    _, current = call("GET", f"/onboarding/{onboarding_id}")
+    assert current["data"]["companyName"] == "First"
+
+
+def test_concurrent_writers_only_one_wins(onboarding_id):
+    # Every writer read version 1 before any of them wrote. moto does not make
+    # conditional writes atomic across threads, so the interleaving is explicit.
+    _, snapshot = call("GET", f"/onboarding/{onboarding_id}")
+    read_version = snapshot["data"]["version"]
+
+    statuses = [
+        update_step(onboarding_id, version=read_version, company=f"Writer {i}")[0]
+        for i in range(8)
+    ]
+
+    assert statuses == [200] + [409] * 7
+    _, current = call("GET", f"/onboarding/{onboarding_id}")
+    assert current["data"]["version"] == 2
+    assert current["data"]["companyName"] == "Writer 0"
+
+
+def test_unversioned_writes_still_increment_version(onboarding_id):
+    update_step(onboarding_id)
+    status, body = call("POST", f"/onboarding/{onboarding_id}/submit", {})
+
+    assert status == 200
+    assert body["data"]["version"] == 3
+
+
+def test_delete_with_stale_version_is_rejected(onboarding_id):
+    update_step(onboarding_id)
+
+    status, _ = call(
+        "DELETE", f"/onboarding/{onboarding_id}", query_params={"version": "1"}
+    )
+
+    assert status == 409
+    assert call("GET", f"/onboarding/{onboarding_id}")[0] == 200
+
+
+def test_invalid_version_is_rejected(onboarding_id):
+    status, body = update_step(onboarding_id, version="abc")
+
+    assert status == 400
+    assert body["error"] == "version must be a positive integer"
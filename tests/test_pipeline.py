@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+from lambdas.pipeline import batched, fan_in
+
+
+def test_fan_in_yields_every_item_from_every_producer():
+    producers = [lambda n=n: range(n * 100, n * 100 + 50) for n in range(5)]
+
+    items = list(fan_in(producers, max_workers=2))
+
+    assert sorted(items) == sorted(
+        i for n in range(5) for i in range(n * 100, n * 100 + 50)
+    )
+
+
+def test_fan_in_bounds_concurrency():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def producer():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.02)
+        with lock:
+            active.pop()
+        yield 1
+
+    assert sum(fan_in([producer] * 8, max_workers=3)) == 8
+    assert max(peak) <= 3
+
+
+def test_fan_in_propagates_producer_errors():
+    def broken():
+        yield 1
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(fan_in([broken, lambda: range(10)], max_workers=2))
+
+
+def test_fan_in_stops_blocked_producers_when_consumer_closes():
+    def endless():
+        while True:
+            yield 1
+
+    items = fan_in([endless, endless], max_workers=2, max_buffered=2)
+    assert next(items) == 1
+    items.close()  # must not hang on producers blocked on a full buffer
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
@@ -1,7 +1,467 @@
+import random
+from unittest.mock import MagicMock
+
 import pytest
-from lambdas.remediation_planning import remediation_planning_logic
 
+from lambdas import remediation_planning, watermarks
+from lambdas.findings import FindingBatch
+from lambdas.remediation_planning import (
+    PREREQUISITES,
+    classify,
+    plan_diff,
+    plan_remediation,
+    remediation_planning_logic,
+    replan,
+    resource_key,
+    save_plan,
+)
+
+
+def finding(finding_id, resource_id, title, severity="high", account="111", **extra):
+    values = {
+        "source": "aws",
+        "finding_id": finding_id,
+        "onboarding_id": "ob-1",
+        "account_id": account,
+        "region": "us-east-1",
+        "resource_type": extra.get("resource_type"),
+        "resource_id": resource_id,
+        "severity": severity,
+        "score": extra.get("score"),
+        "title": title,
+        "status": "NEW",
+        "updated_at": None,
+    }
+    return tuple(values.values())
+
+
+def planned(plan):
+    return [(plan.areas[i], plan.resource_ids[i]) for i in plan.order]
+
+
+@pytest.mark.parametrize(
+    "resource_type, title, expected",
+    [
+        ("AwsIamPolicy", "IAM policy allows full admin privileges", ("iam", False)),
+        ("AwsS3Bucket", "S3 bucket policy allows public read", ("data", True)),
+        (
+            "AwsEc2SecurityGroup",
+            "Security group allows ingress from 0.0.0.0/0 to port 22",
+            ("network", True),
+        ),
+        ("VIRTUAL_MACHINE", "CVE-2026-0001", ("vulnerability", False)),
+        ("AwsCloudTrailTrail", "CloudTrail should be enabled", ("logging", False)),
+        ("http_endpoint", "GET https://example.com/", ("network", False)),
+        (None, "Tag policy", ("compliance", False)),
+    ],
+)
+def test_classifies_findings_into_focus_areas(resource_type, title, expected):
+    assert classify(resource_type, title) == expected
+
+
+def test_prerequisites_only_name_known_areas_and_are_acyclic():
+    for area, prerequisites in PREREQUISITES.items():
+        seen, stack = set(), list(prerequisites)
+        while stack:
+            prerequisite = stack.pop()
+            assert prerequisite in remediation_planning.FOCUS_AREAS
+            assert prerequisite != area
+            if prerequisite not in seen:
+                seen.add(prerequisite)
+                stack.extend(PREREQUISITES.get(prerequisite, ()))
+
+
+def test_iam_fixes_come_before_the_data_fixes_they_block():
+    findings = FindingBatch.from_rows(
+        [
+            finding("1", "bucket-a", "S3 bucket policy allows public read", "critical"),
+            finding("2", "role-a", "IAM role has admin privileges", "low"),
+            finding(
+                "3", "bucket-b", "S3 bucket not encrypted", "medium", account="222"
+            ),
+        ]
+    )
+
+    plan = plan_remediation(findings, focus_areas=[])
+
+    assert planned(plan) == [
+        ("iam", "role-a"),
+        ("data", "bucket-a"),
+        ("data", "bucket-b"),
+    ]
+    # The low IAM task inherits the priority of the critical task it blocks
+    first = plan.order[0]
+    assert plan.priorities[first] == plan.risks[plan.order[1]] > plan.risks[first]
+    assert plan.blocked_by[plan.order[1]] == ["iam"]
+    assert plan.blocked_by[plan.order[2]] == []
+
+
+def test_focus_areas_and_exposure_raise_risk():
+    findings = FindingBatch.from_rows(
+        [
+            finding("1", "trail", "CloudTrail should be enabled", "high"),
+            finding("2", "vm", "CVE-2026-0001", "high"),
+        ]
+    )
+
+    default = plan_remediation(findings, focus_areas=[])
+    focused = plan_remediation(FindingBatch.from_rows(findings), ["logging"])
+
+    assert default.risks[0] == default.risks[1] == pytest.approx(0.7)
+    assert focused.risks[0] == pytest.approx(0.7 * 1.5)
+    assert planned(focused)[0] == ("logging", "trail")
+    exposed = plan_remediation(
+        FindingBatch.from_rows([finding("3", "b", "Bucket is public", "high")]), []
+    )
+    assert exposed.risks[0] == pytest.approx(0.7 * 1.5)
+
+
+def test_findings_on_one_resource_and_area_become_one_task():
+    findings = FindingBatch.from_rows(
+        [
+            finding("1", "bucket", "S3 bucket not encrypted", "low"),
+            finding("2", "bucket", "S3 bucket versioning disabled", "high"),
+            finding("3", "bucket", "S3 bucket access logging disabled", "medium"),
+            finding("4", None, "Tag policy", "low"),
+            finding("5", None, "Tag policy", "low"),
+        ]
+    )
+
+    plan = plan_remediation(findings, focus_areas=[])
+
+    by_area = {plan.areas[i]: i for i in plan.order if plan.resource_ids[i]}
+    assert len(plan) == 4
+    data = by_area["data"]
+    assert plan.finding_counts[data] == 2
+    assert plan.titles[data] == "S3 bucket versioning disabled"
+    assert plan.risks[data] == pytest.approx(0.7 * 1.1)
+    assert "logging" in by_area
+
+
+def test_plan_rows_follow_the_schedule():
+    findings = FindingBatch.from_rows(
+        [finding(str(i), f"r-{i}", "Tag policy", "low", score=i) for i in range(5)]
+    )
+
+    plan = plan_remediation(findings, focus_areas=[], onboarding_id="ob-1")
+    rows = list(plan.rows())
+
+    assert [row[5] for row in rows] == ["r-4", "r-3", "r-2", "r-1", "r-0"]
+    assert [task["position"] for task in plan.preview(2)] == [1, 2]
+    assert plan.preview(2)[0]["resourceId"] == "r-4"
+
+
+def test_equal_priority_prerequisites_come_first():
+    findings = FindingBatch.from_rows(
+        [
+            finding("1", "bucket", "S3 bucket not encrypted", "high"),
+            finding("2", "role", "IAM role has admin privileges", "high"),
+            finding("3", "sg", "Security group allows ingress on port 22", "low"),
+            finding("4", "vm", "CVE-2026-0001", "critical"),
+        ]
+    )
+
+    plan = plan_remediation(findings, focus_areas=[])
+
+    # The security group and, through it, the role inherit the CVE's
+    # priority; tasks of equal priority go in prerequisite order
+    assert planned(plan) == [
+        ("iam", "role"),
+        ("network", "sg"),
+        ("vulnerability", "vm"),
+        ("data", "bucket"),
+    ]
+
+
+def test_schedule_takes_ready_tasks_in_key_order():
+    rng = random.Random(7)
+    titles = [
+        "IAM role has admin privileges",
+        "Security group allows ingress on port 22",
+        "S3 bucket not encrypted",
+        "CVE-2026-0001",
+        "CloudTrail should be enabled",
+    ]
+    findings = FindingBatch.from_rows(
+        [
+            finding(
+                str(i),
+                f"r-{i}",
+                rng.choice(titles),
+                rng.choice(["low", "medium", "high", "critical"]),
+                account=rng.choice(["111", "222"]),
+            )
+            for i in range(200)
+        ]
+    )
+
+    plan = plan_remediation(findings, focus_areas=[])
+
+    assert plan.order == sorted(range(len(plan)), key=plan.sort_key)
+    position = {task: n for n, task in enumerate(plan.order)}
+    for i in plan.order:
+        for prerequisite in plan.blocked_by[i]:
+            blockers = [
+                j
+                for j in range(len(plan))
+                if plan.areas[j] == prerequisite
+                and plan.account_ids[j] == plan.account_ids[i]
+            ]
+            assert all(position[j] < position[i] for j in blockers)
+
+
+def test_remediation_planning_logic_validates_event():
+    assert remediation_planning_logic({}, None)["statusCode"] == 400
+    response = remediation_planning_logic(
+        {"onboardingId": "ob-1", "focusAreas": ["cooking"]}, None
+    )
+    assert response["statusCode"] == 400
+
+
+def test_remediation_planning_logic_plans_and_stores(
+    mock_onboarding_table, mock_context_table, monkeypatch
+):
+    mock_onboarding_table.put_item(
+        Item={"onboardingId": "ob-1", "focusAreas": ["data"]}
+    )
+    findings = FindingBatch.from_rows(
+        [
+            finding("1", "bucket", "S3 bucket policy allows public read", "high"),
+            finding("2", "role", "IAM role has admin privileges", "medium"),
+        ]
+    )
+    monkeypatch.setattr(remediation_planning, "load_findings", lambda _: findings)
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.copy_expert.side_effect = lambda sql, stream: setattr(
+        cursor, "copied", stream.read()
+    )
+    save_plan = remediation_planning.save_plan
+    monkeypatch.setattr(
+        remediation_planning,
+        "save_plan",
+        lambda plan, diff=None: save_plan(plan, lambda: connection, diff),
+    )
+
+    result = remediation_planning_logic({"onboardingId": "ob-1"}, None)
+
+    assert result["statusCode"] == 200
+    assert result["mode"] == "full"
+    assert result["focusAreas"] == ["data"]
+    assert result["tasks"] == 2
+    assert [task["area"] for task in result["plan"]] == ["iam", "data"]
+    assert result["plan"][1]["blockedBy"] == ["iam"]
+    assert result["diff"]["added"] == 2
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert "information_schema.tables" in statements[0]
+    assert "ALTER TABLE" not in statements[1]
+    assert "DELETE FROM remediation_tasks" in statements[-1]
+    assert cursor.copied.startswith("ob-1,")
+    # The schema is set up in a transaction of its own, then the plan
+    assert connection.commit.call_count == 2
+
+
+def estate(count, seed):
+    """Findings over a few accounts, several per resource"""
+    rng = random.Random(seed)
+    kinds = (
+        ("AwsIamRole", "IAM role has admin privileges"),
+        ("AwsS3Bucket", "S3 bucket policy allows public read"),
+        ("AwsS3Bucket", "S3 bucket not encrypted"),
+        ("AwsEc2SecurityGroup", "Security group allows ingress on port 22"),
+        ("VIRTUAL_MACHINE", "CVE-2026-0001"),
+        ("AwsCloudTrailTrail", "CloudTrail should be enabled"),
+        (None, "Tag policy"),
+    )
+    rows = {}
+    for i in range(count):
+        resource_type, title = rng.choice(kinds)
+        resource = rng.randrange(count // 3)
+        rows[str(i)] = finding(
+            str(i),
+            f"{resource_type}-{resource}" if resource_type else None,
+            title,
+            rng.choice(("critical", "high", "medium", "low")),
+            account=str(resource % 4),
+            resource_type=resource_type,
+        )
+    return rows
+
+
+def changed(rows, ids):
+    """The open findings and touched keys for the findings ``ids``"""
+    touched = {
+        (rows[i][3], resource_key(rows[i][0], rows[i][1], rows[i][6])) for i in ids
+    }
+    findings = [
+        row
+        for row in rows.values()
+        if (row[3], resource_key(row[0], row[1], row[6])) in touched
+        and row[10] != "RESOLVED"
+    ]
+    return FindingBatch.from_rows(findings), touched
+
+
+def test_replan_matches_a_full_rebuild():
+    rows = estate(600, seed=3)
+    previous = plan_remediation(FindingBatch.from_rows(rows.values()), ["data"])
+    rng = random.Random(5)
+    ids = rng.sample(sorted(rows), 12)
+    for i in ids[:6]:
+        rows[i] = rows[i][:7] + ("critical",) + rows[i][8:]
+    for i in ids[6:9]:
+        rows[i] = rows[i][:10] + ("RESOLVED",) + rows[i][11:]
+    rows["new-1"] = finding("new-1", "role-new", "IAM user without MFA", "low", "9")
+    rows["new-2"] = finding("new-2", "bucket-new", "Bucket is public", "high", "9")
+    ids += ["new-1", "new-2"]
+
+    findings, touched = changed(rows, ids)
+    plan, diff = replan(previous, findings, touched, ["data"])
+    rebuilt = plan_remediation(
+        FindingBatch.from_rows(row for row in rows.values() if row[10] != "RESOLVED"),
+        ["data"],
+    )
+
+    assert [plan.task_ids[i] for i in plan.order] == [
+        rebuilt.task_ids[i] for i in rebuilt.order
+    ]
+    assert list(plan.rows()) == list(rebuilt.rows())
+    assert diff.summary(plan, limit=1000) == plan_diff(previous, plan).summary(
+        plan, limit=1000
+    )
+    assert diff.added and diff.changed and diff.moved
+    assert {task for task, _ in diff.removed} == set(previous.task_ids) - set(
+        plan.task_ids
+    )
+
+
+def test_plan_diff_reports_changes_against_the_previous_plan():
+    previous = plan_remediation(
+        FindingBatch.from_rows(
+            [
+                finding("1", "bucket", "S3 bucket not encrypted", "low"),
+                finding("2", "vm", "CVE-2026-0001", "medium"),
+                finding("3", "other", "Tag policy", "low"),
+            ]
+        ),
+        [],
+    )
+    plan = plan_remediation(
+        FindingBatch.from_rows(
+            [
+                finding("1", "bucket", "S3 bucket not encrypted", "critical"),
+                finding("2", "vm", "CVE-2026-0001", "medium"),
+                finding("4", "trail", "CloudTrail should be enabled", "high"),
+            ]
+        ),
+        [],
+    )
+
+    summary = plan_diff(previous, plan).summary(plan)
+
+    assert summary["added"] == summary["changed"] == summary["removed"] == 1
+    assert summary["moved"] == 1
+    assert [(task["change"], task.get("position")) for task in summary["tasks"]] == [
+        ("changed", 1),
+        ("added", 2),
+        ("removed", None),
+    ]
+
+
+def test_remediation_planning_logic_replans_only_changed_resources(
+    mock_context_table, monkeypatch
+):
+    rows = estate(300, seed=11)
+    stored = {}
+    monkeypatch.setattr(
+        remediation_planning,
+        "load_findings",
+        lambda _: FindingBatch.from_rows(rows.values()),
+    )
+    monkeypatch.setattr(
+        remediation_planning,
+        "save_plan",
+        lambda plan, diff=None: stored.update(plan=plan, diff=diff),
+    )
+    event = {"onboardingId": "ob-1", "focusAreas": ["iam"]}
+    assert remediation_planning_logic(event, None)["mode"] == "full"
+
+    rows["1"] = rows["1"][:7] + ("critical",) + rows["1"][8:]
+    since = []
+    monkeypatch.setattr(remediation_planning, "load_plan", lambda _: stored["plan"])
+    monkeypatch.setattr(
+        remediation_planning,
+        "load_changed_findings",
+        lambda _, planned_at: since.append(planned_at) or changed(rows, ["1"]),
+    )
+
+    result = remediation_planning_logic(event, None)
+
+    assert result["mode"] == "incremental"
+    assert since and since[0] <= watermarks.high_water_mark()
+    assert result["findings"] < 10
+    assert result["diff"]["changed"] >= 1
+    assert result["diff"]["added"] == result["diff"]["removed"] == 0
+    assert stored["diff"] is not None
+    # A change of focus areas is a full rebuild
+    result = remediation_planning_logic({**event, "focusAreas": ["data"]}, None)
+    assert result["mode"] == "full"
+
+
+def test_loading_findings_before_any_import_creates_the_schema():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = []
+    cursor.__iter__.return_value = iter([])
+
+    findings = remediation_planning.load_findings("ob-1", lambda: connection)
+    changed, touched = remediation_planning.load_changed_findings(
+        "ob-1", "2026-01-01T00:00:00Z", lambda: MagicMock()
+    )
+
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert "information_schema.tables" in statements[0]
+    assert "CREATE TABLE IF NOT EXISTS findings" in statements[1]
+    assert len(findings) == len(changed) == 0
+    assert touched == set()
+
+
+def test_save_plan_with_a_diff_only_writes_what_changed():
+    previous = plan_remediation(
+        FindingBatch.from_rows(
+            [
+                finding("1", "bucket", "S3 bucket not encrypted", "low"),
+                finding("2", "vm", "CVE-2026-0001", "medium"),
+                finding("3", "other", "Tag policy", "low"),
+            ]
+        ),
+        [],
+        onboarding_id="ob-1",
+    )
+    plan = plan_remediation(
+        FindingBatch.from_rows(
+            [
+                finding("1", "bucket", "S3 bucket not encrypted", "low"),
+                finding("2", "vm", "CVE-2026-0001", "critical"),
+            ]
+        ),
+        [],
+        onboarding_id="ob-1",
+    )
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.copy_expert.side_effect = lambda sql, stream: setattr(
+        cursor, "copied", stream.read()
+    )
+
+    save_plan(plan, lambda: connection, plan_diff(previous, plan))
 
-def test_remediation_planning_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        remediation_planning_logic({}, {})
+    # After the schema check and setup
+    statements = [call.args for call in cursor.execute.call_args_list][2:]
+    assert "task_id = ANY" in statements[0][0]
+    assert statements[0][1] == ("ob-1", [previous.task_ids[2]])
+    assert statements[-1][0].lstrip().startswith("INSERT INTO remediation_tasks")
+    # The bucket task only moved down, so it is not rewritten
+    copied = [line.split(",")[1:3] for line in cursor.copied.splitlines()]
+    assert copied == [[plan.task_ids[plan.order[0]], "vulnerability"]]
+    assert connection.commit.call_count == 2
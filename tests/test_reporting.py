@@ -1,7 +1,251 @@
+import csv
+import gzip
+import io
+from datetime import date, datetime, timezone
+from unittest.mock import MagicMock
+
+import boto3
 import pytest
-from lambdas.reporting import reporting_logic
+from moto import mock_aws
+
+from lambdas import reporting
+from lambdas.reporting import (
+    REPORT_COLUMNS,
+    generate_report,
+    posture_summary,
+    rebuild_rollups,
+    reporting_logic,
+)
+
+BUCKET = "test-report-bucket"
+
+
+@pytest.fixture
+def connection():
+    connection = MagicMock()
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = []
+    return connection
+
+
+def executed(connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    return [call.args for call in cursor.execute.call_args_list]
+
+
+def test_posture_summary_merges_daily_rollups(connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [
+        (date(2026, 1, 2), None, None, None, 0b0111, 2, 1, 80.0),
+        (date(2026, 1, 1), None, None, None, 0b0111, 3, 3, 150.0),
+        (None, "wiz", None, None, 0b1011, 1, 1, 90.0),
+        (None, "aws", None, None, 0b1011, 4, 3, 140.0),
+        (None, None, "low", None, 0b1101, 1, 0, 10.0),
+        (None, None, "critical", None, 0b1101, 4, 4, 220.0),
+        (None, None, None, "data", 0b1110, 3, 2, 120.0),
+        (None, None, None, "iam", 0b1110, 2, 2, 110.0),
+        (None, None, None, None, 0b1111, 5, 4, 230.0),
+    ]
+
+    summary = posture_summary(
+        "ob-1", date(2026, 1, 1), date(2026, 1, 31), lambda: connection
+    )
+
+    # After the schema check and setup
+    prepare, execute = executed(connection)[2:]
+    assert "WHERE onboarding_id = $1 AND day BETWEEN $2 AND $3" in prepare[0]
+    assert execute[1] == ("ob-1", date(2026, 1, 1), date(2026, 1, 31))
+    assert summary["totals"] == {"findings": 5, "open": 4, "averageScore": 46.0}
+    assert list(summary["bySeverity"]) == ["critical", "low"]
+    assert list(summary["bySource"]) == ["aws", "wiz"]
+    assert list(summary["byFocusArea"]) == ["iam", "data"]
+    assert summary["daily"] == [
+        {"day": "2026-01-01", "findings": 3, "open": 3, "averageScore": 50.0},
+        {"day": "2026-01-02", "findings": 2, "open": 1, "averageScore": 40.0},
+    ]
+
+
+def test_posture_summary_of_an_empty_range(connection):
+    summary = posture_summary(
+        "ob-1", date(2026, 1, 1), date(2026, 1, 1), lambda: connection
+    )
+
+    assert "information_schema.tables" in executed(connection)[0][0]
+    assert "CREATE TABLE IF NOT EXISTS finding_rollups" in executed(connection)[1][0]
+    assert summary["totals"] == {"findings": 0, "open": 0, "averageScore": None}
+    assert summary["daily"] == []
+
+
+def test_rebuild_rollups_classifies_old_findings_first(connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [
+        ("AwsS3Bucket", "S3 bucket not encrypted"),
+        (None, "IAM user without MFA"),
+    ]
+
+    assert rebuild_rollups("ob-1", lambda: connection) == 2
+
+    # After the schema check and setup
+    statements = executed(connection)[2:]
+    assert statements[1][1] == (
+        ["AwsS3Bucket", None],
+        ["S3 bucket not encrypted", "IAM user without MFA"],
+        ["data", "iam"],
+        "ob-1",
+    )
+    assert "INSERT INTO finding_rollups" in statements[2][0]
+    assert connection.commit.call_count == 2
+
+
+def test_reporting_logic_validates_event():
+    assert reporting_logic({}, None)["statusCode"] == 400
+    for dates in (
+        {"start": "yesterday"},
+        {"start": "2026-02-01", "end": "2026-01-01"},
+    ):
+        response = reporting_logic({"onboardingId": "ob-1", **dates}, None)
+        assert response["statusCode"] == 400
+
+
+def test_reporting_logic_defaults_to_the_last_days(monkeypatch):
+    ranges = []
+    monkeypatch.setattr(
+        reporting,
+        "posture_summary",
+        lambda onboarding_id, start, end: ranges.append((start, end)) or {},
+    )
+
+    response = reporting_logic({"onboardingId": "ob-1"}, None)
+
+    today = datetime.now(timezone.utc).date()
+    assert response["statusCode"] == 200
+    assert response["end"] == today.isoformat()
+    assert (ranges[0][1] - ranges[0][0]).days == reporting.DEFAULT_REPORT_DAYS - 1
+
+    reporting_logic(
+        {"onboardingId": "ob-1", "start": "2026-01-01T10:00:00Z", "end": "2026-01-05"},
+        None,
+    )
+    assert ranges[1] == (date(2026, 1, 1), date(2026, 1, 5))
+
+
+def finding(i):
+    return (
+        "aws",
+        f"f-{i}",
+        "111111111111",
+        "us-east-1",
+        "AwsS3Bucket",
+        f"bucket-{i}",
+        "S3 bucket <public> & open",
+        "high",
+        70.0,
+        "NEW",
+        "2026-01-02T00:00:00Z",
+        "data",
+    )
+
+
+@pytest.fixture
+def report_env(aws_credentials, connection, monkeypatch):
+    monkeypatch.setattr("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 1)
+    monkeypatch.setattr(reporting, "PART_SIZE_BYTES", 1)
+    monkeypatch.setattr(reporting, "REPORT_BATCH_ROWS", 40)
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.__iter__.side_effect = lambda: iter([finding(i) for i in range(100)])
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        yield s3
+
+
+def report(connection, report_format):
+    return generate_report(
+        "ob-1",
+        date(2026, 1, 1),
+        date(2026, 1, 31),
+        report_format,
+        BUCKET,
+        lambda: connection,
+    )
+
+
+def read_report(s3, key):
+    body = s3.get_object(Bucket=BUCKET, Key=key)["Body"].read()
+    return gzip.decompress(body).decode("utf-8")
+
+
+def test_csv_report_streams_to_s3_in_parts(report_env, connection):
+    result = report(connection, "csv")
+
+    assert result["rows"] == 100
+    assert result["parts"] == 4
+    assert result["key"].startswith("reports/ob-1/")
+    assert result["url"].startswith(f"https://{BUCKET}.s3.amazonaws.com/reports/")
+    head = report_env.head_object(Bucket=BUCKET, Key=result["key"])
+    assert head["ContentEncoding"] == "gzip"
+    rows = list(csv.reader(io.StringIO(read_report(report_env, result["key"]))))
+    assert rows[0] == list(REPORT_COLUMNS)
+    assert [row[1] for row in rows[1:]] == [f"f-{i}" for i in range(100)]
+    connection.cursor.assert_called_with(name="report_findings")
+    # The schema setup, then the report's read
+    assert "information_schema.tables" in executed(connection)[0][0]
+    assert connection.commit.call_count == 2
+
+
+def test_html_report_escapes_values_and_leads_with_totals(report_env, connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [(None, None, "high", None, 0b1101, 100, 100, 7e3)]
+
+    page = read_report(report_env, report(connection, "html")["key"])
+
+    assert page.startswith("<!DOCTYPE html>")
+    assert "<tr><td>high</td><td>100</td><td>100</td></tr>" in page
+    assert page.count("S3 bucket &lt;public&gt; &amp; open") == 100
+    assert page.endswith("</html>\n")
+
+
+def test_failed_report_aborts_the_upload(report_env, connection):
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.__iter__.side_effect = lambda: iter([finding(0), None])
+
+    with pytest.raises(csv.Error):
+        report(connection, "csv")
+
+    assert "Uploads" not in report_env.list_multipart_uploads(Bucket=BUCKET)
+    connection.rollback.assert_called_once()
+
+
+def test_reporting_logic_returns_a_link_to_the_report(monkeypatch):
+    monkeypatch.setattr(
+        reporting,
+        "generate_report",
+        lambda onboarding_id, start, end, report_format, bucket: {
+            "key": f"reports/{onboarding_id}/r.{report_format}.gz",
+            "rows": 3,
+            "parts": 1,
+            "url": "https://example.com/r",
+        },
+    )
+
+    response = reporting_logic(
+        {"onboardingId": "ob-1", "format": "html", "bucket": BUCKET}, None
+    )
+
+    assert response["statusCode"] == 200
+    assert response["location"] == f"s3://{BUCKET}/reports/ob-1/r.html.gz"
+    assert response["url"] == "https://example.com/r"
+    assert response["expiresIn"] == reporting.REPORT_URL_SECONDS
+    assert "totals" not in response
+    assert (
+        reporting_logic({"onboardingId": "ob-1", "format": "pdf"}, None)["statusCode"]
+        == 400
+    )
+
+
+def test_reporting_logic_needs_a_bucket_for_reports(monkeypatch):
+    monkeypatch.setattr(reporting, "REPORT_BUCKET", "")
 
+    response = reporting_logic({"onboardingId": "ob-1", "format": "csv"}, None)
 
-def test_reporting_logic_not_implemented():
-    with pytest.raises(NotImplementedError):
-        reporting_logic({}, {})
+    assert response == {"statusCode": 500, "error": "EXPORT_BUCKET is not configured"}